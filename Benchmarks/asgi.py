@@ -0,0 +1,95 @@
+"""
+Compara a vazão e a latência (p50 e p95) de requisições concorrentes ao
+dashboard e às listagens de localidades nos perfis WSGI (workers síncronos do
+gunicorn) e ASGI (workers do uvicorn sob o gunicorn, com as views async).
+
+O script cria um banco de testes com --fazendas fazendas, sobe o gunicorn em
+cada perfil, com o mesmo número de workers, e dispara --quantidade
+requisições por endpoint com --concorrencia threads. O ganho do perfil ASGI
+aparece com o PostgreSQL, em que as requisições esperam pelo banco na rede;
+com o SQLite (um arquivo temporário, para ser compartilhado com os
+servidores), as consultas ocupam a CPU do próprio worker.
+
+Uso:
+    python Benchmarks/asgi.py [--workers 3] [--concorrencia 32] \
+        [--quantidade 300] [--fazendas 2000]
+"""
+
+import argparse
+import os
+import sys
+
+import django
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "BrainAgricultureTesteV2.settings")
+django.setup()
+
+from servidor import banco_de_testes, get, iniciar_servidor, medir, popular
+
+ENDPOINTS = (
+    "/api/brainagriculture/v1/dashboards/",
+    "/api/localidades/v1/estados/",
+    "/api/localidades/v1/cidades/?limit=100",
+)
+
+PERFIS = (
+    (
+        "WSGI",
+        "",
+        ["--worker-class", "sync", "BrainAgricultureTesteV2.wsgi:application"],
+    ),
+    (
+        "ASGI",
+        "1",
+        [
+            "--worker-class",
+            "uvicorn_worker.UvicornWorker",
+            "BrainAgricultureTesteV2.asgi:application",
+        ],
+    ),
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--concorrencia", type=int, default=32)
+    parser.add_argument("--quantidade", type=int, default=300)
+    parser.add_argument("--fazendas", type=int, default=2000)
+    args = parser.parse_args()
+
+    with banco_de_testes() as nome_banco:
+        token = popular(args.fazendas)
+
+        for perfil, asgi, argumentos in PERFIS:
+            processo, url, _ = iniciar_servidor(
+                ["--workers", str(args.workers), *argumentos],
+                nome_banco,
+                GUNICORN_ASGI=asgi,
+                GUNICORN_THREADS="1",
+            )
+            try:
+                for endpoint in ENDPOINTS:
+                    # Aquecimento: carrega os caches de cada worker.
+                    for _ in range(args.concorrencia):
+                        get(url + endpoint, token)
+
+                    vazao, p50, p95, falhas = medir(
+                        url + endpoint, token, args.quantidade, args.concorrencia
+                    )
+                    linha = (
+                        f"{perfil} {endpoint:<42} {vazao:8.1f} req/s "
+                        f"p50 {p50 * 1e3:8.2f} ms p95 {p95 * 1e3:8.2f} ms"
+                    )
+                    if falhas:
+                        linha += f" ({falhas} falhas)"
+                    print(linha)
+            finally:
+                processo.terminate()
+                processo.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Compara a latência (p50 e p95) de endpoints leves abrindo uma conexão com o
+banco por requisição (CONN_MAX_AGE=0) e com conexões persistentes
+(Core.Database.configurar_conexoes), e conta as conexões abertas em cada
+modo.
+
+Roda no próprio processo, com o test client do Django, em um banco de testes
+criado e destruído pelo script, usando o mesmo backend configurado em
+settings. O ganho aparece com o PostgreSQL, em que abrir a conexão custa
+idas e voltas na rede e a autenticação (o SQLite em memória dos testes nunca
+fecha a conexão). No PostgreSQL, verifica também, pelo pg_stat_activity, que
+nenhuma conexão fica aberta depois que as conexões do processo são fechadas,
+como no encerramento de um worker.
+
+Uso:
+    python Benchmarks/conexoes.py [--requisicoes 500] [--max-age 60]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import django
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "BrainAgricultureTesteV2.settings")
+django.setup()
+
+from django.db import close_old_connections, connection, connections
+from django.db.backends.signals import connection_created
+from django.test import Client
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from Common.localidades.models import Estados
+from Usuarios.usuarios.models import Usuarios
+
+ENDPOINTS = (
+    "/api/localidades/v1/estados/",
+    "/api/brainagriculture/v1/dashboards/totais/",
+)
+
+
+class ContadorConexoes:
+    def __init__(self):
+        self.quantidade = 0
+
+    def __call__(self, sender, **kwargs):
+        self.quantidade += 1
+
+
+def conexoes_no_servidor():
+    if connection.vendor != "postgresql":
+        return None
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT count(*) FROM pg_stat_activity WHERE datname = current_database()"
+        )
+        return cursor.fetchone()[0] - 1
+
+
+def medir(client, url, requisicoes, max_age):
+    connections.close_all()
+    connection.settings_dict["CONN_MAX_AGE"] = max_age
+
+    contador = ContadorConexoes()
+    connection_created.connect(contador)
+    try:
+        duracoes = []
+        for _ in range(requisicoes):
+            inicio = time.perf_counter()
+            client.get(url)
+            # O test client não fecha as conexões ao fim da requisição, como
+            # o handler WSGI faz (respeitando o CONN_MAX_AGE).
+            close_old_connections()
+            duracoes.append(time.perf_counter() - inicio)
+    finally:
+        connection_created.disconnect(contador)
+
+    quantis = statistics.quantiles(duracoes, n=20)
+    return quantis[9], quantis[18], contador.quantidade
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requisicoes", type=int, default=500)
+    parser.add_argument("--max-age", type=int, default=60)
+    args = parser.parse_args()
+
+    nome_banco = connection.creation.create_test_db(verbosity=0, keepdb=False)
+    try:
+        usuario = Usuarios.objects.create_user(
+            cpf_cnpj="71842388002", nome="Benchmark", password="12345678"
+        )
+        Estados.objects.create(nome="Bahia", sigla="BA", codigo_ibge=29)
+        client = Client(
+            HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(usuario).access_token}"
+        )
+
+        for url in ENDPOINTS:
+            for descricao, max_age in (
+                ("por requisição", 0),
+                (f"persistentes ({args.max_age}s)", args.max_age),
+            ):
+                p50, p95, abertas = medir(client, url, args.requisicoes, max_age)
+                print(
+                    f"{url:<46} {descricao:<20} p50 {p50 * 1e3:7.2f} ms "
+                    f"p95 {p95 * 1e3:7.2f} ms {abertas:5d} conexões abertas"
+                )
+
+        # Como no encerramento de um worker: as conexões do processo são
+        # fechadas e o servidor não deve manter nenhuma delas.
+        antes = conexoes_no_servidor()
+        connections.close_all()
+        if antes is not None:
+            print(
+                f"conexões no servidor: {antes} com o processo ativo, "
+                f"{conexoes_no_servidor()} após fechá-las"
+            )
+    finally:
+        connection.settings_dict["CONN_MAX_AGE"] = 0
+        connection.creation.destroy_test_db(nome_banco, verbosity=0)
+
+
+if __name__ == "__main__":
+    main()
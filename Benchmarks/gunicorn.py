@@ -0,0 +1,149 @@
+"""
+Compara a invocação anterior do gunicorn (`--workers 3`, sem configuração)
+com o gunicorn.conf.py do projeto (workers pelas CPUs e memória, preload_app
+e pré-aquecimento): tempo até a primeira resposta, latência das primeiras
+requisições de cada worker, memória (PSS somada do master e dos workers) e
+vazão com requisições concorrentes.
+
+O script cria um banco de testes com --fazendas fazendas e sobe o gunicorn
+em cada configuração. A PSS divide as páginas compartilhadas entre os
+processos que as usam, então mede o ganho do copy-on-write (Linux).
+
+Uso:
+    python Benchmarks/gunicorn.py [--concorrencia 16] [--quantidade 300] \
+        [--fazendas 2000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "BrainAgricultureTesteV2.settings")
+django.setup()
+
+from servidor import banco_de_testes, get, iniciar_servidor, medir, popular
+
+ENDPOINTS = (
+    "/api/brainagriculture/v1/dashboards/",
+    "/api/localidades/v1/estados/",
+)
+
+
+def processos(pid):
+    # O master e os workers (processos filhos).
+    filhos = []
+    for entrada in os.listdir("/proc"):
+        if not entrada.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entrada}/stat") as arquivo:
+                ppid = int(arquivo.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == pid:
+            filhos.append(int(entrada))
+
+    return [pid, *filhos]
+
+
+def workers_iniciados(pid):
+    # O master responde assim que o primeiro worker inicia: espera que a
+    # quantidade de workers se estabilize.
+    quantidades = []
+    while len(quantidades) < 5 or len(set(quantidades[-5:])) > 1:
+        quantidades.append(len(processos(pid)) - 1)
+        time.sleep(0.1)
+
+    return quantidades[-1]
+
+
+def memoria_mb(pids):
+    total = 0
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/smaps_rollup") as arquivo:
+                for linha in arquivo:
+                    if linha.startswith("Pss:"):
+                        total += int(linha.split()[1])
+        except OSError:
+            return None
+
+    return total / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concorrencia", type=int, default=16)
+    parser.add_argument("--quantidade", type=int, default=300)
+    parser.add_argument("--fazendas", type=int, default=2000)
+    args = parser.parse_args()
+
+    # Um arquivo de configuração vazio evita que a invocação anterior carregue
+    # o gunicorn.conf.py da raiz.
+    sem_configuracao = tempfile.NamedTemporaryFile(suffix=".py")
+    configuracoes = (
+        (
+            "anterior",
+            [
+                "--config",
+                sem_configuracao.name,
+                "--workers",
+                "3",
+                "BrainAgricultureTesteV2.wsgi:application",
+            ],
+        ),
+        ("gunicorn.conf.py", []),
+    )
+
+    with sem_configuracao, banco_de_testes() as nome_banco:
+        token = popular(args.fazendas)
+
+        for descricao, argumentos in configuracoes:
+            processo, url, partida = iniciar_servidor(argumentos, nome_banco)
+            try:
+                workers = workers_iniciados(processo.pid)
+
+                # Uma requisição por worker, com os workers ainda frios.
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    primeiras = list(
+                        executor.map(
+                            lambda _: get(url + ENDPOINTS[0], token)[1],
+                            range(workers),
+                        )
+                    )
+
+                print(
+                    f"{descricao:<18} {workers} workers, primeira resposta em "
+                    f"{partida * 1e3:7.0f} ms, primeiras requisições "
+                    f"{max(primeiras) * 1e3:7.0f} ms"
+                )
+
+                for endpoint in ENDPOINTS:
+                    vazao, p50, p95, falhas = medir(
+                        url + endpoint, token, args.quantidade, args.concorrencia
+                    )
+                    linha = (
+                        f"{descricao:<18} {endpoint:<38} {vazao:8.1f} req/s "
+                        f"p50 {p50 * 1e3:8.2f} ms p95 {p95 * 1e3:8.2f} ms"
+                    )
+                    if falhas:
+                        linha += f" ({falhas} falhas)"
+                    print(linha)
+
+                memoria = memoria_mb(processos(processo.pid))
+                if memoria is not None:
+                    print(f"{descricao:<18} memória (PSS) {memoria:8.1f} MB")
+            finally:
+                processo.terminate()
+                processo.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Compara a vazão de escrita de Cidades com o histórico gravado registro a
+registro (padrão do simple_history) e com o HistoricoEmLote.
+
+Roda em um banco de testes criado e destruído pelo próprio script, usando o
+mesmo backend configurado em settings.
+
+Uso:
+    python Benchmarks/historico_em_lote.py [--quantidade 2000] [--repeticoes 3]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import django
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "BrainAgricultureTesteV2.settings")
+django.setup()
+
+from django.db import connection, transaction
+
+from Common.localidades.models import Cidades, Estados
+from Core.BulkHistory import HistoricoEmLote
+
+
+def gravar_cidades(estado, quantidade, em_lote):
+    inicio = time.perf_counter()
+
+    if em_lote:
+        with HistoricoEmLote(motivo="Benchmark"):
+            for i in range(quantidade):
+                Cidades.objects.create(nome=f"Cidade {i}", estado=estado, codigo_ibge=i)
+    else:
+        with transaction.atomic():
+            for i in range(quantidade):
+                Cidades.objects.create(nome=f"Cidade {i}", estado=estado, codigo_ibge=i)
+
+    duracao = time.perf_counter() - inicio
+
+    Cidades.history.all().delete()
+    Cidades.objects.all().delete()
+
+    return duracao
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--quantidade", type=int, default=2000)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    nome_banco = connection.creation.create_test_db(verbosity=0, keepdb=False)
+    try:
+        estado = Estados.objects.create(nome="São Paulo", sigla="SP", codigo_ibge=35)
+
+        for em_lote, descricao in ((False, "registro a registro"), (True, "em lote")):
+            melhor = min(
+                gravar_cidades(estado, args.quantidade, em_lote)
+                for _ in range(args.repeticoes)
+            )
+            print(
+                f"Histórico {descricao:<20} {melhor:8.3f}s "
+                f"{args.quantidade / melhor:10.0f} cidades/s"
+            )
+    finally:
+        connection.creation.destroy_test_db(nome_banco, verbosity=0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Compara a vazão (registros/s) das listagens com o caminho por values()
+(Core.ValuesSerialization) e com os serializers.
+
+Roda no próprio processo, com o test client do Django, em um banco de testes
+criado e destruído pelo script, usando o mesmo backend configurado em
+settings.
+
+Uso:
+    python Benchmarks/listagens.py [--fazendas 200] [--limite 1000] [--repeticoes 5]
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+from decimal import Decimal
+from unittest import mock
+
+import django
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "BrainAgricultureTesteV2.settings")
+django.setup()
+
+from django.db import connection
+from django.test import Client
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from BrainAgriculture.fazendas.models import Culturas, Fazendas, Safras
+from Common.localidades.models import Cidades, Estados
+from Core.BulkHistory import HistoricoEmLote
+from Core.ValuesSerialization import ListagemPorValoresMixin
+from Usuarios.produtores.models import Produtores
+from Usuarios.usuarios.models import Usuarios
+
+ENDPOINTS = (
+    "/api/brainagriculture/v1/fazendas/",
+    "/api/brainagriculture/v1/safras/",
+    "/api/brainagriculture/v1/culturas/",
+    "/api/localidades/v1/cidades/",
+    "/api/localidades/v1/estados/",
+)
+CULTURAS_POR_SAFRA = 3
+
+
+def popular(quantidade_fazendas):
+    usuario = Usuarios.objects.create_user(
+        cpf_cnpj="71842388002", nome="Benchmark", password="12345678", is_admin=True
+    )
+    produtor = Produtores.objects.create(usuario=usuario)
+    ano = datetime.now().year
+
+    with HistoricoEmLote(motivo="Benchmark"):
+        estado = Estados.objects.create(nome="Bahia", sigla="BA", codigo_ibge=29)
+        cidades = [
+            Cidades.objects.create(nome=f"Cidade {i}", estado=estado, codigo_ibge=i)
+            for i in range(quantidade_fazendas)
+        ]
+
+        for i, cidade in enumerate(cidades):
+            fazenda = Fazendas.objects.create(
+                nome=f"Fazenda {i}",
+                produtor=produtor,
+                cidade=cidade,
+                area_total=Decimal("1000"),
+            )
+            for ano_safra in (ano - 1, ano):
+                safra = Safras.objects.create(fazenda=fazenda, ano=ano_safra)
+                for j in range(CULTURAS_POR_SAFRA):
+                    Culturas.objects.create(
+                        nome=f"Cultura {j}", safra=safra, area_plantada=Decimal("10")
+                    )
+
+    return usuario
+
+
+def medir(client, url, limite, repeticoes):
+    melhor, registros = None, 0
+
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        response = client.get(url, {"limit": limite})
+        duracao = time.perf_counter() - inicio
+
+        registros = len(response.json()["results"])
+        melhor = duracao if melhor is None else min(melhor, duracao)
+
+    return registros, melhor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--fazendas", type=int, default=200)
+    parser.add_argument("--limite", type=int, default=1000)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    nome_banco = connection.creation.create_test_db(verbosity=0, keepdb=False)
+    try:
+        usuario = popular(args.fazendas)
+        client = Client(
+            HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(usuario).access_token}"
+        )
+
+        for url in ENDPOINTS:
+            with mock.patch.object(
+                ListagemPorValoresMixin, "leitura_por_valores", False
+            ):
+                registros, padrao = medir(client, url, args.limite, args.repeticoes)
+            _, rapida = medir(client, url, args.limite, args.repeticoes)
+
+            print(
+                f"{url:<38} {registros:6d} registros "
+                f"serializer {registros / padrao:10.0f}/s "
+                f"values() {registros / rapida:10.0f}/s "
+                f"({padrao / rapida:.1f}x)"
+            )
+    finally:
+        connection.creation.destroy_test_db(nome_banco, verbosity=0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Mede a vazão de emissão de tokens (/api/token/) e de refresh
+(/api/token/refresh/).
+
+Sem --url, roda no próprio processo, com o test client do Django, em um banco
+de testes criado e destruído pelo script (inclui logins com CPF/CNPJ
+desconhecido, atendidos pelo cache negativo). Com --url, dispara as
+requisições contra um servidor já em execução (ex.: gunicorn com N workers)
+usando --concorrencia threads; informe --workers para obter a vazão por
+worker.
+
+Uso:
+    python Benchmarks/login.py [--quantidade 200]
+    python Benchmarks/login.py --url http://localhost:8000 --cpf-cnpj 71842388002 \
+        --senha 12345678 [--quantidade 500] [--concorrencia 8] [--workers 2]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "BrainAgricultureTesteV2.settings")
+django.setup()
+
+from django.db import connection
+from django.test import Client
+
+from Usuarios.produtores.models import Produtores
+from Usuarios.usuarios.models import Usuarios
+
+CPF_CNPJ = "71842388002"
+CPF_CNPJ_DESCONHECIDO = "97533461070"
+SENHA = "12345678"
+
+
+def post_remoto(url, dados):
+    requisicao = urllib.request.Request(
+        url,
+        data=json.dumps(dados).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    try:
+        with urllib.request.urlopen(requisicao) as resposta:
+            return resposta.status, json.loads(resposta.read())
+    except urllib.error.HTTPError as erro:
+        return erro.code, {}
+
+
+def medir(descricao, funcao, quantidade, concorrencia=1, workers=None):
+    inicio = time.perf_counter()
+
+    if concorrencia > 1:
+        with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+            status = list(executor.map(lambda _: funcao(), range(quantidade)))
+    else:
+        status = [funcao() for _ in range(quantidade)]
+
+    duracao = time.perf_counter() - inicio
+    falhas = sum(1 for codigo in status if codigo >= 500)
+
+    linha = f"{descricao:<28} {duracao:8.3f}s {quantidade / duracao:10.1f} req/s"
+    if workers:
+        linha += f" {quantidade / duracao / workers:10.1f} req/s por worker"
+    if falhas:
+        linha += f" ({falhas} falhas)"
+    print(linha)
+
+
+def benchmark_local(args):
+    nome_banco = connection.creation.create_test_db(verbosity=0, keepdb=False)
+    try:
+        usuario = Usuarios.objects.create_user(
+            cpf_cnpj=CPF_CNPJ, nome="Benchmark", password=SENHA
+        )
+        Produtores.objects.create(usuario=usuario)
+
+        client = Client()
+        refresh = client.post(
+            "/api/token/",
+            {"cpf_cnpj": CPF_CNPJ, "password": SENHA},
+            content_type="application/json",
+        ).json()["refresh"]
+
+        casos = (
+            (
+                "login",
+                lambda: client.post(
+                    "/api/token/",
+                    {"cpf_cnpj": CPF_CNPJ, "password": SENHA},
+                    content_type="application/json",
+                ).status_code,
+            ),
+            (
+                "login desconhecido",
+                lambda: client.post(
+                    "/api/token/",
+                    {"cpf_cnpj": CPF_CNPJ_DESCONHECIDO, "password": SENHA},
+                    content_type="application/json",
+                ).status_code,
+            ),
+            (
+                "refresh",
+                lambda: client.post(
+                    "/api/token/refresh/",
+                    {"refresh": refresh},
+                    content_type="application/json",
+                ).status_code,
+            ),
+        )
+
+        for descricao, funcao in casos:
+            medir(descricao, funcao, args.quantidade)
+    finally:
+        connection.creation.destroy_test_db(nome_banco, verbosity=0)
+
+
+def benchmark_remoto(args):
+    url = args.url.rstrip("/")
+    credenciais = {"cpf_cnpj": args.cpf_cnpj, "password": args.senha}
+
+    codigo, tokens = post_remoto(f"{url}/api/token/", credenciais)
+    if codigo != 200:
+        sys.exit(f"Falha no login inicial ({codigo}); verifique as credenciais.")
+
+    casos = (
+        ("login", lambda: post_remoto(f"{url}/api/token/", credenciais)[0]),
+        (
+            "refresh",
+            lambda: post_remoto(
+                f"{url}/api/token/refresh/", {"refresh": tokens["refresh"]}
+            )[0],
+        ),
+    )
+
+    for descricao, funcao in casos:
+        medir(descricao, funcao, args.quantidade, args.concorrencia, args.workers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--quantidade", type=int, default=200)
+    parser.add_argument("--url")
+    parser.add_argument("--cpf-cnpj", default=CPF_CNPJ)
+    parser.add_argument("--senha", default=SENHA)
+    parser.add_argument("--concorrencia", type=int, default=8)
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args()
+
+    if args.url:
+        benchmark_remoto(args)
+    else:
+        benchmark_local(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Mede o custo do Core.Metrics.MetricasMiddleware: a duração média das
+requisições a endpoints leves com e sem o middleware.
+
+Roda no próprio processo, com o test client do Django, em um banco de testes
+criado e destruído pelo script, usando o mesmo backend configurado em
+settings.
+
+Uso:
+    python Benchmarks/metricas.py [--requisicoes 2000] [--rodadas 5]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import django
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "BrainAgricultureTesteV2.settings")
+django.setup()
+
+from django.conf import settings
+from django.db import connection
+from django.test import Client, override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from Common.localidades.models import Estados
+from Usuarios.usuarios.models import Usuarios
+
+ENDPOINTS = (
+    "/api/localidades/v1/estados/",
+    "/api/brainagriculture/v1/dashboards/totais/",
+)
+MIDDLEWARE_METRICAS = "Core.Metrics.MetricasMiddleware"
+
+
+def medir(url, token, requisicoes):
+    client = Client(HTTP_AUTHORIZATION=f"Bearer {token}")
+    client.get(url)
+
+    inicio = time.perf_counter()
+    for _ in range(requisicoes):
+        client.get(url)
+    return (time.perf_counter() - inicio) / requisicoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requisicoes", type=int, default=2000)
+    parser.add_argument("--rodadas", type=int, default=5)
+    args = parser.parse_args()
+
+    sem_metricas = [m for m in settings.MIDDLEWARE if m != MIDDLEWARE_METRICAS]
+    com_metricas = [MIDDLEWARE_METRICAS] + sem_metricas
+
+    nome_banco = connection.creation.create_test_db(verbosity=0, keepdb=False)
+    try:
+        usuario = Usuarios.objects.create_user(
+            cpf_cnpj="71842388002", nome="Benchmark", password="12345678"
+        )
+        Estados.objects.create(nome="Bahia", sigla="BA", codigo_ibge=29)
+        token = RefreshToken.for_user(usuario).access_token
+
+        for url in ENDPOINTS:
+            # Rodadas alternadas, para que variações da máquina afetem os
+            # dois lados; vale a melhor de cada.
+            sem, com = [], []
+            for _ in range(args.rodadas):
+                with override_settings(MIDDLEWARE=sem_metricas):
+                    sem.append(medir(url, token, args.requisicoes))
+                with override_settings(MIDDLEWARE=com_metricas):
+                    com.append(medir(url, token, args.requisicoes))
+
+            print(
+                f"{url:<46} sem {min(sem) * 1e6:8.1f} µs "
+                f"com {min(com) * 1e6:8.1f} µs "
+                f"({(min(com) / min(sem) - 1) * 100:+.1f}%)"
+            )
+    finally:
+        connection.creation.destroy_test_db(nome_banco, verbosity=0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Compara a vazão de renderização do JSONRenderer do DRF com a do
+Core.Renderers.RenderizadorJSON (orjson, se instalado, ou o json da biblioteca
+padrão com o CodificadorJSON) sobre payloads no formato do dashboard e das
+listagens de fazendas e culturas.
+
+Não usa banco de dados: os payloads são montados em memória.
+
+Uso:
+    python Benchmarks/renderizacao.py [--registros 1000] [--repeticoes 200]
+"""
+
+import argparse
+import os
+import sys
+import time
+from decimal import Decimal
+from unittest import mock
+
+import django
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "BrainAgricultureTesteV2.settings")
+django.setup()
+
+from rest_framework.renderers import JSONRenderer
+
+from BrainAgriculture.dashboards.serializers import DashboardCompletoSerializer
+from Core import Renderers
+from Core.Renderers import RenderizadorJSON
+
+
+def payload_dashboard():
+    culturas = ["Soja", "Milho", "Café", "Algodão", "Cana-de-açúcar", "Trigo"]
+    estados = [
+        ("Bahia", "BA"),
+        ("Goiás", "GO"),
+        ("Mato Grosso", "MT"),
+        ("Paraná", "PR"),
+    ]
+
+    return DashboardCompletoSerializer(
+        {
+            "totais": {"total_fazendas": 1250, "total_hectares": Decimal("987654.32")},
+            "por_estado": [
+                {
+                    "estado": nome,
+                    "sigla": sigla,
+                    "quantidade": 100 + i,
+                    "percentual": Decimal("25.13"),
+                }
+                for i, (nome, sigla) in enumerate(estados)
+            ],
+            "por_cultura": [
+                {
+                    "cultura": cultura,
+                    "area_total": Decimal("12345.67"),
+                    "percentual": Decimal("16.67"),
+                }
+                for cultura in culturas
+            ],
+            "uso_solo": [
+                {
+                    "tipo": tipo,
+                    "area_total": Decimal("493827.16"),
+                    "percentual": Decimal("50.00"),
+                }
+                for tipo in ("Área Agricultável", "Vegetação")
+            ],
+        }
+    ).data
+
+
+def payload_fazendas(registros):
+    # Como a listagem de fazendas: area_total do DecimalField (str) e as
+    # áreas calculadas como Decimal.
+    return {
+        "count": registros,
+        "count_exato": True,
+        "next": None,
+        "previous": None,
+        "results": [
+            {
+                "id": i,
+                "nome": f"Fazenda São João {i}",
+                "produtor": 1 + i % 50,
+                "produtor_nome": "José da Silva",
+                "cidade": 1 + i % 5570,
+                "cidade_nome": "Luís Eduardo Magalhães",
+                "area_total": "1000.55",
+                "area_agricultavel": Decimal("699.70"),
+                "area_vegetacao": Decimal("300.85"),
+            }
+            for i in range(registros)
+        ],
+    }
+
+
+def payload_culturas(registros):
+    return {
+        "count": registros,
+        "count_exato": True,
+        "next": None,
+        "previous": None,
+        "results": [
+            {
+                "id": i,
+                "nome": "Soja",
+                "safra": 1 + i // 3,
+                "safra_nome": "Safra de 2025",
+                "fazenda_nome": f"Fazenda {i // 6}",
+                "ano_safra": 2025,
+                "area_plantada": "123.45",
+            }
+            for i in range(registros)
+        ],
+    }
+
+
+def medir(renderizador, dados, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        tamanho = len(renderizador.render(dados))
+    return (time.perf_counter() - inicio) / repeticoes, tamanho
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--registros", type=int, default=1000)
+    parser.add_argument("--repeticoes", type=int, default=200)
+    args = parser.parse_args()
+
+    payloads = (
+        ("dashboard", payload_dashboard()),
+        (f"fazendas ({args.registros})", payload_fazendas(args.registros)),
+        (f"culturas ({args.registros})", payload_culturas(args.registros)),
+    )
+    renderizadores = [("JSONRenderer (DRF)", JSONRenderer(), True)]
+    if Renderers.orjson is not None:
+        renderizadores.append(("RenderizadorJSON (orjson)", RenderizadorJSON(), True))
+    renderizadores.append(("RenderizadorJSON (json)", RenderizadorJSON(), False))
+
+    for descricao_payload, dados in payloads:
+        referencia = JSONRenderer().render(dados)
+        base = None
+
+        for descricao, renderizador, com_orjson in renderizadores:
+            biblioteca = Renderers.orjson if com_orjson else None
+            with mock.patch.object(Renderers, "orjson", biblioteca):
+                assert renderizador.render(dados) == referencia
+                duracao, tamanho = medir(renderizador, dados, args.repeticoes)
+
+            base = base or duracao
+            print(
+                f"{descricao_payload:<18} {descricao:<26} "
+                f"{duracao * 1e6:10.1f} µs {tamanho / duracao / 2**20:8.1f} MB/s "
+                f"({base / duracao:.1f}x)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Funções compartilhadas pelos benchmarks que sobem o gunicorn (asgi.py e
+gunicorn.py): banco de testes populado, inicialização do servidor em uma
+porta livre e medição de requisições concorrentes. Importar após o
+django.setup().
+"""
+
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.db import connection
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from BrainAgriculture.fazendas.models import Culturas, Fazendas, Safras
+from Common.localidades.models import Cidades, Estados
+from Usuarios.produtores.models import Produtores
+from Usuarios.usuarios.models import Usuarios
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@contextmanager
+def banco_de_testes():
+    """
+    Cria um banco de testes, compartilhável com os servidores (com o SQLite,
+    um arquivo temporário), e o destrói ao final. Retorna o nome do banco.
+    """
+    diretorio = None
+    if connection.vendor == "sqlite":
+        diretorio = tempfile.TemporaryDirectory()
+        connection.settings_dict.setdefault("TEST", {})["NAME"] = os.path.join(
+            diretorio.name, "benchmark.sqlite3"
+        )
+
+    nome_banco = connection.creation.create_test_db(verbosity=0, keepdb=False)
+    try:
+        yield nome_banco
+    finally:
+        connection.creation.destroy_test_db(nome_banco, verbosity=0)
+        if diretorio is not None:
+            diretorio.cleanup()
+
+
+def popular(quantidade_fazendas):
+    """
+    Cria um usuário, 27 estados, 500 cidades e as fazendas, cada uma com uma
+    safra do ano e duas culturas. Retorna o token de acesso do usuário.
+    """
+    usuario = Usuarios.objects.create_user(
+        cpf_cnpj="71842388002", nome="Benchmark", password="12345678"
+    )
+    produtor = Produtores.objects.create(usuario=usuario)
+
+    estados = Estados.objects.bulk_create(
+        Estados(
+            nome=f"Estado {indice}",
+            sigla=chr(65 + indice // 26) + chr(65 + indice % 26),
+            codigo_ibge=indice,
+        )
+        for indice in range(27)
+    )
+    cidades = Cidades.objects.bulk_create(
+        Cidades(
+            nome=f"Cidade {indice}",
+            estado=estados[indice % len(estados)],
+            codigo_ibge=100000 + indice,
+        )
+        for indice in range(500)
+    )
+    fazendas = Fazendas.objects.bulk_create(
+        Fazendas(
+            nome=f"Fazenda {indice}",
+            produtor=produtor,
+            cidade=cidades[indice % len(cidades)],
+            area_total=Decimal("1000.00"),
+        )
+        for indice in range(quantidade_fazendas)
+    )
+    ano = time.localtime().tm_year
+    safras = Safras.objects.bulk_create(
+        Safras(fazenda=fazenda, ano=ano) for fazenda in fazendas
+    )
+    Culturas.objects.bulk_create(
+        Culturas(nome=nome, safra=safra, area_plantada=Decimal("100.00"))
+        for safra in safras
+        for nome in ("Soja", "Milho")
+    )
+
+    token = str(RefreshToken.for_user(usuario).access_token)
+    connection.close()
+    return token
+
+
+def porta_livre():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def iniciar_servidor(argumentos, banco, **ambiente):
+    """
+    Sobe o gunicorn com os argumentos informados (sem --bind) em uma porta
+    livre, usando o banco `banco`, e espera que ele responda.
+
+    Returns:
+        Tupla (processo, url, segundos até a primeira resposta)
+    """
+    porta = porta_livre()
+    ambiente = dict(os.environ, DB_NAME=banco, **ambiente)
+    # Sem envio de eventos para o Sentry durante o benchmark.
+    ambiente.pop("DSN_SENTRY", None)
+
+    inicio = time.perf_counter()
+    processo = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            "--bind",
+            f"127.0.0.1:{porta}",
+            "--log-level",
+            "warning",
+            *argumentos,
+        ],
+        cwd=RAIZ,
+        env=ambiente,
+    )
+
+    url = f"http://127.0.0.1:{porta}"
+    for _ in range(300):
+        try:
+            urllib.request.urlopen(f"{url}/metrics", timeout=1).close()
+        except urllib.error.HTTPError:
+            # /metrics exige um administrador: o servidor já responde.
+            return processo, url, time.perf_counter() - inicio
+        except OSError:
+            # Recusada ou sem resposta enquanto os workers iniciam.
+            time.sleep(0.05)
+
+    processo.terminate()
+    sys.exit(f"O servidor ({' '.join(argumentos)}) não respondeu.")
+
+
+def get(url, token):
+    requisicao = urllib.request.Request(
+        url, headers={"Authorization": f"Bearer {token}"}
+    )
+    inicio = time.perf_counter()
+    try:
+        with urllib.request.urlopen(requisicao) as resposta:
+            resposta.read()
+            codigo = resposta.status
+    except urllib.error.HTTPError as erro:
+        codigo = erro.code
+
+    return codigo, time.perf_counter() - inicio
+
+
+def medir(url, token, quantidade, concorrencia):
+    """
+    Dispara `quantidade` requisições com `concorrencia` threads.
+
+    Returns:
+        Tupla (requisições por segundo, p50, p95, falhas)
+    """
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+        resultados = list(executor.map(lambda _: get(url, token), range(quantidade)))
+    duracao = time.perf_counter() - inicio
+
+    quantis = statistics.quantiles([tempo for _, tempo in resultados], n=20)
+    falhas = sum(1 for codigo, _ in resultados if codigo != 200)
+    return quantidade / duracao, quantis[9], quantis[18], falhas
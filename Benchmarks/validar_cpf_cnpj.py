@@ -0,0 +1,66 @@
+"""
+Compara a validação de CPF/CNPJ valor a valor (implementação original e
+validar_cpf_cnpj atual) com a validação em lote (validar_lote).
+
+Uso:
+    python Benchmarks/validar_cpf_cnpj.py [--quantidade 100000] [--repeticoes 5]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+import django
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "BrainAgricultureTesteV2.settings")
+django.setup()
+
+from django.core.exceptions import ValidationError
+
+from Core.tests import ValidarCpfCnpjTestCase, validar_cpf_cnpj_original
+from Core.Validations import validar_cpf_cnpj, validar_lote
+
+
+def validar_um_a_um(funcao, valores):
+    resultados = []
+    for valor in valores:
+        try:
+            resultados.append(bool(funcao(valor, levantar_excessao=False)))
+        except ValidationError:
+            resultados.append(False)
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--quantidade", type=int, default=100000)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    valores = ValidarCpfCnpjTestCase().gerar_valores(args.quantidade)
+
+    casos = (
+        (
+            "original (um a um)",
+            lambda: validar_um_a_um(validar_cpf_cnpj_original, valores),
+        ),
+        (
+            "validar_cpf_cnpj (um a um)",
+            lambda: validar_um_a_um(validar_cpf_cnpj, valores),
+        ),
+        ("validar_lote", lambda: validar_lote(valores)),
+    )
+
+    for descricao, funcao in casos:
+        melhor = min(timeit.repeat(funcao, number=1, repeat=args.repeticoes))
+        print(
+            f"{descricao:<28} {melhor:8.3f}s "
+            f"{args.quantidade / melhor:12.0f} valores/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
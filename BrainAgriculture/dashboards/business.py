@@ -2,11 +2,15 @@ from datetime import datetime
 from decimal import Decimal
 from typing import Any, Dict, List
 
-from django.db.models import Count, F, Sum
+from asgiref.sync import sync_to_async
+from django.db.models import Count, Sum
 
 from BrainAgriculture.fazendas.models import Culturas, Fazendas
+from Common.localidades.cache import CacheLocalidades
+from Core.Tracing import rastrear_servico
 
 
+@rastrear_servico("dashboard")
 class DashboardBusiness:
     @staticmethod
     def get_totais() -> Dict[str, Any]:
@@ -25,6 +29,20 @@ class DashboardBusiness:
 
         return {"total_fazendas": total_fazendas, "total_hectares": total_hectares}
 
+    @staticmethod
+    async def aget_totais() -> Dict[str, Any]:
+        """
+        Versão async de get_totais.
+        """
+        fazendas = Fazendas.objects.filter()
+
+        total_fazendas = await fazendas.acount()
+        total_hectares = (await fazendas.aaggregate(total=Sum("area_total")))[
+            "total"
+        ] or Decimal("0")
+
+        return {"total_fazendas": total_fazendas, "total_hectares": total_hectares}
+
     @staticmethod
     def get_distribuicao_por_estado() -> List[Dict[str, Any]]:
         """
@@ -33,25 +51,77 @@ class DashboardBusiness:
         Returns:
             Lista de dicts com estado, sigla, quantidade e percentual
         """
-        fazendas_por_estado = (
+        fazendas_por_cidade = (
+            Fazendas.objects.filter()
+            .values("cidade_id")
+            .annotate(quantidade=Count("id"))
+            .order_by()
+        )
+
+        # Estados e cidades vêm do CacheLocalidades, evitando o join com as
+        # tabelas de localidades a cada chamada.
+        localidades = CacheLocalidades.obter()
+        quantidade_por_estado = {}
+        for item in fazendas_por_cidade:
+            cidade = localidades.cidades.get(
+                item["cidade_id"]
+            ) or CacheLocalidades.obter_cidade(item["cidade_id"])
+            estado = localidades.estados.get(
+                cidade.estado_id
+            ) or CacheLocalidades.obter_estado(cidade.estado_id)
+
+            quantidade_por_estado[estado] = (
+                quantidade_por_estado.get(estado, 0) + item["quantidade"]
+            )
+
+        return DashboardBusiness._montar_distribuicao_por_estado(quantidade_por_estado)
+
+    @staticmethod
+    async def aget_distribuicao_por_estado() -> List[Dict[str, Any]]:
+        """
+        Versão async de get_distribuicao_por_estado.
+        """
+        fazendas_por_cidade = (
             Fazendas.objects.filter()
-            .values(estado=F("cidade__estado__nome"), sigla=F("cidade__estado__sigla"))
+            .values("cidade_id")
             .annotate(quantidade=Count("id"))
-            .order_by("-quantidade")
+            .order_by()
         )
 
-        total_fazendas = sum(item["quantidade"] for item in fazendas_por_estado)
+        # O CacheLocalidades confere a versão no cache compartilhado e, em
+        # uma falha, carrega as localidades do banco: ambos síncronos.
+        localidades = await sync_to_async(CacheLocalidades.obter)()
+        quantidade_por_estado = {}
+        async for item in fazendas_por_cidade:
+            cidade = localidades.cidades.get(item["cidade_id"]) or (
+                await sync_to_async(CacheLocalidades.obter_cidade)(item["cidade_id"])
+            )
+            estado = localidades.estados.get(cidade.estado_id) or (
+                await sync_to_async(CacheLocalidades.obter_estado)(cidade.estado_id)
+            )
+
+            quantidade_por_estado[estado] = (
+                quantidade_por_estado.get(estado, 0) + item["quantidade"]
+            )
+
+        return DashboardBusiness._montar_distribuicao_por_estado(quantidade_por_estado)
+
+    @staticmethod
+    def _montar_distribuicao_por_estado(quantidade_por_estado):
+        total_fazendas = sum(quantidade_por_estado.values())
 
         resultado = []
-        for item in fazendas_por_estado:
+        for estado, quantidade in sorted(
+            quantidade_por_estado.items(), key=lambda item: (-item[1], item[0].nome)
+        ):
             percentual = (
-                (item["quantidade"] / total_fazendas * 100) if total_fazendas > 0 else 0
+                (quantidade / total_fazendas * 100) if total_fazendas > 0 else 0
             )
             resultado.append(
                 {
-                    "estado": item["estado"],
-                    "sigla": item["sigla"],
-                    "quantidade": item["quantidade"],
+                    "estado": estado.nome,
+                    "sigla": estado.sigla,
+                    "quantidade": quantidade,
                     "percentual": round(percentual, 2),
                 }
             )
@@ -73,6 +143,26 @@ class DashboardBusiness:
             .order_by("-area_total")
         )
 
+        return DashboardBusiness._montar_distribuicao_por_cultura(culturas_area)
+
+    @staticmethod
+    async def aget_distribuicao_por_cultura() -> List[Dict[str, Any]]:
+        """
+        Versão async de get_distribuicao_por_cultura.
+        """
+        culturas_area = (
+            Culturas.objects.filter()
+            .values("nome")
+            .annotate(area_total=Sum("area_plantada"))
+            .order_by("-area_total")
+        )
+
+        return DashboardBusiness._montar_distribuicao_por_cultura(
+            [item async for item in culturas_area]
+        )
+
+    @staticmethod
+    def _montar_distribuicao_por_cultura(culturas_area):
         # Calcular total para percentuais
         total_area = sum(item["area_total"] for item in culturas_area)
 
@@ -117,6 +207,31 @@ class DashboardBusiness:
             area_total += fazenda.area_total
             area_vegetacao += fazenda.area_vegetacao(ano_referencia)
 
+        return DashboardBusiness._montar_uso_solo(area_total, area_vegetacao)
+
+    @staticmethod
+    async def aget_uso_solo(ano_referencia: int = None) -> List[Dict[str, Any]]:
+        """
+        Versão async de get_uso_solo. As áreas são somadas pelo banco (a
+        vegetação de uma fazenda é a área plantada nas safras do ano), em
+        duas agregações, em vez de fazenda a fazenda.
+        """
+        if ano_referencia is None:
+            ano_referencia = datetime.now().year
+
+        area_total = (
+            await Fazendas.objects.filter().aaggregate(total=Sum("area_total"))
+        )["total"] or Decimal("0")
+        area_vegetacao = (
+            await Culturas.objects.filter(safra__ano=ano_referencia).aaggregate(
+                total=Sum("area_plantada")
+            )
+        )["total"] or Decimal("0")
+
+        return DashboardBusiness._montar_uso_solo(area_total, area_vegetacao)
+
+    @staticmethod
+    def _montar_uso_solo(area_total, area_vegetacao):
         area_agricultavel = area_total - area_vegetacao
 
         resultado = []
@@ -157,3 +272,15 @@ class DashboardBusiness:
             "por_cultura": DashboardBusiness.get_distribuicao_por_cultura(),
             "uso_solo": DashboardBusiness.get_uso_solo(ano_referencia),
         }
+
+    @staticmethod
+    async def aget_dashboard_completo(ano_referencia: int = None) -> Dict[str, Any]:
+        """
+        Versão async de get_dashboard_completo.
+        """
+        return {
+            "totais": await DashboardBusiness.aget_totais(),
+            "por_estado": await DashboardBusiness.aget_distribuicao_por_estado(),
+            "por_cultura": await DashboardBusiness.aget_distribuicao_por_cultura(),
+            "uso_solo": await DashboardBusiness.aget_uso_solo(ano_referencia),
+        }
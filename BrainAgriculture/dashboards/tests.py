@@ -1,6 +1,7 @@
 from datetime import datetime
 from decimal import Decimal
 
+from asgiref.sync import async_to_sync
 from django.contrib.auth import get_user_model
 from django.test import TestCase
 from rest_framework import status
@@ -17,64 +18,69 @@ User = get_user_model()
 
 class DashboardBusinessTestCase(TestCase):
     def setUp(self):
-        self.user = User.objects.create_user(
-            cpf_cnpj="66484750050", password="senha123", nome="Usuário Teste"
-        )
-
-        self.sp = Estados.objects.create(nome="São Paulo", sigla="SP", codigo_ibge=1)
-        self.mg = Estados.objects.create(nome="Minas Gerais", sigla="MG", codigo_ibge=2)
-
-        self.cidade_sp = Cidades.objects.create(
-            nome="São Paulo", estado=self.sp, codigo_ibge=3
-        )
-        self.cidade_mg = Cidades.objects.create(
-            nome="Belo Horizonte", estado=self.mg, codigo_ibge=4
-        )
-
-        self.produtor = Produtores.objects.create(
-            usuario=self.user,
-        )
-
-        self.fazenda_sp1 = Fazendas.objects.create(
-            nome="Fazenda SP 1",
-            produtor=self.produtor,
-            cidade=self.cidade_sp,
-            area_total=Decimal("100.00"),
-        )
-        self.fazenda_sp2 = Fazendas.objects.create(
-            nome="Fazenda SP 2",
-            produtor=self.produtor,
-            cidade=self.cidade_sp,
-            area_total=Decimal("150.00"),
-        )
-        self.fazenda_mg = Fazendas.objects.create(
-            nome="Fazenda MG",
-            produtor=self.produtor,
-            cidade=self.cidade_mg,
-            area_total=Decimal("200.00"),
-        )
-
-        self.ano_atual = datetime.now().year
-
-        self.safra_sp1 = Safras.objects.create(
-            fazenda=self.fazenda_sp1, ano=self.ano_atual
-        )
-        Culturas.objects.create(
-            nome="Soja", safra=self.safra_sp1, area_plantada=Decimal("50.00")
-        )
-        Culturas.objects.create(
-            nome="Milho", safra=self.safra_sp1, area_plantada=Decimal("30.00")
-        )
-
-        self.safra_mg = Safras.objects.create(
-            fazenda=self.fazenda_mg, ano=self.ano_atual
-        )
-        Culturas.objects.create(
-            nome="Soja", safra=self.safra_mg, area_plantada=Decimal("100.00")
-        )
-        Culturas.objects.create(
-            nome="Café", safra=self.safra_mg, area_plantada=Decimal("50.00")
-        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user = User.objects.create_user(
+                cpf_cnpj="66484750050", password="senha123", nome="Usuário Teste"
+            )
+
+            self.sp = Estados.objects.create(
+                nome="São Paulo", sigla="SP", codigo_ibge=1
+            )
+            self.mg = Estados.objects.create(
+                nome="Minas Gerais", sigla="MG", codigo_ibge=2
+            )
+
+            self.cidade_sp = Cidades.objects.create(
+                nome="São Paulo", estado=self.sp, codigo_ibge=3
+            )
+            self.cidade_mg = Cidades.objects.create(
+                nome="Belo Horizonte", estado=self.mg, codigo_ibge=4
+            )
+
+            self.produtor = Produtores.objects.create(
+                usuario=self.user,
+            )
+
+            self.fazenda_sp1 = Fazendas.objects.create(
+                nome="Fazenda SP 1",
+                produtor=self.produtor,
+                cidade=self.cidade_sp,
+                area_total=Decimal("100.00"),
+            )
+            self.fazenda_sp2 = Fazendas.objects.create(
+                nome="Fazenda SP 2",
+                produtor=self.produtor,
+                cidade=self.cidade_sp,
+                area_total=Decimal("150.00"),
+            )
+            self.fazenda_mg = Fazendas.objects.create(
+                nome="Fazenda MG",
+                produtor=self.produtor,
+                cidade=self.cidade_mg,
+                area_total=Decimal("200.00"),
+            )
+
+            self.ano_atual = datetime.now().year
+
+            self.safra_sp1 = Safras.objects.create(
+                fazenda=self.fazenda_sp1, ano=self.ano_atual
+            )
+            Culturas.objects.create(
+                nome="Soja", safra=self.safra_sp1, area_plantada=Decimal("50.00")
+            )
+            Culturas.objects.create(
+                nome="Milho", safra=self.safra_sp1, area_plantada=Decimal("30.00")
+            )
+
+            self.safra_mg = Safras.objects.create(
+                fazenda=self.fazenda_mg, ano=self.ano_atual
+            )
+            Culturas.objects.create(
+                nome="Soja", safra=self.safra_mg, area_plantada=Decimal("100.00")
+            )
+            Culturas.objects.create(
+                nome="Café", safra=self.safra_mg, area_plantada=Decimal("50.00")
+            )
 
     def test_get_totais(self):
         totais = DashboardBusiness.get_totais()
@@ -124,6 +130,24 @@ class DashboardBusinessTestCase(TestCase):
         vegetacao = next(d for d in uso_solo if d["tipo"] == "Vegetação")
         self.assertEqual(vegetacao["area_total"], Decimal("230.00"))
 
+    def test_versoes_async_equivalentes(self):
+        # Safra de outro ano não entra no uso do solo do ano atual.
+        safra_anterior = Safras.objects.create(
+            fazenda=self.fazenda_sp2, ano=self.ano_atual - 1
+        )
+        Culturas.objects.create(
+            nome="Soja", safra=safra_anterior, area_plantada=Decimal("70.00")
+        )
+
+        self.assertEqual(
+            async_to_sync(DashboardBusiness.aget_dashboard_completo)(self.ano_atual),
+            DashboardBusiness.get_dashboard_completo(self.ano_atual),
+        )
+        self.assertEqual(
+            async_to_sync(DashboardBusiness.aget_uso_solo)(self.ano_atual - 1),
+            DashboardBusiness.get_uso_solo(self.ano_atual - 1),
+        )
+
 
 class DashboardAPITestCase(TestCase):
     def setUp(self):
@@ -7,6 +7,8 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.viewsets import ViewSet
 
+from Core.AsyncViews import ViewAssincronaMixin
+
 from .business import DashboardBusiness
 from .serializers import (
     DashboardCompletoSerializer,
@@ -18,7 +20,7 @@ from .serializers import (
 
 
 @extend_schema(tags=["BrainAgriculture - Dashboards"])
-class DashboardViewSet(ViewSet):
+class DashboardViewSet(ViewAssincronaMixin, ViewSet):
     permission_classes = [IsAuthenticated]
 
     @extend_schema(
@@ -30,13 +32,12 @@ class DashboardViewSet(ViewSet):
                 name="ano",
                 type=int,
                 location=OpenApiParameter.QUERY,
-                description="Ano de referência para cálculo de uso do solo",
+                description="Ano de referência para cálculo de uso do solo (padrão: o ano atual)",
                 required=False,
-                default=datetime.now().year,
             )
         ],
     )
-    def list(self, request):
+    async def list(self, request):
         ano_referencia = request.query_params.get("ano", datetime.now().year)
 
         try:
@@ -44,7 +45,7 @@ class DashboardViewSet(ViewSet):
         except ValueError:
             ano_referencia = datetime.now().year
 
-        data = DashboardBusiness.get_dashboard_completo(ano_referencia)
+        data = await DashboardBusiness.aget_dashboard_completo(ano_referencia)
 
         serializer = DashboardCompletoSerializer(data)
         return Response(serializer.data)
@@ -55,8 +56,8 @@ class DashboardViewSet(ViewSet):
         responses={200: DashboardTotaisSerializer},
     )
     @action(detail=False, methods=["get"])
-    def totais(self, request):
-        data = DashboardBusiness.get_totais()
+    async def totais(self, request):
+        data = await DashboardBusiness.aget_totais()
         serializer = DashboardTotaisSerializer(data)
         return Response(serializer.data)
 
@@ -66,8 +67,8 @@ class DashboardViewSet(ViewSet):
         responses={200: DashboardPorEstadoSerializer(many=True)},
     )
     @action(detail=False, methods=["get"])
-    def por_estado(self, request):
-        data = DashboardBusiness.get_distribuicao_por_estado()
+    async def por_estado(self, request):
+        data = await DashboardBusiness.aget_distribuicao_por_estado()
         serializer = DashboardPorEstadoSerializer(data, many=True)
         return Response(serializer.data)
 
@@ -77,8 +78,8 @@ class DashboardViewSet(ViewSet):
         responses={200: DashboardPorCulturaSerializer(many=True)},
     )
     @action(detail=False, methods=["get"])
-    def por_cultura(self, request):
-        data = DashboardBusiness.get_distribuicao_por_cultura()
+    async def por_cultura(self, request):
+        data = await DashboardBusiness.aget_distribuicao_por_cultura()
         serializer = DashboardPorCulturaSerializer(data, many=True)
         return Response(serializer.data)
 
@@ -91,14 +92,13 @@ class DashboardViewSet(ViewSet):
                 name="ano",
                 type=int,
                 location=OpenApiParameter.QUERY,
-                description="Ano de referência para cálculo",
+                description="Ano de referência para cálculo (padrão: o ano atual)",
                 required=False,
-                default=datetime.now().year,
             )
         ],
     )
     @action(detail=False, methods=["get"])
-    def uso_solo(self, request):
+    async def uso_solo(self, request):
         ano_referencia = request.query_params.get("ano", datetime.now().year)
 
         try:
@@ -106,6 +106,6 @@ class DashboardViewSet(ViewSet):
         except ValueError:
             ano_referencia = datetime.now().year
 
-        data = DashboardBusiness.get_uso_solo(ano_referencia)
+        data = await DashboardBusiness.aget_uso_solo(ano_referencia)
         serializer = DashboardUsoSoloSerializer(data, many=True)
         return Response(serializer.data)
@@ -2,12 +2,17 @@ from datetime import datetime
 from decimal import Decimal
 from typing import Optional
 
+from django.db.models import F, Func, Subquery
 from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
 
+from Core.HistorySnapshot import SnapshotHistorico
+from Core.Tracing import rastrear_servico
+
 LIMITE_MAXIMO_SUGERIDO_FAZENDA = 100000
 
 
+@rastrear_servico("validacao")
 class AreaValidationService:
     @staticmethod
     def validate_area_total_fazenda(area_total: Decimal) -> None:
@@ -89,6 +94,7 @@ class AreaValidationService:
             )
 
 
+@rastrear_servico("validacao")
 class SafraValidationService:
     @staticmethod
     def validate_ano_safra(ano: int) -> None:
@@ -138,6 +144,7 @@ class SafraValidationService:
             )
 
 
+@rastrear_servico("fazendas")
 class FazendaBusinessService:
     @staticmethod
     def calcular_area_info(fazenda, ano: int) -> dict:
@@ -167,7 +174,75 @@ class FazendaBusinessService:
             ),
         }
 
+    @staticmethod
+    def subconsulta_area_plantada(**filtros) -> Subquery:
+        """
+        Subconsulta com a soma da área plantada das culturas que satisfazem
+        os filtros (ex.: safra__fazenda=OuterRef("pk"), safra__ano=2025),
+        para anotar querysets de fazendas ou safras. Sem culturas, resulta
+        em NULL.
+        """
+        from .models import Culturas
+
+        # SUM como Func (e não como agregação) para não gerar GROUP BY: a
+        # subconsulta sempre retorna uma única linha.
+        return Subquery(
+            Culturas.objects.filter(**filtros)
+            .order_by()
+            .annotate(total=Func(F("area_plantada"), function="SUM"))
+            .values("total")
+        )
+
+    @staticmethod
+    def montar_snapshot(fazenda_id: int, instante: datetime):
+        """
+        Reconstrói a fazenda, suas safras e culturas como estavam em um
+        instante passado, a partir do histórico (uma consulta por model).
+
+        As safras e culturas ficam no cache de prefetch das instâncias, então
+        area_agricultavel, area_vegetacao e calcular_area_info operam sobre o
+        snapshot sem consultar as tabelas atuais.
+
+        Args:
+            fazenda_id: ID da fazenda
+            instante: Data e hora de referência
+
+        Returns:
+            Instância de Fazendas com os valores do instante, ou None se a
+            fazenda não existia naquele instante
+        """
+        from .models import Culturas, Fazendas, Safras
+
+        fazendas = SnapshotHistorico.instancias_em(Fazendas, instante, id=fazenda_id)
+        if not fazendas:
+            return None
+        fazenda = fazendas[0]
+
+        safras = sorted(
+            SnapshotHistorico.instancias_em(Safras, instante, fazenda_id=fazenda_id),
+            key=lambda safra: (-safra.ano, safra.id),
+        )
+
+        culturas_por_safra = {safra.id: [] for safra in safras}
+        if safras:
+            for cultura in sorted(
+                SnapshotHistorico.instancias_em(
+                    Culturas, instante, safra_id__in=list(culturas_por_safra)
+                ),
+                key=lambda cultura: (cultura.nome, cultura.id),
+            ):
+                culturas_por_safra[cultura.safra_id].append(cultura)
+
+        for safra in safras:
+            SnapshotHistorico.relacionar(
+                safra, "culturas", culturas_por_safra[safra.id]
+            )
+        SnapshotHistorico.relacionar(fazenda, "safras", safras)
+
+        return fazenda
+
 
+@rastrear_servico("fazendas")
 class CulturaBusinessService:
     @staticmethod
     def calcular_area_disponivel_cultura(cultura) -> dict:
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.1 on 2026-10-19 16:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fazendas', '0002_rename_cultura_culturas_and_more'),
+        ('localidades', '0005_historicalcidades_localidades_id_2713be_idx_and_more'),
+        ('produtores', '0004_historicalprodutores_produtores__id_5683ad_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='historicalculturas',
+            index=models.Index(fields=['id', 'history_date'], name='fazendas_hi_id_0617eb_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historicalfazendas',
+            index=models.Index(fields=['id', 'history_date'], name='fazendas_hi_id_70d189_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historicalsafras',
+            index=models.Index(fields=['id', 'history_date'], name='fazendas_hi_id_7a6e2b_idx'),
+        ),
+    ]
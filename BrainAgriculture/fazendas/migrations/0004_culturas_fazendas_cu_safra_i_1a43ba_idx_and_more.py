@@ -0,0 +1,27 @@
+# Generated by Django 5.2.1 on 2026-10-19 16:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fazendas', '0003_historicalculturas_fazendas_hi_id_0617eb_idx_and_more'),
+        ('localidades', '0006_cidades_localidades_estado__cdb660_idx'),
+        ('produtores', '0004_historicalprodutores_produtores__id_5683ad_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='culturas',
+            index=models.Index(fields=['safra', 'nome', 'id'], name='fazendas_cu_safra_i_1a43ba_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fazendas',
+            index=models.Index(fields=['nome', 'id'], name='fazendas_fa_nome_54d27e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='safras',
+            index=models.Index(fields=['-ano', 'id'], name='fazendas_sa_ano_12eaf9_idx'),
+        ),
+    ]
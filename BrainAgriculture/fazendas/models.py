@@ -27,6 +27,8 @@ class Fazendas(BasicModel):
         help_text=_("Área total da fazenda, em hectares."),
     )
 
+    caminho_dono = "produtor__usuario"
+
     def __str__(self):
         return f"{self.nome} - {self.produtor.usuario.nome}"
 
@@ -35,16 +37,25 @@ class Fazendas(BasicModel):
         verbose_name_plural = _("Fazendas")
         unique_together = [["nome", "produtor"]]
         ordering = ["nome"]
+        # Paginação por cursor (Core.Pagination) na ordenação padrão.
+        indexes = [models.Index(fields=["nome", "id"])]
 
     def area_agricultavel(self, ano_referencia):
         return self.area_total - self.area_vegetacao(ano_referencia)
 
     def area_vegetacao(self, ano_referencia):
         return sum(
-            safra.area_vegetacao_total
-            for safra in self.safras.filter(ano=ano_referencia)
+            safra.area_vegetacao_total for safra in self.safras_do_ano(ano_referencia)
         )
 
+    def safras_do_ano(self, ano_referencia):
+        # Usa as safras pré-carregadas (prefetch_related ou snapshot
+        # histórico), quando houver, em vez de consultar o banco.
+        if "safras" in getattr(self, "_prefetched_objects_cache", {}):
+            return [safra for safra in self.safras.all() if safra.ano == ano_referencia]
+
+        return self.safras.filter(ano=ano_referencia)
+
 
 class Safras(BasicModel):
     fazenda = models.ForeignKey(
@@ -59,6 +70,8 @@ class Safras(BasicModel):
         help_text=_("Ano da safra."),
     )
 
+    caminho_dono = "fazenda__produtor__usuario"
+
     def save(self, *args, **kwargs):
         self.nome = f"Safra de {self.ano}"
         super().save(*args, **kwargs)
@@ -70,6 +83,7 @@ class Safras(BasicModel):
         verbose_name = _("Safra")
         verbose_name_plural = _("Safras")
         ordering = ["-ano"]
+        indexes = [models.Index(fields=["-ano", "id"])]
 
     @property
     def area_vegetacao_total(self):
@@ -90,6 +104,8 @@ class Culturas(BasicModel):
         help_text=_("Área plantada da cultura, em hectares."),
     )
 
+    caminho_dono = "safra__fazenda__produtor__usuario"
+
     def __str__(self):
         return f"{self.nome} - {self.safra}"
 
@@ -97,3 +113,4 @@ class Culturas(BasicModel):
         verbose_name = _("Cultura")
         verbose_name_plural = _("Culturas")
         ordering = ["safra__ano", "nome"]
+        indexes = [models.Index(fields=["safra", "nome", "id"])]
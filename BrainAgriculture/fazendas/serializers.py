@@ -1,8 +1,14 @@
 from datetime import datetime
 
+from django.db.models import OuterRef
 from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
 
+from Common.localidades.cache import CacheLocalidades
+from Common.localidades.models import Cidades
+from Common.localidades.serializers import CidadeCacheRelatedField
+from Core.SparseFields import CamposEsparsosSerializerMixin
+from Core.ValuesSerialization import CampoValores
 from Usuarios.produtores.models import Produtores
 
 from .business import (
@@ -14,7 +20,12 @@ from .business import (
 from .models import Culturas, Fazendas, Safras
 
 
-class FazendasSerializer(serializers.ModelSerializer):
+def _ou_zero(soma):
+    # Como sum() sem itens: SUM sem linhas resulta em NULL no banco.
+    return 0 if soma is None else soma
+
+
+class FazendasSerializer(CamposEsparsosSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Fazendas
         fields = [
@@ -29,24 +40,70 @@ class FazendasSerializer(serializers.ModelSerializer):
             "area_vegetacao",
         ]
         read_only_fields = ["id"]
+        # O que cada campo calculado exige do queryset (ver Core.SparseFields).
+        consultas_campos = {
+            "produtor_nome": {
+                "select_related": ["produtor__usuario"],
+                "only": ["produtor__usuario__nome"],
+            },
+            "cidade_nome": {"only": ["cidade"]},
+            "area_agricultavel": {
+                "only": ["area_total"],
+                "prefetch_related": ["safras__culturas"],
+            },
+            "area_vegetacao": {"prefetch_related": ["safras__culturas"]},
+        }
 
     area_agricultavel = serializers.SerializerMethodField()
     area_vegetacao = serializers.SerializerMethodField()
     produtor_nome = serializers.CharField(
         source="produtor.usuario.nome", read_only=True
     )
-    cidade_nome = serializers.CharField(source="cidade.nome", read_only=True)
+    cidade_nome = serializers.SerializerMethodField()
+    cidade = CidadeCacheRelatedField(queryset=Cidades.objects.all())
     produtor = serializers.PrimaryKeyRelatedField(queryset=Produtores.objects.all())
 
-    def get_area_agricultavel(self, obj):
-        ano_atual = datetime.now().year
+    @staticmethod
+    def nome_cidade(cidade_id):
+        cidade = CacheLocalidades.obter_cidade(cidade_id)
+
+        return cidade.nome if cidade else None
 
-        return obj.area_agricultavel(ano_atual)
+    def get_cidade_nome(self, obj) -> str:
+        return self.nome_cidade(obj.cidade_id)
+
+    def get_ano_referencia(self):
+        return self.context.get("ano_referencia") or datetime.now().year
+
+    def get_area_agricultavel(self, obj):
+        return obj.area_agricultavel(self.get_ano_referencia())
 
     def get_area_vegetacao(self, obj):
-        ano_atual = datetime.now().year
+        return obj.area_vegetacao(self.get_ano_referencia())
 
-        return obj.area_vegetacao(ano_atual)
+    def campos_por_valores(self):
+        # Caminho de leitura por values() (ver Core.ValuesSerialization). Sem
+        # culturas no ano, a área de vegetação é 0, como em area_vegetacao().
+        vegetacao = FazendaBusinessService.subconsulta_area_plantada(
+            safra__fazenda=OuterRef("pk"), safra__ano=self.get_ano_referencia()
+        )
+
+        return {
+            "cidade_nome": CampoValores(
+                valor=lambda linha: self.nome_cidade(linha["cidade"]),
+                colunas=("cidade",),
+            ),
+            "area_vegetacao": CampoValores(
+                valor=lambda linha: _ou_zero(linha["_area_vegetacao"]),
+                anotacoes={"_area_vegetacao": vegetacao},
+            ),
+            "area_agricultavel": CampoValores(
+                valor=lambda linha: linha["area_total"]
+                - _ou_zero(linha["_area_vegetacao"]),
+                colunas=("area_total",),
+                anotacoes={"_area_vegetacao": vegetacao},
+            ),
+        }
 
     def validate_area_total(self, value):
         AreaValidationService.validate_area_total_fazenda(value)
@@ -54,7 +111,17 @@ class FazendasSerializer(serializers.ModelSerializer):
         return value
 
 
-class SafraSerializer(serializers.ModelSerializer):
+class FazendasProximasSerializer(FazendasSerializer):
+    class Meta(FazendasSerializer.Meta):
+        fields = FazendasSerializer.Meta.fields + ["distancia_km"]
+
+    distancia_km = serializers.SerializerMethodField()
+
+    def get_distancia_km(self, obj) -> float:
+        return self.context["distancias"].get(obj.cidade_id)
+
+
+class SafraSerializer(CamposEsparsosSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Safras
         fields = [
@@ -67,6 +134,15 @@ class SafraSerializer(serializers.ModelSerializer):
             "area_agricultavel_disponivel",
         ]
         read_only_fields = ["id", "nome"]
+        consultas_campos = {
+            "fazenda_nome": {"select_related": ["fazenda"], "only": ["fazenda__nome"]},
+            "area_vegetacao_total": {"prefetch_related": ["culturas"]},
+            "area_agricultavel_disponivel": {
+                "select_related": ["fazenda"],
+                "only": ["ano", "fazenda__area_total"],
+                "prefetch_related": ["fazenda__safras__culturas"],
+            },
+        }
 
     fazenda_nome = serializers.CharField(source="fazenda.nome", read_only=True)
     area_vegetacao_total = serializers.ReadOnlyField()
@@ -76,6 +152,29 @@ class SafraSerializer(serializers.ModelSerializer):
     def get_area_agricultavel_disponivel(self, obj):
         return obj.fazenda.area_agricultavel(obj.ano)
 
+    def campos_por_valores(self):
+        # Caminho de leitura por values() (ver Core.ValuesSerialization).
+        return {
+            "area_vegetacao_total": CampoValores(
+                valor=lambda linha: _ou_zero(linha["_area_vegetacao_total"]),
+                anotacoes={
+                    "_area_vegetacao_total": FazendaBusinessService.subconsulta_area_plantada(
+                        safra=OuterRef("pk")
+                    )
+                },
+            ),
+            "area_agricultavel_disponivel": CampoValores(
+                valor=lambda linha: linha["fazenda__area_total"]
+                - _ou_zero(linha["_area_vegetacao_fazenda"]),
+                colunas=("fazenda__area_total",),
+                anotacoes={
+                    "_area_vegetacao_fazenda": FazendaBusinessService.subconsulta_area_plantada(
+                        safra__fazenda=OuterRef("fazenda"), safra__ano=OuterRef("ano")
+                    )
+                },
+            ),
+        }
+
     def validate_ano(self, value):
         SafraValidationService.validate_ano_safra(value)
 
@@ -92,7 +191,7 @@ class SafraSerializer(serializers.ModelSerializer):
         return attrs
 
 
-class CulturaSerializer(serializers.ModelSerializer):
+class CulturaSerializer(CamposEsparsosSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Culturas
         fields = [
@@ -105,6 +204,14 @@ class CulturaSerializer(serializers.ModelSerializer):
             "area_plantada",
         ]
         read_only_fields = ["id"]
+        consultas_campos = {
+            "safra_nome": {"select_related": ["safra"], "only": ["safra__nome"]},
+            "fazenda_nome": {
+                "select_related": ["safra__fazenda"],
+                "only": ["safra__fazenda__nome"],
+            },
+            "ano_safra": {"select_related": ["safra"], "only": ["safra__ano"]},
+        }
 
     safra_nome = serializers.CharField(source="safra.nome", read_only=True)
     fazenda_nome = serializers.CharField(source="safra.fazenda.nome", read_only=True)
@@ -1,13 +1,20 @@
-from datetime import datetime
+import re
+from datetime import datetime, timedelta
 from decimal import Decimal
+from unittest.mock import patch
 
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import F
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APITestCase
 from rest_framework_simplejwt.tokens import RefreshToken
 
 from Common.localidades.models import Cidades, Estados
+from Core.Ownership import PoliticaDono
 from Usuarios.produtores.models import Produtores
 
 from .business import (
@@ -399,6 +406,67 @@ class FazendaAPITest(APITestCase):
         )
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_fazendas_proximas(self):
+        self.cidade.latitude, self.cidade.longitude = -22.9056, -47.0608
+        self.cidade.save()
+        self.cidade2.latitude, self.cidade2.longitude = -23.5505, -46.6333
+        self.cidade2.save()
+        cidade_distante = Cidades.objects.create(
+            nome="Belo Horizonte",
+            estado=self.estado,
+            codigo_ibge=6,
+            latitude=-19.9167,
+            longitude=-43.9345,
+        )
+
+        perto = Fazendas.objects.create(
+            nome="Fazenda Campinas",
+            produtor=self.produtor,
+            cidade=self.cidade,
+            area_total=Decimal("100"),
+        )
+        Fazendas.objects.create(
+            nome="Fazenda BH",
+            produtor=self.produtor,
+            cidade=cidade_distante,
+            area_total=Decimal("100"),
+        )
+        Fazendas.objects.create(
+            nome="Fazenda Outro Produtor",
+            produtor=self.produtor2,
+            cidade=self.cidade,
+            area_total=Decimal("100"),
+        )
+
+        token = self.get_token(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+        response = self.client.get(
+            f"/api/brainagriculture/v1/fazendas/proximas/?cidade={self.cidade2.id}&raio_km=100"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"][0]["id"], perto.id)
+        self.assertAlmostEqual(response.data["results"][0]["distancia_km"], 84, delta=1)
+
+        response = self.client.get(
+            f"/api/brainagriculture/v1/fazendas/proximas/?cidade={self.cidade2.id}&raio_km=600"
+        )
+        self.assertEqual(len(response.data["results"]), 2)
+
+        response = self.client.get(
+            f"/api/brainagriculture/v1/fazendas/proximas/?cidade={self.cidade2.id}&raio_km=abc"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        sem_coordenadas = Cidades.objects.create(
+            nome="Sem Coordenadas", estado=self.estado, codigo_ibge=7
+        )
+        response = self.client.get(
+            f"/api/brainagriculture/v1/fazendas/proximas/?cidade={sem_coordenadas.id}&raio_km=10"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
 
 class SafraAPITest(APITestCase):
     def setUp(self):
@@ -950,3 +1018,242 @@ class CulturaAPITest(APITestCase):
             f"/api/brainagriculture/v1/culturas/{cultura.id}/"
         )
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_retrieve_sem_verificacao_extra_de_dono(self):
+        cultura = Culturas.objects.create(
+            nome="Soja", safra=self.safra, area_plantada=Decimal("300")
+        )
+
+        token = self.get_token(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+        # O queryset já é restrito ao dono: a permissão não consulta de novo.
+        with patch.object(
+            PoliticaDono, "eh_dono_pk", side_effect=AssertionError
+        ) as eh_dono_pk:
+            response = self.client.get(
+                f"/api/brainagriculture/v1/culturas/{cultura.id}/"
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        eh_dono_pk.assert_not_called()
+
+    def test_verificacao_dono_cultura_uma_consulta(self):
+        from .views import CulturaViewSet
+
+        cultura = Culturas.objects.create(
+            nome="Soja", safra=self.safra, area_plantada=Decimal("300")
+        )
+        cultura_outro = Culturas.objects.create(
+            nome="Milho", safra=self.safra_outro, area_plantada=Decimal("300")
+        )
+
+        view = CulturaViewSet()
+        view.request = type("Request", (), {"user": self.user})()
+        view.kwargs = {}
+
+        with self.assertNumQueries(1):
+            self.assertTrue(view.get_dono_do_registro(cultura))
+
+        with self.assertNumQueries(1):
+            self.assertFalse(view.get_dono_do_registro(cultura_outro))
+
+
+class FazendaAsOfAPITest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            nome="Usuário", cpf_cnpj="99193226012", password="userpass123"
+        )
+        self.produtor = Produtores.objects.create(usuario=self.user)
+
+        estado = Estados.objects.create(nome="São Paulo", sigla="SP", codigo_ibge=3)
+        cidade = Cidades.objects.create(nome="Campinas", estado=estado, codigo_ibge=4)
+
+        self.fazenda = Fazendas.objects.create(
+            nome="Fazenda Antiga",
+            produtor=self.produtor,
+            cidade=cidade,
+            area_total=Decimal("1000"),
+        )
+        self.safra = Safras.objects.create(fazenda=self.fazenda, ano=2024)
+        self.soja = Culturas.objects.create(
+            nome="Soja", safra=self.safra, area_plantada=Decimal("300")
+        )
+        self.milho = Culturas.objects.create(
+            nome="Milho", safra=self.safra, area_plantada=Decimal("200")
+        )
+
+        # Desloca o estado inicial para um dia atrás; as alterações abaixo
+        # ficam no presente.
+        for model in (Fazendas, Safras, Culturas):
+            model.history.update(history_date=F("history_date") - timedelta(days=1))
+        self.as_of = (timezone.now() - timedelta(hours=12)).isoformat()
+
+        self.fazenda.nome = "Fazenda Nova"
+        self.fazenda.area_total = Decimal("2000")
+        self.fazenda.save()
+        self.soja.area_plantada = Decimal("900")
+        self.soja.save()
+        self.milho.delete()
+        Culturas.objects.create(
+            nome="Trigo", safra=self.safra, area_plantada=Decimal("100")
+        )
+
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.user).access_token}"
+        )
+
+    def test_retrieve_as_of(self):
+        response = self.client.get(
+            f"/api/brainagriculture/v1/fazendas/{self.fazenda.id}/",
+            {"as_of": self.as_of},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["nome"], "Fazenda Antiga")
+        self.assertEqual(response.data["area_total"], "1000.00")
+
+        response = self.client.get(
+            f"/api/brainagriculture/v1/fazendas/{self.fazenda.id}/"
+        )
+        self.assertEqual(response.data["nome"], "Fazenda Nova")
+
+    def test_area_info_as_of(self):
+        response = self.client.get(
+            f"/api/brainagriculture/v1/fazendas/{self.fazenda.id}/area_info/",
+            {"as_of": self.as_of, "ano": 2024},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["fazenda"], "Fazenda Antiga")
+        self.assertEqual(response.data["area_total"], Decimal("1000"))
+        self.assertEqual(response.data["area_vegetacao"], Decimal("500"))
+        self.assertEqual(response.data["area_agricultavel"], Decimal("500"))
+        self.assertEqual(
+            [
+                (cultura["nome"], cultura["area_plantada"])
+                for cultura in response.data["safras"][0]["culturas"]
+            ],
+            [("Milho", Decimal("200")), ("Soja", Decimal("300"))],
+        )
+
+        response = self.client.get(
+            f"/api/brainagriculture/v1/fazendas/{self.fazenda.id}/area_info/",
+            {"ano": 2024},
+        )
+        self.assertEqual(response.data["area_vegetacao"], Decimal("1000"))
+
+    def test_snapshot_uma_consulta_por_model(self):
+        instante = timezone.now() - timedelta(hours=12)
+
+        with self.assertNumQueries(3):
+            fazenda = FazendaBusinessService.montar_snapshot(self.fazenda.id, instante)
+            info = FazendaBusinessService.calcular_area_info(fazenda, 2024)
+
+        self.assertEqual(info["area_vegetacao"], Decimal("500"))
+
+    def test_as_of_invalido_ou_anterior_a_criacao(self):
+        url = f"/api/brainagriculture/v1/fazendas/{self.fazenda.id}/area_info/"
+
+        response = self.client.get(url, {"as_of": "ontem"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(url, {"as_of": "2000-01-01"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class CamposEsparsosAPITest(APITestCase):
+    url = "/api/brainagriculture/v1/fazendas/"
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            nome="Usuário", cpf_cnpj="99193226012", password="userpass123"
+        )
+        self.produtor = Produtores.objects.create(usuario=self.user)
+
+        estado = Estados.objects.create(nome="São Paulo", sigla="SP", codigo_ibge=3)
+        self.cidade = Cidades.objects.create(
+            nome="Campinas", estado=estado, codigo_ibge=4
+        )
+        self.ano = datetime.now().year
+
+        for indice in range(3):
+            self.criar_fazenda(indice)
+
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.user).access_token}"
+        )
+
+    def criar_fazenda(self, indice):
+        fazenda = Fazendas.objects.create(
+            nome=f"Fazenda {indice}",
+            produtor=self.produtor,
+            cidade=self.cidade,
+            area_total=Decimal("1000"),
+        )
+        safra = Safras.objects.create(fazenda=fazenda, ano=self.ano)
+        Culturas.objects.create(nome="Soja", safra=safra, area_plantada=Decimal("300"))
+
+    def consultas_listagem(self, parametros):
+        # Descarta a primeira chamada, que popula os caches de contagem e de
+        # autenticação.
+        self.client.get(self.url, parametros)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, parametros)
+
+        return response, [
+            query["sql"] for query in queries if "fazendas_fazendas" in query["sql"]
+        ]
+
+    def test_fields_uma_consulta_estreita(self):
+        response, queries = self.consultas_listagem({"fields": "id,nome"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [set(fazenda) for fazenda in response.data["results"]],
+            [{"id", "nome"}] * 3,
+        )
+        self.assertEqual(len(queries), 1)
+        colunas = queries[0].split(" FROM ")[0]
+        self.assertEqual(
+            re.findall(r'"fazendas_fazendas"\."(\w+)"', colunas), ["id", "nome"]
+        )
+
+    def test_omit_remove_campos_calculados(self):
+        response, queries = self.consultas_listagem(
+            {"omit": "area_agricultavel,area_vegetacao"}
+        )
+
+        fazenda = response.data["results"][0]
+        self.assertNotIn("area_agricultavel", fazenda)
+        self.assertNotIn("area_vegetacao", fazenda)
+        self.assertEqual(fazenda["produtor_nome"], "Usuário")
+        self.assertFalse(any("fazendas_safras" in query for query in queries))
+
+    def test_listagem_completa_sem_consultas_por_registro(self):
+        _, queries = self.consultas_listagem({})
+
+        self.criar_fazenda(3)
+        response, queries_com_mais_uma = self.consultas_listagem({})
+
+        self.assertEqual(len(queries_com_mais_uma), len(queries))
+        self.assertEqual(response.data["results"][0]["area_vegetacao"], Decimal("300"))
+        self.assertEqual(
+            response.data["results"][0]["area_agricultavel"], Decimal("700")
+        )
+
+    def test_fields_ignorado_na_escrita(self):
+        response = self.client.post(
+            f"{self.url}?fields=id",
+            {
+                "nome": "Fazenda Nova",
+                "produtor": self.produtor.id,
+                "cidade": self.cidade.id,
+                "area_total": "500.00",
+            },
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["nome"], "Fazenda Nova")
@@ -6,23 +6,35 @@ from rest_framework import status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
+from Common.localidades.business import (
+    RAIO_MAXIMO_PROXIMIDADE_KM,
+    ProximidadeBusinessService,
+)
+from Common.localidades.models import Cidades
 from Core.BasicMyDataAndModelViewSet import BasicMyDataAndModelViewSet
-from Usuarios.produtores.models import Produtores
+from Core.HistorySnapshot import interpretar_instante
+from Core.Ownership import PoliticaDono
+from Core.SparseFields import PARAMETROS_CAMPOS_ESPARSOS, CamposEsparsosViewSetMixin
+from Core.ValuesSerialization import ListagemPorValoresMixin
 
 from .business import CulturaBusinessService, FazendaBusinessService
 from .models import Culturas, Fazendas, Safras
 from .serializers import (
     CulturaCreateUpdateSerializer,
     CulturaSerializer,
+    FazendasProximasSerializer,
     FazendasSerializer,
     SafraSerializer,
 )
 
 
 @extend_schema(tags=["BrainAgriculture - Fazendas"])
-class FazendasViewSet(BasicMyDataAndModelViewSet):
+class FazendasViewSet(
+    ListagemPorValoresMixin, CamposEsparsosViewSetMixin, BasicMyDataAndModelViewSet
+):
     queryset = Fazendas.objects.all()
     serializer_class = FazendasSerializer
+    ordenacao_cursor = ("nome", "id")
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ["nome", "produtor", "cidade"]
     http_method_names = ["get", "post", "patch", "delete"]
@@ -47,25 +59,84 @@ class FazendasViewSet(BasicMyDataAndModelViewSet):
                 required=False,
                 type=int,
             ),
+            *PARAMETROS_CAMPOS_ESPARSOS,
         ]
     )
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
-    def create(self, request, *args, **kwargs):
-        serializer = self.get_serializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
+    def get_fazenda_as_of(self, request):
+        """
+        Retorna a fazenda da requisição, reconstruída a partir do histórico
+        quando o parâmetro as_of é informado.
+
+        Returns:
+            Tupla (fazenda, instante, erro): erro é uma Response a ser
+            devolvida quando as_of é inválido ou a fazenda não existia
+        """
+        fazenda = self.get_object()
+        as_of = request.query_params.get("as_of")
+
+        if not as_of:
+            return fazenda, None, None
 
         try:
-            produtor = Produtores.objects.get(
-                id=serializer.validated_data["produtor"].id
+            instante = interpretar_instante(as_of)
+        except ValueError:
+            return (
+                None,
+                None,
+                Response(
+                    {"detail": "as_of deve ser uma data ou data e hora ISO 8601."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                ),
             )
-        except:
-            return Response(
-                {"detail": "Produtor não encontrado."}, status=status.HTTP_404_NOT_FOUND
+
+        snapshot = FazendaBusinessService.montar_snapshot(fazenda.id, instante)
+        if snapshot is None:
+            return (
+                None,
+                None,
+                Response(
+                    {"detail": "A fazenda não existia na data informada."},
+                    status=status.HTTP_404_NOT_FOUND,
+                ),
             )
 
-        if produtor.usuario != request.user:
+        return snapshot, instante, None
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="as_of",
+                description=(
+                    "Data ou data e hora (ISO 8601) para consultar a fazenda como "
+                    "estava naquele instante, a partir do histórico."
+                ),
+                required=False,
+                type=str,
+            ),
+            *PARAMETROS_CAMPOS_ESPARSOS,
+        ]
+    )
+    def retrieve(self, request, *args, **kwargs):
+        fazenda, instante, erro = self.get_fazenda_as_of(request)
+        if erro is not None:
+            return erro
+
+        context = self.get_serializer_context()
+        if instante is not None:
+            context["ano_referencia"] = instante.year
+
+        return Response(self.get_serializer_class()(fazenda, context=context).data)
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        if not PoliticaDono.eh_dono(
+            serializer.validated_data["produtor"], request.user
+        ):
             return Response(
                 {
                     "detail": "Você não tem permissão para acessar recursos de outros usuários.",
@@ -75,23 +146,6 @@ class FazendasViewSet(BasicMyDataAndModelViewSet):
 
         return super().create(request, *args, **kwargs)
 
-    def get_dono_do_registro(self, obj):
-        try:
-            return self.request.user.id == obj.produtor.usuario.id
-        except:
-            return False
-
-    def get_queryset(self):
-        user = self.request.user
-
-        if user.is_admin:
-            return Fazendas.objects.all()
-
-        if hasattr(user, "produtor_perfil"):
-            return Fazendas.objects.filter(produtor=user.produtor_perfil)
-
-        return Fazendas.objects.none()
-
     @extend_schema(
         parameters=[
             OpenApiParameter(
@@ -100,15 +154,27 @@ class FazendasViewSet(BasicMyDataAndModelViewSet):
                 required=False,
                 type=int,
             ),
+            OpenApiParameter(
+                name="as_of",
+                description=(
+                    "Data ou data e hora (ISO 8601) para calcular as áreas como "
+                    "estavam naquele instante, a partir do histórico."
+                ),
+                required=False,
+                type=str,
+            ),
         ]
     )
     @action(detail=True, methods=["get"])
     def area_info(self, request, pk=None):
-        fazenda = self.get_object()
+        fazenda, instante, erro = self.get_fazenda_as_of(request)
+        if erro is not None:
+            return erro
+
         ano = request.query_params.get("ano")
 
         if not ano:
-            ano = datetime.now().year
+            ano = (instante or datetime.now()).year
         else:
             try:
                 ano = int(ano)
@@ -121,9 +187,10 @@ class FazendasViewSet(BasicMyDataAndModelViewSet):
         area_info = FazendaBusinessService.calcular_area_info(fazenda, ano)
 
         data = {"fazenda": fazenda.nome, "ano": ano, **area_info, "safras": []}
+        if instante is not None:
+            data["as_of"] = instante
 
-        safras = fazenda.safras.filter(ano=ano)
-        for safra in safras:
+        for safra in fazenda.safras_do_ano(ano):
             data["safras"].append(
                 {
                     "id": safra.id,
@@ -142,11 +209,84 @@ class FazendasViewSet(BasicMyDataAndModelViewSet):
 
         return Response(data)
 
+    @extend_schema(
+        summary="Fazendas próximas a uma cidade",
+        description=(
+            "Lista as fazendas localizadas em cidades cujo centroide está a até "
+            "raio_km da cidade informada, com a distância em km."
+        ),
+        responses={200: FazendasProximasSerializer(many=True)},
+        parameters=[
+            OpenApiParameter(
+                name="cidade",
+                description="ID da cidade de referência",
+                required=True,
+                type=int,
+            ),
+            OpenApiParameter(
+                name="raio_km",
+                description=f"Raio de busca em km (máximo {RAIO_MAXIMO_PROXIMIDADE_KM})",
+                required=True,
+                type=float,
+            ),
+        ],
+    )
+    @action(detail=False, methods=["get"], filter_backends=[])
+    def proximas(self, request):
+        try:
+            cidade_id = int(request.query_params.get("cidade"))
+            raio_km = float(request.query_params.get("raio_km"))
+        except (TypeError, ValueError):
+            return Response(
+                {"detail": "Informe cidade (inteiro) e raio_km (número)."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if not 0 < raio_km <= RAIO_MAXIMO_PROXIMIDADE_KM:
+            return Response(
+                {
+                    "detail": f"raio_km deve estar entre 0 e {RAIO_MAXIMO_PROXIMIDADE_KM}."
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        cidade = (
+            Cidades.objects.only("id", "latitude", "longitude")
+            .filter(id=cidade_id)
+            .first()
+        )
+        if cidade is None:
+            return Response(
+                {"detail": "Cidade não encontrada."}, status=status.HTTP_404_NOT_FOUND
+            )
+
+        if cidade.latitude is None or cidade.longitude is None:
+            return Response(
+                {"detail": "A cidade informada não possui coordenadas cadastradas."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        distancias = ProximidadeBusinessService.cidades_no_raio(cidade, raio_km)
+
+        fazendas = self.get_queryset().filter(cidade_id__in=distancias.keys())
+        context = {**self.get_serializer_context(), "distancias": distancias}
+
+        page = self.paginate_queryset(fazendas)
+        if page is not None:
+            serializer = FazendasProximasSerializer(page, many=True, context=context)
+            return self.get_paginated_response(serializer.data)
+
+        serializer = FazendasProximasSerializer(fazendas, many=True, context=context)
+        return Response(serializer.data)
+
 
 @extend_schema(tags=["BrainAgriculture - Safras"])
-class SafraViewSet(BasicMyDataAndModelViewSet):
+class SafraViewSet(
+    ListagemPorValoresMixin, CamposEsparsosViewSetMixin, BasicMyDataAndModelViewSet
+):
     queryset = Safras.objects.all()
     serializer_class = SafraSerializer
+    ordenacao_cursor = ("-ano", "id")
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ["fazenda", "ano"]
     http_method_names = ["get", "post", "patch", "delete"]
@@ -165,6 +305,7 @@ class SafraViewSet(BasicMyDataAndModelViewSet):
                 required=False,
                 type=int,
             ),
+            *PARAMETROS_CAMPOS_ESPARSOS,
         ]
     )
     def list(self, request, *args, **kwargs):
@@ -174,14 +315,7 @@ class SafraViewSet(BasicMyDataAndModelViewSet):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        try:
-            fazenda = Fazendas.objects.get(id=serializer.validated_data["fazenda"].id)
-        except:
-            return Response(
-                {"detail": "Fazenda não encontrada."}, status=status.HTTP_404_NOT_FOUND
-            )
-
-        if fazenda.produtor.usuario != request.user:
+        if not PoliticaDono.eh_dono(serializer.validated_data["fazenda"], request.user):
             return Response(
                 {
                     "detail": "Você não tem permissão para acessar recursos de outros usuários.",
@@ -191,23 +325,6 @@ class SafraViewSet(BasicMyDataAndModelViewSet):
 
         return super().create(request, *args, **kwargs)
 
-    def get_dono_do_registro(self, obj):
-        try:
-            return self.request.user.id == obj.fazenda.produtor.usuario.id
-        except:
-            return False
-
-    def get_queryset(self):
-        user = self.request.user
-
-        if user.is_admin:
-            return Safras.objects.all()
-
-        if hasattr(user, "produtor_perfil"):
-            return Safras.objects.filter(fazenda__produtor=user.produtor_perfil)
-
-        return Safras.objects.none()
-
     @action(detail=True, methods=["get"])
     def culturas_resumo(self, request, pk=None):
         safra = self.get_object()
@@ -225,9 +342,13 @@ class SafraViewSet(BasicMyDataAndModelViewSet):
 
 
 @extend_schema(tags=["BrainAgriculture - Culturas"])
-class CulturaViewSet(BasicMyDataAndModelViewSet):
+class CulturaViewSet(
+    ListagemPorValoresMixin, CamposEsparsosViewSetMixin, BasicMyDataAndModelViewSet
+):
     queryset = Culturas.objects.all()
     serializer_class = CulturaSerializer
+    # Colunas locais, servidas pelo índice (safra, nome, id) do model.
+    ordenacao_cursor = ("safra_id", "nome", "id")
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ["nome", "safra", "safra__fazenda", "safra__ano"]
     http_method_names = ["get", "post", "patch", "delete"]
@@ -258,6 +379,7 @@ class CulturaViewSet(BasicMyDataAndModelViewSet):
                 required=False,
                 type=int,
             ),
+            *PARAMETROS_CAMPOS_ESPARSOS,
         ]
     )
     def list(self, request, *args, **kwargs):
@@ -267,14 +389,7 @@ class CulturaViewSet(BasicMyDataAndModelViewSet):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        try:
-            safra = Safras.objects.get(id=serializer.validated_data["safra"].id)
-        except:
-            return Response(
-                {"detail": "Safra não encontrada."}, status=status.HTTP_404_NOT_FOUND
-            )
-
-        if safra.fazenda.produtor.usuario != request.user:
+        if not PoliticaDono.eh_dono(serializer.validated_data["safra"], request.user):
             return Response(
                 {
                     "detail": "Você não tem permissão para acessar recursos de outros usuários.",
@@ -289,25 +404,6 @@ class CulturaViewSet(BasicMyDataAndModelViewSet):
             return CulturaCreateUpdateSerializer
         return CulturaSerializer
 
-    def get_dono_do_registro(self, obj):
-        try:
-            return self.request.user.id == obj.safra.fazenda.produtor.usuario.id
-        except:
-            return False
-
-    def get_queryset(self):
-        user = self.request.user
-
-        if user.is_admin:
-            return Culturas.objects.all()
-
-        if hasattr(user, "produtor_perfil"):
-            return Culturas.objects.filter(
-                safra__fazenda__produtor=user.produtor_perfil
-            )
-
-        return Culturas.objects.none()
-
     @action(detail=True, methods=["get"])
     def area_disponivel(self, request, pk=None):
         cultura = self.get_object()
@@ -6,6 +6,9 @@ from dotenv import load_dotenv
 import sentry_sdk
 from sentry_sdk.integrations.django import DjangoIntegration
 
+from Core.Database import configurar_conexoes
+from Core.Tracing import amostrar_traces, filtrar_transacao
+
 from .drf_spectacular_settings import *
 from .rest_framework_settings import *
 
@@ -32,6 +35,7 @@ INSTALLED_APPS = [
     "rest_framework",
     "simple_history",
     "corsheaders",
+    "Core",
     ### Usuários ###
     "Usuarios.usuarios",
     "Usuarios.produtores",
@@ -43,8 +47,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "Core.Metrics.MetricasMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "Core.StaticFiles.ArquivosEstaticosMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -53,6 +58,7 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
+    "Core.BulkHistory.HistoricoAdiadoMiddleware",
 ]
 
 STORAGES = {
@@ -90,15 +96,73 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "BrainAgricultureTesteV2.wsgi.application"
 
+# Workers e threads do gunicorn: dimensionam as conexões com o banco (uma por
+# thread de cada worker).
+GUNICORN_WORKERS = int(os.environ.get("GUNICORN_WORKERS", 2))
+GUNICORN_THREADS = int(os.environ.get("GUNICORN_THREADS", 1))
+# Perfil ASGI (workers do uvicorn sob o gunicorn), ver Core.AsyncViews.
+GUNICORN_ASGI = os.environ.get("GUNICORN_ASGI") == "1"
+
+# Conexões persistentes ou pool (DB_POOL=1), ver Core.Database.
 DATABASES = {
+    "default": configurar_conexoes(
+        {
+            "ENGINE": os.environ.get("DB_ENGINE"),
+            "NAME": os.environ.get("DB_NAME"),
+            "USER": os.environ.get("DB_USER"),
+            "PASSWORD": os.environ.get("DB_PASSWORD"),
+            "HOST": os.environ.get("DB_HOST"),
+            "PORT": os.environ.get("DB_PORT"),
+        },
+        GUNICORN_THREADS,
+        asgi=GUNICORN_ASGI,
+    )
+}
+
+# Conexões do servidor do banco disponíveis para a aplicação; o system check
+# Core.W001 avisa se os workers e threads do gunicorn puderem excedê-las.
+DB_LIMITE_CONEXOES = int(os.environ.get("DB_LIMITE_CONEXOES", 0)) or None
+
+# O cache "versoes" guarda os carimbos de versão dos dados de referência
+# (Core.DataVersions) e precisa ser compartilhado entre os workers do gunicorn.
+CACHES = {
     "default": {
-        "ENGINE": os.environ.get("DB_ENGINE"),
-        "NAME": os.environ.get("DB_NAME"),
-        "USER": os.environ.get("DB_USER"),
-        "PASSWORD": os.environ.get("DB_PASSWORD"),
-        "HOST": os.environ.get("DB_HOST"),
-        "PORT": os.environ.get("DB_PORT"),
-    }
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "versoes": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.environ.get(
+            "CACHE_VERSOES_DIR", os.path.join(BASE_DIR, ".cache", "versoes")
+        ),
+        "TIMEOUT": None,
+    },
+}
+
+# Diretório dos dumps pré-comprimidos de cidades (/cidades/dump/), gerados
+# na sincronização com o IBGE e compartilhados entre os workers.
+LOCALIDADES_DUMP_DIR = os.environ.get(
+    "LOCALIDADES_DUMP_DIR", os.path.join(BASE_DIR, ".cache", "localidades")
+)
+
+# Diretório onde cada worker grava suas métricas (Core.Metrics), somadas pelo
+# endpoint /metrics; vazio mantém as métricas apenas por processo.
+METRICAS_DIR = os.environ.get(
+    "METRICAS_DIR", os.path.join(BASE_DIR, ".cache", "metricas")
+)
+METRICAS_INTERVALO_GRAVACAO = int(os.environ.get("METRICAS_INTERVALO_GRAVACAO", 5))
+
+# Amostragem dos traces do Sentry (Core.Tracing): transações com duração de
+# pelo menos TRACES_LIMITE_LENTA_MS são sempre enviadas; das rápidas, é
+# enviada a fração da rota (maior prefixo em TRACES_TAXAS_POR_ROTA) ou
+# TRACES_TAXA_PADRAO. Rotas com taxa 0 não são rastreadas.
+TRACES_LIMITE_LENTA_MS = int(os.environ.get("TRACES_LIMITE_LENTA_MS", 1000))
+TRACES_TAXA_PADRAO = float(os.environ.get("TRACES_TAXA_PADRAO", 0.01))
+TRACES_TAXAS_POR_ROTA = {
+    "/metrics": 0,
+    "/static/": 0,
+    "/api/schema/": 0,
+    "/api/brainagriculture/v1/dashboards/": 0.05,
+    "/api/localidades/v1/atualizar_localidades/": 1,
 }
 
 if "test" in sys.argv or "test_coverage" in sys.argv:
@@ -106,6 +170,12 @@ if "test" in sys.argv or "test_coverage" in sys.argv:
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": ":memory:",
     }
+    CACHES["versoes"] = {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "versoes",
+        "TIMEOUT": None,
+    }
+    METRICAS_DIR = None
     
 sentry_sdk.init(
     dsn=os.environ.get("DSN_SENTRY"),
@@ -113,8 +183,9 @@ sentry_sdk.init(
         DjangoIntegration(),
     ],
 
-    send_default_pii=True,
-    traces_sample_rate=0.5
+    send_default_pii=os.environ.get("SENTRY_ENVIAR_PII", "") == "1",
+    traces_sampler=amostrar_traces,
+    before_send_transaction=filtrar_transacao,
 )
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -132,6 +203,66 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# O primeiro hasher da lista gera os hashes das senhas novas e das senhas
+# regravadas no login (quando o hash armazenado usa outro algoritmo ou outros
+# parâmetros); os demais servem apenas para verificar hashes antigos.
+PASSWORD_HASHER_PADRAO = os.environ.get(
+    "PASSWORD_HASHER_PADRAO", "Core.Hashers.PBKDF2ConfiguravelPasswordHasher"
+)
+PASSWORD_PBKDF2_ITERACOES = int(os.environ.get("PASSWORD_PBKDF2_ITERACOES", 600_000))
+PASSWORD_HASHERS = [PASSWORD_HASHER_PADRAO] + [
+    hasher
+    for hasher in (
+        "Core.Hashers.PBKDF2ConfiguravelPasswordHasher",
+        "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+        "django.contrib.auth.hashers.Argon2PasswordHasher",
+        "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+        "django.contrib.auth.hashers.ScryptPasswordHasher",
+    )
+    if hasher != PASSWORD_HASHER_PADRAO
+]
+
+AUTHENTICATION_BACKENDS = ["Usuarios.usuarios.backends.CpfCnpjModelBackend"]
+
+# Máximo de registros do provisionamento em lote por requisição: as senhas
+# são criptografadas no próprio worker (cerca de 0,25 s cada com 600 mil
+# iterações), dentro do timeout do gunicorn. Cargas maiores usam o comando
+# provisionar_usuarios, que distribui o hash entre os núcleos.
+PROVISIONAMENTO_LIMITE_REQUISICAO = int(
+    os.environ.get("PROVISIONAMENTO_LIMITE_REQUISICAO", 50)
+)
+
+# Por quanto tempo um CPF/CNPJ sem cadastro fica no cache negativo do login.
+LOGIN_CACHE_NEGATIVO_TTL = int(os.environ.get("LOGIN_CACHE_NEGATIVO_TTL", 300))
+
+# Modo de gravação do histórico (simple_history) dos models do Core.BasicModel:
+# "sincrono", "on_commit" ou "outbox" (ver Core.BulkHistory). HISTORICO_MODOS
+# sobrepõe o modo de models específicos, no formato
+# "fazendas.Culturas=on_commit,fazendas.Safras=outbox".
+HISTORICO_MODO_PADRAO = os.environ.get("HISTORICO_MODO_PADRAO", "sincrono")
+HISTORICO_MODOS = dict(
+    item.strip().split("=", 1)
+    for item in os.environ.get("HISTORICO_MODOS", "").split(",")
+    if item.strip()
+)
+
+# Política de retenção do histórico por model, aplicada pelo comando
+# podar_historico: mantém as "versoes" mais recentes de cada objeto e tudo o
+# que tiver menos de "dias" dias (ver Core.HistoryRetention).
+HISTORICO_RETENCAO = {
+    "localidades.Estados": {"versoes": 3, "dias": 180},
+    "localidades.Cidades": {"versoes": 3, "dias": 180},
+}
+
+# Contagem das listagens paginadas por limit/offset (ver Core.Counting): no
+# PostgreSQL, resultados estimados acima do limite usam a estimativa do
+# planejador no lugar de COUNT(*); as contagens ficam em cache por até
+# PAGINACAO_TTL_CONTAGEM segundos.
+PAGINACAO_LIMITE_CONTAGEM_EXATA = int(
+    os.environ.get("PAGINACAO_LIMITE_CONTAGEM_EXATA", 10000)
+)
+PAGINACAO_TTL_CONTAGEM = int(os.environ.get("PAGINACAO_TTL_CONTAGEM", 300))
+
 AUTH_USER_MODEL = "usuarios.Usuarios"
 ACCOUNT_AUTHENTICATION_METHOD = "cpf_cnpj"
 ACCOUNT_USER_MODEL_USERNAME_FIELD = None
@@ -1,9 +1,7 @@
 from django.urls import include, path
-from drf_spectacular.views import (
-    SpectacularAPIView,
-    SpectacularRedocView,
-    SpectacularSwaggerView,
-)
+from drf_spectacular.views import SpectacularRedocView, SpectacularSwaggerView
+
+from Core.views import EsquemaOpenAPIView, MetricasView
 
 from .views_jwt import TokenObtainPairViewDOC, TokenRefreshViewDOC, TokenVerifyViewDOC
 
@@ -11,7 +9,8 @@ urlpatterns = [
     path("api/token/", TokenObtainPairViewDOC.as_view(), name="token_obtain_pair"),
     path("api/token/refresh/", TokenRefreshViewDOC.as_view(), name="token_refresh"),
     path("api/token/verify/", TokenVerifyViewDOC.as_view(), name="token_verify"),
-    path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
+    path("metrics", MetricasView.as_view(), name="metricas"),
+    path("api/schema/", EsquemaOpenAPIView.as_view(), name="schema"),
     path(
         "api/schema/swagger/",
         SpectacularSwaggerView.as_view(url_name="schema"),
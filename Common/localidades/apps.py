@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class LocalidadesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "Common.localidades"
+
+    def ready(self):
+        from . import signals
@@ -1,10 +1,46 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from bisect import bisect_left
+from pathlib import Path
+
 import requests
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.functions import Length
 from rest_framework import status
 from rest_framework.response import Response
 
+from Core.BulkHistory import HistoricoEmLote
+from Core.Compression import comprimir
+from Core.DataVersions import obter_versao
+from Core.GeoUtils import celulas_no_raio, distancias_haversine
+from Core.TextUtils import normalizar_texto
+from Core.Tracing import rastrear, rastrear_servico
+
+from .cache import CHAVE_VERSAO_LOCALIDADES, CacheLocalidades
 from .models import Cidades, Estados
 
+LIMITE_PADRAO_AUTOCOMPLETE = 10
+LIMITE_MAXIMO_AUTOCOMPLETE = 50
+
+RANK_PREFIXO_NOME = 0
+RANK_PREFIXO_PALAVRA = 1
+RANK_TRECHO = 2
+
+RAIO_MAXIMO_PROXIMIDADE_KM = 1000
+
+MOTIVO_HISTORICO_SINCRONIZACAO = "Sincronização IBGE"
+
+ARQUIVO_MANIFESTO_DUMP = "manifesto.json"
+CHAVE_DUMP_TODAS = "todas"
+SUFIXOS_CODIFICACAO = {"identity": "", "gzip": ".gz", "br": ".br"}
+
 
+@rastrear_servico("ibge")
 class ApiIBGEBusinessService:
 
     @staticmethod
@@ -21,36 +57,71 @@ class ApiIBGEBusinessService:
         estados_criados, estados_atualizados = 0, 0
         cidades_criadas, cidades_atualizadas = 0, 0
 
-        for estado in estados_data:
-            estado_obj, created = Estados.objects.update_or_create(
-                codigo_ibge=estado["id"],
-                defaults={
-                    "nome": estado["nome"],
-                    "sigla": estado["sigla"],
-                },
-            )
-            if created:
-                estados_criados += 1
-            else:
-                estados_atualizados += 1
-
-            cidades_url = f"https://servicodados.ibge.gov.br/api/v1/localidades/estados/{estado['id']}/municipios"
-            cidades_resp = requests.get(cidades_url)
-            if cidades_resp.status_code != 200:
-                continue
-            cidades_data = cidades_resp.json()
-            for cidade in cidades_data:
-                cidade_obj, created = Cidades.objects.update_or_create(
-                    codigo_ibge=cidade["id"],
-                    defaults={
-                        "nome": cidade["nome"],
-                        "estado": estado_obj,
-                    },
-                )
-                if created:
-                    cidades_criadas += 1
-                else:
-                    cidades_atualizadas += 1
+        # Todas as requisições ao IBGE são feitas antes das escritas, para não
+        # manter a transação do lote aberta durante chamadas externas.
+        cidades_por_estado = {}
+        with rastrear("ibge.buscar_municipios", "ibge"):
+            for estado in estados_data:
+                cidades_url = f"https://servicodados.ibge.gov.br/api/v1/localidades/estados/{estado['id']}/municipios"
+                cidades_resp = requests.get(cidades_url)
+                if cidades_resp.status_code == 200:
+                    cidades_por_estado[estado["id"]] = cidades_resp.json()
+
+        # Apenas registros novos ou alterados são gravados, para que uma
+        # sincronização sem mudanças não gere histórico nem invalide caches.
+        estados_existentes = {
+            estado.codigo_ibge: estado for estado in Estados.objects.all()
+        }
+        cidades_existentes = {
+            cidade.codigo_ibge: cidade for cidade in Cidades.objects.all()
+        }
+
+        with rastrear("ibge.gravar", "ibge"), HistoricoEmLote(
+            motivo=MOTIVO_HISTORICO_SINCRONIZACAO
+        ):
+            for estado in estados_data:
+                estado_obj = estados_existentes.get(estado["id"])
+                if estado_obj is None:
+                    estado_obj = Estados.objects.create(
+                        codigo_ibge=estado["id"],
+                        nome=estado["nome"],
+                        sigla=estado["sigla"],
+                    )
+                    estados_criados += 1
+                elif (
+                    estado_obj.nome != estado["nome"]
+                    or estado_obj.sigla != estado["sigla"]
+                ):
+                    estado_obj.nome = estado["nome"]
+                    estado_obj.sigla = estado["sigla"]
+                    estado_obj.save()
+                    estados_atualizados += 1
+
+                for cidade in cidades_por_estado.get(estado["id"], []):
+                    cidade_obj = cidades_existentes.get(cidade["id"])
+                    if cidade_obj is None:
+                        Cidades.objects.create(
+                            codigo_ibge=cidade["id"],
+                            nome=cidade["nome"],
+                            estado=estado_obj,
+                        )
+                        cidades_criadas += 1
+                    elif (
+                        cidade_obj.nome != cidade["nome"]
+                        or cidade_obj.estado_id != estado_obj.id
+                    ):
+                        cidade_obj.nome = cidade["nome"]
+                        cidade_obj.estado = estado_obj
+                        cidade_obj.save()
+                        cidades_atualizadas += 1
+
+        if (
+            estados_criados
+            or estados_atualizados
+            or cidades_criadas
+            or cidades_atualizadas
+        ):
+            ApiIBGEBusinessService.publicar_alteracoes()
 
         return Response(
             {
@@ -61,3 +132,382 @@ class ApiIBGEBusinessService:
             },
             status=status.HTTP_200_OK,
         )
+
+    @staticmethod
+    def publicar_alteracoes():
+        """
+        Propaga uma sincronização que alterou estados ou cidades: renova a
+        versão do CacheLocalidades e regera os dumps de cidades.
+        """
+        CacheLocalidades.invalidar()
+        DumpCidadesBusinessService.gerar()
+
+
+class IndiceCidades:
+    """
+    Índice ordenado de prefixos, mantido em memória no processo, usado no
+    autocomplete de cidades em bancos sem suporte a trigram (ex.: SQLite).
+
+    Cada cidade gera uma entrada por início de palavra do nome normalizado,
+    permitindo encontrar "sao jose" tanto por "sao jo" quanto por "jose".
+    O índice é reconstruído sempre que a versão do CacheLocalidades muda.
+    """
+
+    _lock = threading.Lock()
+    _versao = None
+    _entradas = None
+
+    @staticmethod
+    def _construir(snapshot):
+        entradas = []
+
+        for cidade in snapshot.cidades.values():
+            inicio = 0
+            for palavra in cidade.nome_normalizado.split(" "):
+                rank = RANK_PREFIXO_NOME if inicio == 0 else RANK_PREFIXO_PALAVRA
+                entradas.append((cidade.nome_normalizado[inicio:], rank, cidade.id))
+                inicio += len(palavra) + 1
+
+        entradas.sort()
+
+        return entradas
+
+    @classmethod
+    def _obter(cls, snapshot):
+        if cls._versao == snapshot.versao:
+            return cls._entradas
+
+        with cls._lock:
+            if cls._versao != snapshot.versao:
+                cls._entradas = cls._construir(snapshot)
+                cls._versao = snapshot.versao
+
+            return cls._entradas
+
+    @classmethod
+    def buscar(cls, termo, sigla=None, limite=LIMITE_PADRAO_AUTOCOMPLETE):
+        snapshot = CacheLocalidades.obter()
+        entradas = cls._obter(snapshot)
+        cidades = snapshot.cidades
+        sigla = sigla.upper() if sigla else None
+
+        melhores = {}
+        posicao = bisect_left(entradas, (termo,))
+        while posicao < len(entradas):
+            chave, rank, cidade_id = entradas[posicao]
+            if not chave.startswith(termo):
+                break
+
+            posicao += 1
+            if sigla and snapshot.estado_da_cidade(cidade_id).sigla != sigla:
+                continue
+            if rank < melhores.get(cidade_id, RANK_TRECHO):
+                melhores[cidade_id] = rank
+
+        ordenadas = sorted(
+            melhores.items(),
+            key=lambda item: (
+                item[1],
+                len(cidades[item[0]].nome_normalizado),
+                cidades[item[0]].nome_normalizado,
+            ),
+        )
+
+        return [
+            {
+                "id": cidade.id,
+                "nome": cidade.nome,
+                "codigo_ibge": cidade.codigo_ibge,
+                "estado": cidade.estado_id,
+                "estado_sigla": snapshot.estados[cidade.estado_id].sigla,
+            }
+            for cidade in (cidades[cidade_id] for cidade_id, _ in ordenadas[:limite])
+        ]
+
+
+class BuscaCidadesBusinessService:
+    @staticmethod
+    def autocompletar(termo, sigla=None, limite=LIMITE_PADRAO_AUTOCOMPLETE):
+        """
+        Busca cidades cujo nome começa com o termo informado, ignorando acentos
+        e maiúsculas.
+
+        Args:
+            termo: Texto digitado pelo usuário (ex.: "sao jo")
+            sigla: Sigla do estado para restringir a busca (opcional)
+            limite: Quantidade máxima de resultados
+
+        Returns:
+            Lista de dicts com id, nome, codigo_ibge, estado e estado_sigla,
+            ordenada por relevância
+        """
+        termo = normalizar_texto(termo)
+        limite = max(1, min(int(limite), LIMITE_MAXIMO_AUTOCOMPLETE))
+
+        if not termo:
+            return []
+
+        if connection.vendor == "postgresql":
+            resultado = BuscaCidadesBusinessService._autocompletar_postgres(
+                termo, sigla, limite
+            )
+        else:
+            resultado = IndiceCidades.buscar(termo, sigla, limite)
+
+        return resultado
+
+    @staticmethod
+    def _autocompletar_postgres(termo, sigla, limite):
+        # O LIKE '%termo%' é atendido pelo índice GIN trigram criado na
+        # migração 0003; o ranking prioriza prefixos do nome e das palavras.
+        cidades = Cidades.objects.filter(
+            Q(nome_normalizado__startswith=termo)
+            | Q(nome_normalizado__contains=f" {termo}")
+        )
+
+        if sigla:
+            cidades = cidades.filter(estado__sigla=sigla.upper())
+
+        cidades = (
+            cidades.annotate(
+                rank=Case(
+                    When(
+                        nome_normalizado__startswith=termo,
+                        then=Value(RANK_PREFIXO_NOME),
+                    ),
+                    default=Value(RANK_PREFIXO_PALAVRA),
+                    output_field=IntegerField(),
+                ),
+                tamanho=Length("nome_normalizado"),
+            )
+            .order_by("rank", "tamanho", "nome_normalizado")
+            .values("id", "nome", "codigo_ibge", "estado_id", "estado__sigla")[:limite]
+        )
+
+        return [
+            {
+                "id": cidade["id"],
+                "nome": cidade["nome"],
+                "codigo_ibge": cidade["codigo_ibge"],
+                "estado": cidade["estado_id"],
+                "estado_sigla": cidade["estado__sigla"],
+            }
+            for cidade in cidades
+        ]
+
+
+class DumpCidadesBusinessService:
+    """
+    Gera e lê os dumps completos de cidades (todas e por estado), gravados
+    em LOCALIDADES_DUMP_DIR como JSON puro, gzip e brotli (se disponível).
+
+    Os arquivos são nomeados pelo hash do conteúdo, e o manifesto guarda a
+    versão do CacheLocalidades usada na geração. Os dumps são publicados
+    apenas fora das requisições: pela sincronização com o IBGE e pela carga
+    de coordenadas (publicar_alteracoes) e pelo comando
+    publicar_dump_cidades, executado no deploy e após alterações manuais de
+    estados e cidades. A view serve sempre o último manifesto publicado.
+    """
+
+    @staticmethod
+    def _diretorio():
+        return Path(settings.LOCALIDADES_DUMP_DIR)
+
+    @staticmethod
+    def _gravar(caminho, dados):
+        # Grava em arquivo temporário e renomeia, para que outros workers
+        # nunca leiam um arquivo pela metade.
+        descritor, temporario = tempfile.mkstemp(dir=caminho.parent)
+        with os.fdopen(descritor, "wb") as arquivo:
+            arquivo.write(dados)
+        os.replace(temporario, caminho)
+
+    @staticmethod
+    def gerar():
+        """
+        Gera os dumps de todas as cidades e de cada estado.
+
+        Returns:
+            Dict do manifesto, com a versão e, por estado, o ETag e os
+            arquivos de cada codificação
+        """
+        versao = obter_versao(CHAVE_VERSAO_LOCALIDADES)
+
+        grupos = {CHAVE_DUMP_TODAS: []}
+        grupos.update(
+            {sigla: [] for sigla in Estados.objects.values_list("sigla", flat=True)}
+        )
+
+        for id, nome, codigo_ibge, estado_id, sigla in Cidades.objects.order_by(
+            "estado__nome", "nome"
+        ).values_list("id", "nome", "codigo_ibge", "estado_id", "estado__sigla"):
+            cidade = {
+                "id": id,
+                "nome": nome,
+                "codigo_ibge": codigo_ibge,
+                "estado": estado_id,
+            }
+            grupos[CHAVE_DUMP_TODAS].append(cidade)
+            grupos[sigla].append(cidade)
+
+        diretorio = DumpCidadesBusinessService._diretorio()
+        diretorio.mkdir(parents=True, exist_ok=True)
+
+        manifesto = {"versao": versao, "artefatos": {}}
+        for chave, cidades in grupos.items():
+            conteudo = json.dumps(
+                cidades, ensure_ascii=False, separators=(",", ":")
+            ).encode("utf-8")
+            etag = hashlib.sha256(conteudo).hexdigest()[:32]
+
+            arquivos = {}
+            for codificacao, dados in comprimir(conteudo).items():
+                nome_arquivo = (
+                    f"cidades-{chave}-{etag}.json{SUFIXOS_CODIFICACAO[codificacao]}"
+                )
+                if not (diretorio / nome_arquivo).exists():
+                    DumpCidadesBusinessService._gravar(diretorio / nome_arquivo, dados)
+                arquivos[codificacao] = nome_arquivo
+
+            manifesto["artefatos"][chave] = {"etag": etag, "arquivos": arquivos}
+
+        DumpCidadesBusinessService._gravar(
+            diretorio / ARQUIVO_MANIFESTO_DUMP, json.dumps(manifesto).encode("utf-8")
+        )
+
+        em_uso = {
+            nome_arquivo
+            for artefato in manifesto["artefatos"].values()
+            for nome_arquivo in artefato["arquivos"].values()
+        }
+        for caminho in diretorio.glob("cidades-*"):
+            if caminho.name not in em_uso:
+                caminho.unlink(missing_ok=True)
+
+        return manifesto
+
+    @staticmethod
+    def _ler_manifesto():
+        try:
+            with open(
+                DumpCidadesBusinessService._diretorio() / ARQUIVO_MANIFESTO_DUMP, "rb"
+            ) as arquivo:
+                return json.load(arquivo)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    @staticmethod
+    def publicar():
+        """
+        Gera os dumps se ainda não houver manifesto publicado ou se ele não for
+        da versão atual do CacheLocalidades (comando publicar_dump_cidades).
+
+        Returns:
+            True se os dumps foram gerados
+        """
+        manifesto = DumpCidadesBusinessService._ler_manifesto()
+        if manifesto is not None and manifesto["versao"] == obter_versao(
+            CHAVE_VERSAO_LOCALIDADES
+        ):
+            return False
+
+        DumpCidadesBusinessService.gerar()
+        return True
+
+    @staticmethod
+    def publicado():
+        """
+        Indica se algum dump já foi publicado.
+        """
+        return DumpCidadesBusinessService._ler_manifesto() is not None
+
+    @staticmethod
+    def obter(sigla=None, codificacoes_aceitas=()):
+        """
+        Retorna o dump de cidades pronto para ser servido.
+
+        Args:
+            sigla: Sigla do estado; se None, retorna todas as cidades
+            codificacoes_aceitas: Codificações aceitas pelo cliente
+                (ex.: ["br", "gzip"])
+
+        Returns:
+            Tupla (etag, codificacao, dados) ou None se o estado não existir
+            ou se nenhum dump tiver sido publicado
+        """
+        chave = sigla.upper() if sigla else CHAVE_DUMP_TODAS
+
+        for _ in range(2):
+            manifesto = DumpCidadesBusinessService._ler_manifesto()
+            if manifesto is None:
+                return None
+
+            artefato = manifesto["artefatos"].get(chave)
+            if artefato is None:
+                return None
+
+            codificacao = next(
+                (
+                    codificacao
+                    for codificacao in ("br", "gzip")
+                    if codificacao in artefato["arquivos"]
+                    and codificacao in codificacoes_aceitas
+                ),
+                "identity",
+            )
+            caminho = (
+                DumpCidadesBusinessService._diretorio()
+                / artefato["arquivos"][codificacao]
+            )
+
+            try:
+                dados = caminho.read_bytes()
+            except FileNotFoundError:
+                # Arquivo removido por uma publicação concorrente: o novo
+                # manifesto já foi gravado.
+                continue
+
+            etag = artefato["etag"]
+            if codificacao != "identity":
+                etag = f"{etag}-{codificacao}"
+
+            return f'"{etag}"', codificacao, dados
+
+        return None
+
+
+class ProximidadeBusinessService:
+    @staticmethod
+    def cidades_no_raio(cidade, raio_km: float) -> dict:
+        """
+        Encontra as cidades cujo centroide está a até raio_km da cidade de
+        origem.
+
+        As candidatas são pré-filtradas pelas células da grade geográfica
+        (coluna indexada grade_geo) e só então a distância exata é calculada.
+
+        Args:
+            cidade: Instância da cidade de origem (com latitude e longitude)
+            raio_km: Raio de busca em quilômetros
+
+        Returns:
+            Dict {id da cidade: distância em km}, incluindo a própria origem
+        """
+        celulas = celulas_no_raio(cidade.latitude, cidade.longitude, raio_km)
+
+        candidatas = list(
+            Cidades.objects.filter(grade_geo__in=celulas)
+            .order_by()
+            .values_list("id", "latitude", "longitude")
+        )
+        distancias = distancias_haversine(
+            cidade.latitude,
+            cidade.longitude,
+            ((latitude, longitude) for _, latitude, longitude in candidatas),
+        )
+
+        return {
+            cidade_id: round(distancia, 2)
+            for (cidade_id, _, _), distancia in zip(candidatas, distancias)
+            if distancia <= raio_km
+        }
@@ -0,0 +1,136 @@
+import threading
+from typing import NamedTuple
+
+from Core.Counting import ContagemEstimada
+from Core.DataVersions import incrementar_versao, obter_versao
+from Core.Metrics import registrar_cache
+
+from .models import Cidades, Estados
+
+CHAVE_VERSAO_LOCALIDADES = "localidades"
+
+
+def _instanciar(model, registro):
+    # from_db espera os valores na ordem dos campos concretos do model; os
+    # campos ausentes do registro ficam adiados (deferred).
+    campos = [
+        field.attname
+        for field in model._meta.concrete_fields
+        if field.attname in registro._fields
+    ]
+    return model.from_db("default", campos, [getattr(registro, c) for c in campos])
+
+
+class EstadoCache(NamedTuple):
+    id: int
+    nome: str
+    sigla: str
+    codigo_ibge: int
+
+    def instancia(self):
+        return _instanciar(Estados, self)
+
+
+class CidadeCache(NamedTuple):
+    id: int
+    nome: str
+    nome_normalizado: str
+    codigo_ibge: int
+    estado_id: int
+
+    def instancia(self):
+        return _instanciar(Cidades, self)
+
+
+class SnapshotLocalidades:
+    def __init__(self, versao, estados, cidades):
+        self.versao = versao
+        self.estados = estados
+        self.cidades = cidades
+
+    def estado_da_cidade(self, cidade_id):
+        cidade = self.cidades.get(cidade_id)
+        return self.estados.get(cidade.estado_id) if cidade else None
+
+
+class CacheLocalidades:
+    """
+    Cache por processo das tabelas de estados e cidades (id -> registro
+    compacto), carregado sob demanda.
+
+    A validade é controlada pelo carimbo de versão "localidades" do
+    Core.DataVersions, renovado sempre que estados ou cidades são gravados;
+    na sincronização com o IBGE, uma única vez, após o commit.
+    """
+
+    _lock = threading.Lock()
+    _snapshot = None
+
+    @classmethod
+    def obter(cls):
+        """
+        Retorna o snapshot atual, recarregando-o caso a versão tenha mudado.
+
+        Returns:
+            SnapshotLocalidades com os dicts estados e cidades
+        """
+        versao = obter_versao(CHAVE_VERSAO_LOCALIDADES)
+
+        snapshot = cls._snapshot
+        if snapshot is not None and snapshot.versao == versao:
+            return snapshot
+
+        with cls._lock:
+            if cls._snapshot is None or cls._snapshot.versao != versao:
+                cls._snapshot = cls._carregar(versao)
+
+            return cls._snapshot
+
+    @classmethod
+    def invalidar(cls):
+        incrementar_versao(CHAVE_VERSAO_LOCALIDADES)
+        # Na sincronização (em um HistoricoEmLote) e na carga de coordenadas
+        # (bulk_update, sem sinais), os sinais não invalidam registro a
+        # registro: a publicação das alterações invalida também as contagens.
+        ContagemEstimada.invalidar(Estados, Cidades)
+
+    @staticmethod
+    def _carregar(versao):
+        estados = {
+            registro[0]: EstadoCache(*registro)
+            for registro in Estados.objects.order_by().values_list(*EstadoCache._fields)
+        }
+        cidades = {
+            registro[0]: CidadeCache(*registro)
+            for registro in Cidades.objects.order_by().values_list(*CidadeCache._fields)
+        }
+
+        return SnapshotLocalidades(versao, estados, cidades)
+
+    @classmethod
+    def obter_estado(cls, estado_id):
+        return cls._obter_registro("estados", Estados, estado_id)
+
+    @classmethod
+    def obter_cidade(cls, cidade_id):
+        return cls._obter_registro("cidades", Cidades, cidade_id)
+
+    @classmethod
+    def _obter_registro(cls, tabela, model, pk):
+        try:
+            pk = int(pk)
+        except (TypeError, ValueError):
+            return None
+
+        registro = getattr(cls.obter(), tabela).get(pk)
+        registrar_cache("localidades", registro is not None)
+        if registro is not None:
+            return registro
+
+        # Falha de leitura: só consulta o banco para confirmar que o cache
+        # não está desatualizado, recarregando-o nesse caso.
+        if not model.objects.filter(pk=pk).exists():
+            return None
+
+        cls.invalidar()
+        return getattr(cls.obter(), tabela).get(pk)
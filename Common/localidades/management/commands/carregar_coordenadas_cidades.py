@@ -0,0 +1,67 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from simple_history.utils import bulk_update_with_history
+
+from Common.localidades.business import ApiIBGEBusinessService
+from Common.localidades.models import Cidades
+from Core.GeoUtils import celula_grade
+
+
+class Command(BaseCommand):
+    help = (
+        "Carrega os centroides (latitude/longitude) dos municípios a partir de "
+        "um CSV com as colunas codigo_ibge, latitude e longitude."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("arquivo", help="Caminho do arquivo CSV.")
+        parser.add_argument(
+            "--delimitador", default=",", help="Delimitador do CSV (padrão ',')."
+        )
+
+    def handle(self, *args, **options):
+        coordenadas = {}
+
+        try:
+            with open(options["arquivo"], newline="", encoding="utf-8-sig") as arquivo:
+                for linha in csv.DictReader(arquivo, delimiter=options["delimitador"]):
+                    coordenadas[int(linha["codigo_ibge"])] = (
+                        float(linha["latitude"]),
+                        float(linha["longitude"]),
+                    )
+        except FileNotFoundError:
+            raise CommandError(f"Arquivo '{options['arquivo']}' não encontrado.")
+        except (KeyError, ValueError) as erro:
+            raise CommandError(f"CSV inválido: {erro}")
+
+        alteradas = []
+        for cidade in Cidades.objects.filter(codigo_ibge__in=coordenadas.keys()):
+            latitude, longitude = coordenadas[cidade.codigo_ibge]
+            if (cidade.latitude, cidade.longitude) == (latitude, longitude):
+                continue
+
+            cidade.latitude = latitude
+            cidade.longitude = longitude
+            cidade.grade_geo = celula_grade(latitude, longitude)
+            alteradas.append(cidade)
+
+        with transaction.atomic():
+            bulk_update_with_history(
+                alteradas,
+                Cidades,
+                ["latitude", "longitude", "grade_geo"],
+                batch_size=1000,
+                default_change_reason="Carga de coordenadas",
+            )
+
+        if alteradas:
+            ApiIBGEBusinessService.publicar_alteracoes()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{len(alteradas)} cidades atualizadas; "
+                f"{len(coordenadas) - len(alteradas)} linhas sem alteração ou sem cidade correspondente."
+            )
+        )
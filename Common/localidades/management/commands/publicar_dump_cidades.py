@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from Common.localidades.business import DumpCidadesBusinessService
+
+
+class Command(BaseCommand):
+    help = (
+        "Publica os dumps pré-comprimidos de cidades servidos em "
+        "/cidades/dump/, se ainda não publicados ou desatualizados. Executar "
+        "no deploy e após alterações manuais de estados e cidades."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--forcar",
+            action="store_true",
+            help="Gera os dumps mesmo que o manifesto publicado esteja atualizado.",
+        )
+
+    def handle(self, *args, **options):
+        if options["forcar"]:
+            DumpCidadesBusinessService.gerar()
+        elif not DumpCidadesBusinessService.publicar():
+            self.stdout.write("Os dumps de cidades já estão atualizados.")
+            return
+
+        self.stdout.write(
+            f"Dumps de cidades publicados em {settings.LOCALIDADES_DUMP_DIR}."
+        )
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.1 on 2026-10-19 15:19
+
+from django.db import migrations, models
+
+from Core.TextUtils import normalizar_texto
+
+
+def preencher_nome_normalizado(apps, schema_editor):
+    Cidades = apps.get_model("localidades", "Cidades")
+
+    cidades = list(Cidades.objects.only("id", "nome"))
+    for cidade in cidades:
+        cidade.nome_normalizado = normalizar_texto(cidade.nome)
+
+    Cidades.objects.bulk_update(cidades, ["nome_normalizado"], batch_size=1000)
+
+
+def criar_indice_trigram(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS localidades_cidades_nome_normalizado_trgm "
+        "ON localidades_cidades USING gin (nome_normalizado gin_trgm_ops)"
+    )
+
+
+def remover_indice_trigram(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    schema_editor.execute(
+        "DROP INDEX IF EXISTS localidades_cidades_nome_normalizado_trgm"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('localidades', '0002_rename_cidade_cidades_rename_estado_estados_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cidades',
+            name='nome_normalizado',
+            field=models.CharField(db_index=True, default='', editable=False, help_text='Nome da cidade sem acentos e em minúsculas, usado nas buscas.', max_length=255, verbose_name='Nome Normalizado'),
+        ),
+        migrations.AddField(
+            model_name='historicalcidades',
+            name='nome_normalizado',
+            field=models.CharField(db_index=True, default='', editable=False, help_text='Nome da cidade sem acentos e em minúsculas, usado nas buscas.', max_length=255, verbose_name='Nome Normalizado'),
+        ),
+        migrations.RunPython(preencher_nome_normalizado, migrations.RunPython.noop),
+        migrations.RunPython(criar_indice_trigram, remover_indice_trigram),
+    ]
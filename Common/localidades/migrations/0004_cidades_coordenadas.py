@@ -0,0 +1,43 @@
+# Generated by Django 5.2.1 on 2026-10-19 15:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('localidades', '0003_cidades_nome_normalizado'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cidades',
+            name='grade_geo',
+            field=models.IntegerField(blank=True, db_index=True, editable=False, help_text='Célula da grade regular que contém o centroide, usada para pré-filtrar buscas por proximidade.', null=True, verbose_name='Célula da Grade Geográfica'),
+        ),
+        migrations.AddField(
+            model_name='cidades',
+            name='latitude',
+            field=models.FloatField(blank=True, help_text='Latitude do centroide do município, em graus.', null=True, verbose_name='Latitude'),
+        ),
+        migrations.AddField(
+            model_name='cidades',
+            name='longitude',
+            field=models.FloatField(blank=True, help_text='Longitude do centroide do município, em graus.', null=True, verbose_name='Longitude'),
+        ),
+        migrations.AddField(
+            model_name='historicalcidades',
+            name='grade_geo',
+            field=models.IntegerField(blank=True, db_index=True, editable=False, help_text='Célula da grade regular que contém o centroide, usada para pré-filtrar buscas por proximidade.', null=True, verbose_name='Célula da Grade Geográfica'),
+        ),
+        migrations.AddField(
+            model_name='historicalcidades',
+            name='latitude',
+            field=models.FloatField(blank=True, help_text='Latitude do centroide do município, em graus.', null=True, verbose_name='Latitude'),
+        ),
+        migrations.AddField(
+            model_name='historicalcidades',
+            name='longitude',
+            field=models.FloatField(blank=True, help_text='Longitude do centroide do município, em graus.', null=True, verbose_name='Longitude'),
+        ),
+    ]
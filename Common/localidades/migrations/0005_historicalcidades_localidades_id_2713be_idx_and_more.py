@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-19 16:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('localidades', '0004_cidades_coordenadas'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='historicalcidades',
+            index=models.Index(fields=['id', 'history_date'], name='localidades_id_2713be_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historicalestados',
+            index=models.Index(fields=['id', 'history_date'], name='localidades_id_afd65d_idx'),
+        ),
+    ]
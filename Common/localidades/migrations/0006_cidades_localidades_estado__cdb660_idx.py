@@ -0,0 +1,17 @@
+# Generated by Django 5.2.1 on 2026-10-19 16:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('localidades', '0005_historicalcidades_localidades_id_2713be_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cidades',
+            index=models.Index(fields=['estado', 'nome', 'id'], name='localidades_estado__cdb660_idx'),
+        ),
+    ]
@@ -2,6 +2,8 @@ from django.db import models
 from django.utils.translation import gettext_lazy as _
 
 from Core.BasicModel import BasicModel
+from Core.GeoUtils import celula_grade
+from Core.TextUtils import normalizar_texto
 
 
 class Estados(BasicModel):
@@ -33,12 +35,50 @@ class Cidades(BasicModel):
         related_name="cidades",
         verbose_name=_("Estado"),
     )
+    nome_normalizado = models.CharField(
+        _("Nome Normalizado"),
+        max_length=255,
+        db_index=True,
+        editable=False,
+        default="",
+        help_text=_("Nome da cidade sem acentos e em minúsculas, usado nas buscas."),
+    )
+    latitude = models.FloatField(
+        _("Latitude"),
+        null=True,
+        blank=True,
+        help_text=_("Latitude do centroide do município, em graus."),
+    )
+    longitude = models.FloatField(
+        _("Longitude"),
+        null=True,
+        blank=True,
+        help_text=_("Longitude do centroide do município, em graus."),
+    )
+    grade_geo = models.IntegerField(
+        _("Célula da Grade Geográfica"),
+        null=True,
+        blank=True,
+        db_index=True,
+        editable=False,
+        help_text=_(
+            "Célula da grade regular que contém o centroide, usada para "
+            "pré-filtrar buscas por proximidade."
+        ),
+    )
 
     class Meta:
         verbose_name = _("Cidade")
         verbose_name_plural = _("Cidades")
         unique_together = ("nome", "estado")
         ordering = ["estado__nome", "nome"]
+        # Paginação por cursor (Core.Pagination) na ordenação padrão.
+        indexes = [models.Index(fields=["estado", "nome", "id"])]
 
     def __str__(self):
         return f"{self.nome} - {self.estado.sigla}"
+
+    def save(self, *args, **kwargs):
+        self.nome_normalizado = normalizar_texto(self.nome)
+        self.grade_geo = celula_grade(self.latitude, self.longitude)
+        super().save(*args, **kwargs)
@@ -1,9 +1,47 @@
 from rest_framework import serializers
 
+from Core.SparseFields import CamposEsparsosSerializerMixin
+
+from .cache import CacheLocalidades
 from .models import Cidades, Estados
 
 
-class CidadesSerializer(serializers.ModelSerializer):
+class LocalidadeCacheRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    PrimaryKeyRelatedField que resolve o id pelo CacheLocalidades, sem
+    consultar o banco na validação.
+    """
+
+    def buscar_no_cache(self, pk):
+        raise NotImplementedError("Subclasses devem implementar buscar_no_cache")
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+
+        try:
+            int(data)
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+
+        registro = self.buscar_no_cache(data)
+        if registro is None:
+            self.fail("does_not_exist", pk_value=data)
+
+        return registro.instancia()
+
+
+class EstadoCacheRelatedField(LocalidadeCacheRelatedField):
+    def buscar_no_cache(self, pk):
+        return CacheLocalidades.obter_estado(pk)
+
+
+class CidadeCacheRelatedField(LocalidadeCacheRelatedField):
+    def buscar_no_cache(self, pk):
+        return CacheLocalidades.obter_cidade(pk)
+
+
+class CidadesSerializer(CamposEsparsosSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Cidades
         fields = (
@@ -13,10 +51,10 @@ class CidadesSerializer(serializers.ModelSerializer):
             "estado",
         )
 
-    estado = serializers.PrimaryKeyRelatedField(queryset=Estados.objects.all())
+    estado = EstadoCacheRelatedField(queryset=Estados.objects.all())
 
 
-class EstadosSerializer(serializers.ModelSerializer):
+class EstadosSerializer(CamposEsparsosSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Estados
         fields = (
@@ -25,3 +63,11 @@ class EstadosSerializer(serializers.ModelSerializer):
             "sigla",
             "codigo_ibge",
         )
+
+
+class CidadesAutocompleteSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    nome = serializers.CharField()
+    codigo_ibge = serializers.IntegerField()
+    estado = serializers.IntegerField(help_text="ID do estado")
+    estado_sigla = serializers.CharField(help_text="Sigla do estado")
@@ -0,0 +1,20 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from Core.BulkHistory import HistoricoEmLote
+
+from .cache import CacheLocalidades
+from .models import Cidades, Estados
+
+
+@receiver([post_save, post_delete], sender=Cidades)
+@receiver([post_save, post_delete], sender=Estados)
+def invalidar_cache_localidades(sender, **kwargs):
+    # A versão é renovada após o commit: antes dele, uma leitura concorrente
+    # recarregaria os dados antigos já na versão nova. Gravações em lote (a
+    # sincronização com o IBGE) renovam a versão uma única vez, em
+    # ApiIBGEBusinessService.publicar_alteracoes. Os dumps de cidades não são
+    # publicados aqui: ver DumpCidadesBusinessService.
+    if HistoricoEmLote.atual() is None:
+        transaction.on_commit(CacheLocalidades.invalidar)
@@ -0,0 +1,510 @@
+import gzip
+import json
+import os
+import random
+import shutil
+import tempfile
+from io import StringIO
+from unittest.mock import MagicMock, patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from Core.BulkHistory import HistoricoEmLote
+from Core.GeoUtils import celula_grade, distancias_haversine
+from Core.TextUtils import normalizar_texto
+
+from .business import (
+    ApiIBGEBusinessService,
+    BuscaCidadesBusinessService,
+    DumpCidadesBusinessService,
+    ProximidadeBusinessService,
+)
+from .cache import CacheLocalidades
+from .models import Cidades, Estados
+from .serializers import CidadeCacheRelatedField, CidadesSerializer
+
+User = get_user_model()
+
+
+class NormalizarTextoTestCase(TestCase):
+    def test_remove_acentos_e_maiusculas(self):
+        self.assertEqual(normalizar_texto("São José dos Campos"), "sao jose dos campos")
+
+    def test_colapsa_espacos(self):
+        self.assertEqual(normalizar_texto("  Ribeirão   Preto "), "ribeirao preto")
+
+    def test_valor_vazio(self):
+        self.assertEqual(normalizar_texto(None), "")
+
+
+class BuscaCidadesBusinessServiceTestCase(TestCase):
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.sp = Estados.objects.create(
+                nome="São Paulo", sigla="SP", codigo_ibge=35
+            )
+            self.sc = Estados.objects.create(
+                nome="Santa Catarina", sigla="SC", codigo_ibge=42
+            )
+
+            self.sjc = Cidades.objects.create(
+                nome="São José dos Campos", estado=self.sp, codigo_ibge=1
+            )
+            self.sjrp = Cidades.objects.create(
+                nome="São José do Rio Preto", estado=self.sp, codigo_ibge=2
+            )
+            self.sj_sc = Cidades.objects.create(
+                nome="São José", estado=self.sc, codigo_ibge=3
+            )
+            self.jose_bonifacio = Cidades.objects.create(
+                nome="José Bonifácio", estado=self.sp, codigo_ibge=4
+            )
+            self.campinas = Cidades.objects.create(
+                nome="Campinas", estado=self.sp, codigo_ibge=5
+            )
+
+    def test_nome_normalizado_preenchido_ao_salvar(self):
+        self.assertEqual(self.sjc.nome_normalizado, "sao jose dos campos")
+
+    def test_busca_sem_acentos(self):
+        resultado = BuscaCidadesBusinessService.autocompletar("sao jo")
+        ids = [cidade["id"] for cidade in resultado]
+
+        self.assertEqual(ids, [self.sj_sc.id, self.sjc.id, self.sjrp.id])
+
+    def test_prefixo_do_nome_antes_de_prefixo_de_palavra(self):
+        resultado = BuscaCidadesBusinessService.autocompletar("JOSÉ")
+        ids = [cidade["id"] for cidade in resultado]
+
+        self.assertEqual(ids[0], self.jose_bonifacio.id)
+        self.assertEqual(len(ids), 4)
+
+    def test_filtro_por_estado(self):
+        resultado = BuscaCidadesBusinessService.autocompletar("sao jose", sigla="sc")
+
+        self.assertEqual(len(resultado), 1)
+        self.assertEqual(resultado[0]["id"], self.sj_sc.id)
+        self.assertEqual(resultado[0]["estado_sigla"], "SC")
+
+    def test_limite(self):
+        resultado = BuscaCidadesBusinessService.autocompletar("sao", limite=2)
+
+        self.assertEqual(len(resultado), 2)
+
+    def test_termo_vazio(self):
+        self.assertEqual(BuscaCidadesBusinessService.autocompletar("   "), [])
+
+    def test_indice_atualizado_apos_nova_cidade(self):
+        self.assertEqual(BuscaCidadesBusinessService.autocompletar("ribeirao"), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ribeirao = Cidades.objects.create(
+                nome="Ribeirão Preto", estado=self.sp, codigo_ibge=6
+            )
+
+        resultado = BuscaCidadesBusinessService.autocompletar("ribeirao")
+        self.assertEqual([cidade["id"] for cidade in resultado], [ribeirao.id])
+
+
+class CidadesAutocompleteAPITestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            cpf_cnpj="66484750050", password="senha123", nome="Usuário Teste"
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            estado = Estados.objects.create(
+                nome="São Paulo", sigla="SP", codigo_ibge=35
+            )
+            self.cidade = Cidades.objects.create(
+                nome="São José dos Campos", estado=estado, codigo_ibge=1
+            )
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_autocomplete(self):
+        response = self.client.get(
+            "/api/localidades/v1/cidades/autocomplete/?q=sao jo&estado__sigla=SP"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]["id"], self.cidade.id)
+        self.assertEqual(response.data[0]["nome"], "São José dos Campos")
+        self.assertEqual(response.data[0]["estado_sigla"], "SP")
+
+    def test_autocomplete_limite_invalido(self):
+        response = self.client.get(
+            "/api/localidades/v1/cidades/autocomplete/?q=sao&limite=abc"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_autocomplete_sem_autenticacao(self):
+        self.client.force_authenticate(user=None)
+        response = self.client.get("/api/localidades/v1/cidades/autocomplete/?q=sao")
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class CacheLocalidadesTestCase(TestCase):
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.estado = Estados.objects.create(
+                nome="Minas Gerais", sigla="MG", codigo_ibge=31
+            )
+            self.cidade = Cidades.objects.create(
+                nome="Belo Horizonte", estado=self.estado, codigo_ibge=1
+            )
+
+        CacheLocalidades.obter()
+
+    def test_leituras_sem_consultas(self):
+        with self.assertNumQueries(0):
+            cidade = CacheLocalidades.obter_cidade(self.cidade.id)
+            estado = CacheLocalidades.obter_estado(cidade.estado_id)
+
+        self.assertEqual(cidade.nome, "Belo Horizonte")
+        self.assertEqual(estado.sigla, "MG")
+
+    def test_invalidado_ao_gravar(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.cidade.nome = "Belo Horizonte Atualizada"
+            self.cidade.save()
+
+        cidade = CacheLocalidades.obter_cidade(self.cidade.id)
+        self.assertEqual(cidade.nome, "Belo Horizonte Atualizada")
+
+    def test_lote_invalida_uma_vez_apos_commit(self):
+        with patch("Common.localidades.cache.incrementar_versao") as incrementar, patch(
+            "Core.Counting.incrementar_versao"
+        ) as incrementar_contagens, self.captureOnCommitCallbacks(
+            execute=True
+        ) as callbacks:
+            with HistoricoEmLote():
+                for indice in range(10):
+                    Cidades.objects.create(
+                        nome=f"Cidade {indice}",
+                        estado=self.estado,
+                        codigo_ibge=100 + indice,
+                    )
+
+            incrementar.assert_not_called()
+            incrementar_contagens.assert_not_called()
+
+        self.assertEqual(len(callbacks), 1)
+        incrementar.assert_not_called()
+        incrementar_contagens.assert_called_once()
+
+    def test_id_inexistente(self):
+        self.assertIsNone(CacheLocalidades.obter_cidade(999999))
+        self.assertIsNone(CacheLocalidades.obter_cidade("abc"))
+
+    def test_leitura_recarrega_cache_desatualizado(self):
+        # Gravação que não dispara sinais (ex.: outro processo)
+        Cidades.objects.bulk_create(
+            [Cidades(nome="Contagem", estado=self.estado, codigo_ibge=2)]
+        )
+        contagem = Cidades.objects.get(codigo_ibge=2)
+
+        self.assertEqual(CacheLocalidades.obter_cidade(contagem.id).nome, "Contagem")
+
+    def test_instancia_sem_consultas(self):
+        with self.assertNumQueries(0):
+            cidade = CacheLocalidades.obter_cidade(self.cidade.id).instancia()
+
+            self.assertEqual(cidade.pk, self.cidade.id)
+            self.assertEqual(cidade.estado_id, self.estado.id)
+
+    def test_related_field_sem_consultas(self):
+        field = CidadeCacheRelatedField(queryset=Cidades.objects.all())
+
+        with self.assertNumQueries(0):
+            cidade = field.to_internal_value(str(self.cidade.id))
+
+        self.assertEqual(cidade.pk, self.cidade.id)
+
+    def test_retrieve_sem_consultas(self):
+        user = User.objects.create_user(
+            cpf_cnpj="66484750050", password="senha123", nome="Usuário Teste"
+        )
+        client = APIClient()
+        client.force_authenticate(user=user)
+        CacheLocalidades.obter()
+
+        with self.assertNumQueries(0):
+            response = client.get(f"/api/localidades/v1/cidades/{self.cidade.id}/")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["nome"], "Belo Horizonte")
+        self.assertEqual(response.data["estado"], self.estado.id)
+
+        response = client.get("/api/localidades/v1/estados/999999/")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class DumpCidadesTestCase(TestCase):
+    def setUp(self):
+        self.diretorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.diretorio, ignore_errors=True)
+        settings_override = override_settings(LOCALIDADES_DUMP_DIR=self.diretorio)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.sp = Estados.objects.create(nome="São Paulo", sigla="SP", codigo_ibge=35)
+        self.mg = Estados.objects.create(
+            nome="Minas Gerais", sigla="MG", codigo_ibge=31
+        )
+        self.campinas = Cidades.objects.create(
+            nome="Campinas", estado=self.sp, codigo_ibge=1
+        )
+        self.bh = Cidades.objects.create(
+            nome="Belo Horizonte", estado=self.mg, codigo_ibge=2
+        )
+
+        DumpCidadesBusinessService.publicar()
+
+        self.client = APIClient()
+        self.url = "/api/localidades/v1/cidades/dump/"
+
+    def test_dump_gzip(self):
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertIn("max-age", response["Cache-Control"])
+        self.assertTrue(response["ETag"].endswith('-gzip"'))
+
+        cidades = json.loads(gzip.decompress(response.content))
+        self.assertEqual([c["nome"] for c in cidades], ["Belo Horizonte", "Campinas"])
+        self.assertEqual(
+            cidades[0],
+            {
+                "id": self.bh.id,
+                "nome": "Belo Horizonte",
+                "codigo_ibge": 2,
+                "estado": self.mg.id,
+            },
+        )
+
+    def test_dump_sem_compressao(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(len(json.loads(response.content)), 2)
+
+    def test_dump_por_estado(self):
+        response = self.client.get(f"{self.url}?estado__sigla=sp")
+
+        cidades = json.loads(response.content)
+        self.assertEqual([c["id"] for c in cidades], [self.campinas.id])
+
+        response = self.client.get(f"{self.url}?estado__sigla=XX")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_dump_if_none_match(self):
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip")
+        etag = response["ETag"]
+
+        response = self.client.get(
+            self.url, HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=etag
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(response.content, b"")
+
+    def test_dump_nao_publicado(self):
+        shutil.rmtree(self.diretorio)
+
+        with patch.object(DumpCidadesBusinessService, "gerar") as gerar:
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        gerar.assert_not_called()
+
+    def test_dump_publicado_pelo_comando(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        with patch.object(DumpCidadesBusinessService, "gerar") as gerar:
+            with self.captureOnCommitCallbacks(execute=True):
+                Cidades.objects.create(nome="Contagem", estado=self.mg, codigo_ibge=3)
+
+            # Nem a gravação nem a requisição regeram o dump.
+            self.assertEqual(self.client.get(self.url)["ETag"], etag)
+        gerar.assert_not_called()
+
+        call_command("publicar_dump_cidades", stdout=StringIO())
+
+        response = self.client.get(self.url)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(len(json.loads(response.content)), 3)
+
+        with patch.object(DumpCidadesBusinessService, "gerar") as gerar:
+            call_command("publicar_dump_cidades", stdout=StringIO())
+        gerar.assert_not_called()
+
+    def test_dump_mesmo_conteudo_do_serializer(self):
+        dump = json.loads(self.client.get(self.url).content)
+
+        self.assertEqual(
+            dump,
+            CidadesSerializer(
+                Cidades.objects.order_by("estado__nome", "nome"), many=True
+            ).data,
+        )
+
+
+class AtualizarLocalidadesIBGETestCase(TestCase):
+    def setUp(self):
+        self.estados = [{"id": 35, "nome": "São Paulo", "sigla": "SP"}]
+        self.cidades = [
+            {"id": 3509502, "nome": "Campinas"},
+            {"id": 3550308, "nome": "São Paulo"},
+        ]
+
+    def _resposta(self, dados):
+        resposta = MagicMock(status_code=200)
+        resposta.json.return_value = dados
+        return resposta
+
+    def _sincronizar(self):
+        def requests_get(url):
+            if url.endswith("/municipios"):
+                return self._resposta(self.cidades)
+            return self._resposta(self.estados)
+
+        with patch(
+            "Common.localidades.business.requests.get", side_effect=requests_get
+        ), patch.object(DumpCidadesBusinessService, "gerar") as gerar:
+            response = ApiIBGEBusinessService.atualizar_localidades_ibge(
+                "http://ibge/estados"
+            )
+
+        return response.data, gerar
+
+    def test_primeira_sincronizacao(self):
+        data, gerar = self._sincronizar()
+
+        self.assertEqual(data["estados_criados"], 1)
+        self.assertEqual(data["cidades_criadas"], 2)
+        self.assertEqual(Cidades.objects.count(), 2)
+        gerar.assert_called_once()
+
+    def test_sincronizacao_sem_alteracoes(self):
+        self._sincronizar()
+        historico = Cidades.history.count()
+
+        data, gerar = self._sincronizar()
+
+        self.assertEqual(data["estados_atualizados"], 0)
+        self.assertEqual(data["cidades_criadas"], 0)
+        self.assertEqual(data["cidades_atualizadas"], 0)
+        self.assertEqual(Cidades.history.count(), historico)
+        gerar.assert_not_called()
+
+    def test_sincronizacao_com_alteracao(self):
+        self._sincronizar()
+        self.cidades[0]["nome"] = "Campinas Nova"
+
+        data, gerar = self._sincronizar()
+
+        self.assertEqual(data["cidades_atualizadas"], 1)
+        self.assertEqual(
+            Cidades.objects.get(codigo_ibge=3509502).nome_normalizado,
+            "campinas nova",
+        )
+        gerar.assert_called_once()
+
+
+class ProximidadeBusinessServiceTestCase(TestCase):
+    def setUp(self):
+        self.sp = Estados.objects.create(nome="São Paulo", sigla="SP", codigo_ibge=35)
+
+    def test_distancia_haversine(self):
+        # São Paulo -> Campinas: ~84 km
+        distancia = distancias_haversine(
+            -23.5505, -46.6333, [(-22.9056, -47.0608), (-23.5505, -46.6333)]
+        )
+
+        self.assertAlmostEqual(distancia[0], 84, delta=1)
+        self.assertEqual(distancia[1], 0)
+
+    def test_grade_preenchida_ao_salvar(self):
+        cidade = Cidades.objects.create(
+            nome="Campinas",
+            estado=self.sp,
+            codigo_ibge=1,
+            latitude=-22.9056,
+            longitude=-47.0608,
+        )
+        sem_coordenadas = Cidades.objects.create(
+            nome="Sem Coordenadas", estado=self.sp, codigo_ibge=2
+        )
+
+        self.assertEqual(cidade.grade_geo, celula_grade(-22.9056, -47.0608))
+        self.assertIsNone(sem_coordenadas.grade_geo)
+
+    def test_pre_filtro_equivalente_a_forca_bruta(self):
+        aleatorio = random.Random(42)
+        cidades = [
+            Cidades(
+                nome=f"Cidade {i}",
+                estado=self.sp,
+                codigo_ibge=i,
+                latitude=aleatorio.uniform(-25, -20),
+                longitude=aleatorio.uniform(-50, -44),
+            )
+            for i in range(300)
+        ]
+        for cidade in cidades:
+            cidade.grade_geo = celula_grade(cidade.latitude, cidade.longitude)
+        Cidades.objects.bulk_create(cidades)
+
+        origem = Cidades.objects.get(codigo_ibge=0)
+        todas = list(Cidades.objects.values_list("id", "latitude", "longitude"))
+
+        for raio_km in (10, 60, 150, 400):
+            distancias = distancias_haversine(
+                origem.latitude,
+                origem.longitude,
+                ((latitude, longitude) for _, latitude, longitude in todas),
+            )
+            esperado = {
+                cidade_id
+                for (cidade_id, _, _), distancia in zip(todas, distancias)
+                if distancia <= raio_km
+            }
+
+            resultado = ProximidadeBusinessService.cidades_no_raio(origem, raio_km)
+
+            self.assertEqual(set(resultado), esperado)
+            self.assertEqual(resultado[origem.id], 0)
+
+    def test_carregar_coordenadas(self):
+        Cidades.objects.create(nome="Campinas", estado=self.sp, codigo_ibge=3509502)
+
+        descritor, caminho = tempfile.mkstemp(suffix=".csv")
+        self.addCleanup(os.remove, caminho)
+        with os.fdopen(descritor, "w") as arquivo:
+            arquivo.write(
+                "codigo_ibge,nome,latitude,longitude\n"
+                "3509502,Campinas,-22.9056,-47.0608\n"
+                "9999999,Inexistente,0,0\n"
+            )
+
+        call_command("carregar_coordenadas_cidades", caminho, stdout=StringIO())
+
+        cidade = Cidades.objects.get(codigo_ibge=3509502)
+        self.assertEqual((cidade.latitude, cidade.longitude), (-22.9056, -47.0608))
+        self.assertEqual(cidade.grade_geo, celula_grade(-22.9056, -47.0608))
+        self.assertEqual(
+            cidade.history.first().history_change_reason, "Carga de coordenadas"
+        )
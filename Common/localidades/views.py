@@ -6,16 +6,33 @@ from dotenv import load_dotenv
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import OpenApiParameter, extend_schema
 from rest_framework import status
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.viewsets import ReadOnlyModelViewSet
 
+from Core.AsyncViews import ListagemAssincronaMixin, ViewAssincronaMixin
+from Core.Compression import codificacoes_aceitas, resposta_comprimida
 from Core.Permissions import EhAdmin
+from Core.SparseFields import PARAMETROS_CAMPOS_ESPARSOS, CamposEsparsosViewSetMixin
 
-from .business import ApiIBGEBusinessService
+from .business import (
+    LIMITE_PADRAO_AUTOCOMPLETE,
+    ApiIBGEBusinessService,
+    BuscaCidadesBusinessService,
+    DumpCidadesBusinessService,
+)
+from .cache import CacheLocalidades
 from .models import Cidades, Estados
-from .serializers import CidadesSerializer, EstadosSerializer
+from .serializers import (
+    CidadesAutocompleteSerializer,
+    CidadesSerializer,
+    EstadosSerializer,
+)
+
+CACHE_CONTROL_DUMP = "public, max-age=86400, stale-while-revalidate=604800"
 
 
 @extend_schema(tags=["Common - Localidades"])
@@ -54,9 +71,16 @@ class AtualizarLocalidadesIBGEView(APIView):
 
 
 @extend_schema(tags=["Common - Localidades"])
-class CidadesViewSet(ReadOnlyModelViewSet):
+class CidadesViewSet(
+    ViewAssincronaMixin,
+    ListagemAssincronaMixin,
+    CamposEsparsosViewSetMixin,
+    ReadOnlyModelViewSet,
+):
     queryset = Cidades.objects.all()
     serializer_class = CidadesSerializer
+    # Colunas locais, servidas pelo índice (estado, nome, id) do model.
+    ordenacao_cursor = ("estado_id", "nome", "id")
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ["nome", "estado__nome", "estado__sigla", "codigo_ibge"]
     http_method_names = ["get"]
@@ -88,14 +112,123 @@ class CidadesViewSet(ReadOnlyModelViewSet):
                 location=OpenApiParameter.QUERY,
                 description="Filtrar pelo código do IBGE.",
             ),
+            *PARAMETROS_CAMPOS_ESPARSOS,
+        ]
+    )
+    async def list(self, request, *args, **kwargs):
+        return await super().list(request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        cidade = CacheLocalidades.obter_cidade(kwargs.get("pk"))
+
+        if cidade is None:
+            raise NotFound()
+
+        serializer = self.get_serializer(cidade.instancia())
+        return Response(serializer.data)
+
+    @extend_schema(
+        summary="Autocomplete de cidades",
+        description="Busca cidades pelo início do nome ou de qualquer palavra do nome, ignorando acentos e maiúsculas.",
+        responses={200: CidadesAutocompleteSerializer(many=True)},
+        parameters=[
+            OpenApiParameter(
+                name="q",
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description="Trecho inicial do nome da cidade (ex.: 'sao jo').",
+                required=True,
+            ),
+            OpenApiParameter(
+                name="estado__sigla",
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description="Restringir a busca a um estado.",
+            ),
+            OpenApiParameter(
+                name="limite",
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                description="Quantidade máxima de resultados (máximo 50).",
+                default=LIMITE_PADRAO_AUTOCOMPLETE,
+            ),
         ],
     )
-    def list(self, request, *args, **kwargs):
-        return super().list(request, *args, **kwargs)
+    @action(detail=False, methods=["get"], filter_backends=[], pagination_class=None)
+    def autocomplete(self, request):
+        termo = request.query_params.get("q", "")
+        sigla = request.query_params.get("estado__sigla")
+        limite = request.query_params.get("limite", LIMITE_PADRAO_AUTOCOMPLETE)
+
+        try:
+            limite = int(limite)
+        except ValueError:
+            return Response(
+                {"detail": "Limite deve ser um número inteiro"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        data = BuscaCidadesBusinessService.autocompletar(termo, sigla, limite)
+
+        serializer = CidadesAutocompleteSerializer(data, many=True)
+        return Response(serializer.data)
+
+    @extend_schema(
+        summary="Dump completo de cidades",
+        description=(
+            "Retorna todas as cidades (ou as de um estado) em um único JSON "
+            "pré-comprimido (brotli/gzip), com ETag forte e Cache-Control longo. "
+            "Rota pública, pois contém apenas dados de referência do IBGE. "
+            "Responde 503 enquanto nenhum dump tiver sido publicado (comando "
+            "publicar_dump_cidades ou sincronização com o IBGE)."
+        ),
+        responses={200: CidadesSerializer(many=True)},
+        parameters=[
+            OpenApiParameter(
+                name="estado__sigla",
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description="Retornar apenas as cidades de um estado.",
+            ),
+        ],
+    )
+    @action(
+        detail=False,
+        methods=["get"],
+        filter_backends=[],
+        pagination_class=None,
+        authentication_classes=[],
+        permission_classes=[AllowAny],
+    )
+    def dump(self, request):
+        if not DumpCidadesBusinessService.publicado():
+            return Response(
+                {
+                    "detail": "Dump de cidades ainda não publicado; "
+                    "tente novamente mais tarde."
+                },
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+
+        artefato = DumpCidadesBusinessService.obter(
+            request.query_params.get("estado__sigla"),
+            codificacoes_aceitas(request.headers.get("Accept-Encoding", "")),
+        )
+        if artefato is None:
+            raise NotFound()
+
+        return resposta_comprimida(
+            request, *artefato, "application/json", CACHE_CONTROL_DUMP
+        )
 
 
 @extend_schema(tags=["Common - Localidades"])
-class EstadosViewSet(ReadOnlyModelViewSet):
+class EstadosViewSet(
+    ViewAssincronaMixin,
+    ListagemAssincronaMixin,
+    CamposEsparsosViewSetMixin,
+    ReadOnlyModelViewSet,
+):
     queryset = Estados.objects.all()
     serializer_class = EstadosSerializer
     filter_backends = [DjangoFilterBackend]
@@ -123,7 +256,17 @@ class EstadosViewSet(ReadOnlyModelViewSet):
                 location=OpenApiParameter.QUERY,
                 description="Filtrar pelo código do IBGE.",
             ),
-        ],
+            *PARAMETROS_CAMPOS_ESPARSOS,
+        ]
     )
-    def list(self, request, *args, **kwargs):
-        return super().list(request, *args, **kwargs)
+    async def list(self, request, *args, **kwargs):
+        return await super().list(request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        estado = CacheLocalidades.obter_estado(kwargs.get("pk"))
+
+        if estado is None:
+            raise NotFound()
+
+        serializer = self.get_serializer(estado.instancia())
+        return Response(serializer.data)
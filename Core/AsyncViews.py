@@ -0,0 +1,88 @@
+from functools import update_wrapper
+from inspect import iscoroutinefunction
+
+from asgiref.sync import sync_to_async
+from rest_framework.response import Response
+
+from .ValuesSerialization import ListagemPorValoresMixin, SerializacaoPorValores
+
+
+class ViewAssincronaMixin:
+    """
+    APIView ou ViewSet do DRF servida como view async do Django: sob ASGI,
+    os handlers `async def` rodam no event loop, sem ocupar uma thread
+    enquanto esperam o banco.
+
+    Autenticação, permissões e throttling são os do DRF e, por serem
+    síncronos (e poderem consultar o banco, ex.: tokens sem as claims do
+    usuário), rodam em uma thread, com sync_to_async; o tratamento de
+    exceções e a montagem da resposta rodam no event loop. Handlers
+    síncronos da mesma view (ex.: ações ainda não portadas) também rodam em
+    uma thread.
+    """
+
+    @classmethod
+    def as_view(cls, *args, **initkwargs):
+        view = super().as_view(*args, **initkwargs)
+
+        # A view do DRF (e a dos ViewSets) é síncrona e apenas devolve a
+        # corrotina do dispatch; o Django só a trata como async se for uma
+        # função de corrotina.
+        async def view_assincrona(request, *args, **kwargs):
+            return await view(request, *args, **kwargs)
+
+        return update_wrapper(view_assincrona, view)
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(
+                    self, request.method.lower(), self.http_method_not_allowed
+                )
+            else:
+                handler = self.http_method_not_allowed
+
+            if iscoroutinefunction(handler):
+                response = await handler(request, *args, **kwargs)
+            else:
+                response = await sync_to_async(handler)(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
+class ListagemAssincronaMixin(ListagemPorValoresMixin):
+    """
+    Ação list async da ListagemPorValoresMixin: o mesmo JSON, filtros e
+    paginação, com a página lida pelo ORM async (a paginação precisa
+    implementar apaginate_queryset, como a PaginacaoPadrao). Se o serializer
+    não puder ser compilado, usa a listagem síncrona em uma thread.
+    """
+
+    async def list(self, request, *args, **kwargs):
+        leitura = None
+        if self.leitura_por_valores:
+            leitura = SerializacaoPorValores.compilar(self.get_serializer())
+
+        if leitura is None:
+            return await sync_to_async(super().list)(request, *args, **kwargs)
+
+        queryset = leitura.consulta(self.filter_queryset(self.get_queryset()))
+
+        page = None
+        if self.paginator is not None:
+            page = await self.paginator.apaginate_queryset(queryset, request, view=self)
+        if page is not None:
+            return self.get_paginated_response(leitura.representar(page))
+
+        return Response(leitura.representar([linha async for linha in queryset]))
@@ -2,7 +2,8 @@ import uuid
 
 from django.db import models
 from django.utils.translation import gettext_lazy as _
-from simple_history.models import HistoricalRecords
+
+from .BulkHistory import HistoricalRecordsEmLote
 
 
 class BasicModel(models.Model):
@@ -24,7 +25,14 @@ class BasicModel(models.Model):
         help_text=_("Nome do registro."),
     )
 
-    history = HistoricalRecords(inherit=True)
+    # Lookup do ORM até o usuário dono do registro (ver Core.Ownership).
+    caminho_dono = None
+
+    # Modo de gravação do histórico; None usa settings.HISTORICO_MODO_PADRAO
+    # (ver Core.BulkHistory.modo_historico).
+    modo_historico = None
+
+    history = HistoricalRecordsEmLote(inherit=True)
 
     class Meta:
         abstract = True
@@ -1,6 +1,26 @@
 from rest_framework.viewsets import ModelViewSet
 
+from .Ownership import PoliticaDono
+
 
 class BasicModelViewSet(ModelViewSet):
+    # True quando get_queryset já aplica PoliticaDono.visiveis: os registros
+    # obtidos por get_object() são do usuário (ou ele é administrador), e a
+    # permissão de objeto não precisa consultar o dono novamente.
+    queryset_restrito_ao_dono = False
+
     def get_dono_do_registro(self, obj):
-        raise NotImplementedError("Subclasses devem implementar get_dono_do_registro")
+        model = self.queryset.model
+
+        if not PoliticaDono.possui_caminho(model):
+            raise NotImplementedError(
+                "Subclasses devem implementar get_dono_do_registro ou o model "
+                "deve declarar caminho_dono"
+            )
+
+        if obj is None:
+            pk = self.kwargs.get(self.lookup_url_kwarg or self.lookup_field)
+        else:
+            pk = obj.pk
+
+        return PoliticaDono.eh_dono_pk(model, pk, self.request.user)
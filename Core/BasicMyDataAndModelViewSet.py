@@ -3,10 +3,16 @@ from rest_framework.permissions import IsAuthenticated
 from Core.Permissions import EhMeuDadoOuSouAdmin
 
 from .BasicModelViewSet import BasicModelViewSet
+from .Ownership import PoliticaDono
 
 
 class BasicMyDataAndModelViewSet(BasicModelViewSet):
+    queryset_restrito_ao_dono = True
+
     def get_permissions(self):
         if self.action in ["retrieve", "update", "partial_update", "destroy"]:
             return [EhMeuDadoOuSouAdmin()]
         return [IsAuthenticated()]
+
+    def get_queryset(self):
+        return PoliticaDono.visiveis(super().get_queryset(), self.request.user)
@@ -0,0 +1,430 @@
+import sys
+from collections import defaultdict
+from contextvars import ContextVar
+from functools import partial
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import models, transaction
+from django.utils import timezone
+from simple_history.models import HistoricalRecords
+
+from .models import HistoricoPendente
+
+# Modos de gravação do histórico, escolhidos por model (ver modo_historico):
+# - sincrono: um INSERT por alteração, como no simple_history;
+# - on_commit: o registro é montado na alteração e, após o commit, acumulado
+#   e gravado com bulk_create ao fim do bloco HistoricoAdiado (por padrão, ao
+#   fim da requisição). Registros ainda em memória se perdem se o processo
+#   cair entre o commit e a gravação;
+# - outbox: o registro é gravado na tabela HistoricoPendente na mesma
+#   transação da alteração (nada se perde) e movido em lote para a tabela
+#   Historical* pelo comando drenar_historico.
+MODO_SINCRONO = "sincrono"
+MODO_ON_COMMIT = "on_commit"
+MODO_OUTBOX = "outbox"
+MODOS_HISTORICO = (MODO_SINCRONO, MODO_ON_COMMIT, MODO_OUTBOX)
+
+TAMANHO_LOTE_HISTORICO = 1000
+
+_lote_atual = ContextVar("historico_em_lote", default=None)
+
+# HistoricalRecordsEmLote de cada model com histórico (ver HistoricoEmLote.criar).
+_historicos = {}
+_adiado_atual = ContextVar("historico_adiado", default=None)
+
+
+def modo_historico(model):
+    """
+    Retorna o modo de gravação do histórico do model: o definido em
+    settings.HISTORICO_MODOS para o label do model, o atributo modo_historico
+    do model ou settings.HISTORICO_MODO_PADRAO, nesta ordem.
+
+    Raises:
+        ImproperlyConfigured: Se o modo configurado for desconhecido
+    """
+    modo = getattr(settings, "HISTORICO_MODOS", {}).get(model._meta.label)
+    if modo is None:
+        modo = getattr(model, "modo_historico", None) or getattr(
+            settings, "HISTORICO_MODO_PADRAO", MODO_SINCRONO
+        )
+
+    if modo not in MODOS_HISTORICO:
+        raise ImproperlyConfigured(
+            f"Modo de histórico '{modo}' inválido para {model._meta.label} "
+            f"(use {', '.join(MODOS_HISTORICO)})."
+        )
+
+    return modo
+
+
+def serializar_registro(registro):
+    """
+    Converte um registro histórico não salvo nos valores gravados no outbox.
+    """
+    return {
+        campo.attname: getattr(registro, campo.attname)
+        for campo in registro._meta.concrete_fields
+        if not campo.primary_key
+    }
+
+
+def restaurar_registro(model, dados):
+    """
+    Reconstrói o registro histórico a partir dos valores do outbox.
+    """
+    return model(
+        **{
+            campo.attname: campo.to_python(dados[campo.attname])
+            for campo in model._meta.concrete_fields
+            if campo.attname in dados
+        }
+    )
+
+
+def _gravar_registros(registros_por_model, tamanho_lote):
+    total = 0
+
+    for (model, using), registros in registros_por_model.items():
+        model._default_manager.using(using).bulk_create(
+            registros, batch_size=tamanho_lote
+        )
+        total += len(registros)
+
+    registros_por_model.clear()
+
+    return total
+
+
+class HistoricalRecordsEmLote(HistoricalRecords):
+    """
+    HistoricalRecords que, dentro de um bloco HistoricoEmLote, acumula os
+    registros históricos em memória em vez de inseri-los um a um.
+
+    Fora de um lote, o registro é gravado conforme o modo_historico do model;
+    no modo sincrono o comportamento é idêntico ao do simple_history.
+    """
+
+    def finalize(self, sender, **kwargs):
+        super().finalize(sender, **kwargs)
+
+        if self.cls is sender or (self.inherit and issubclass(sender, self.cls)):
+            _historicos[sender] = self
+
+    def get_meta_options(self, model):
+        meta_fields = super().get_meta_options(model)
+
+        # Índice para localizar as versões de um objeto em ordem de data
+        # (ver Core.HistorySnapshot e Core.HistoryRetention).
+        meta_fields["indexes"] = (
+            *meta_fields.get("indexes", ()),
+            models.Index(fields=(model._meta.pk.attname, "history_date")),
+        )
+
+        return meta_fields
+
+    def montar_registro_historico(self, instance, history_type, using=None):
+        """
+        Monta a instância do model histórico sem salvá-la, com os mesmos
+        valores que o simple_history gravaria.
+        """
+        history_date = getattr(instance, "_history_date", timezone.now())
+        history_user = self.get_history_user(instance)
+        history_change_reason = self.get_change_reason_for_object(
+            instance, history_type, using
+        )
+        manager = getattr(instance, self.manager_name)
+
+        attrs = {}
+        for field in self.fields_included(instance):
+            attrs[field.attname] = getattr(instance, field.attname)
+
+        relation_field = getattr(manager.model, "history_relation", None)
+        if relation_field is not None:
+            attrs["history_relation"] = instance
+
+        return manager.model(
+            history_date=history_date,
+            history_type=history_type,
+            history_user=history_user,
+            history_change_reason=history_change_reason,
+            **attrs,
+        )
+
+    def create_historical_record(self, instance, history_type, using=None):
+        lote = _lote_atual.get()
+        modo = modo_historico(type(instance))
+        if lote is None and modo == MODO_SINCRONO:
+            return super().create_historical_record(instance, history_type, using)
+
+        using = using if self.use_base_model_db else None
+        registro = self.montar_registro_historico(instance, history_type, using)
+
+        if lote is not None:
+            lote.adicionar(registro, using)
+        elif modo == MODO_ON_COMMIT:
+            # Registrado com on_commit para ser descartado junto com a
+            # transação (ou savepoint) em caso de rollback.
+            transaction.on_commit(
+                partial(HistoricoAdiado.receber, registro, using), using=using
+            )
+        else:
+            HistoricoPendente.objects.using(using).create(
+                modelo=registro._meta.label, dados=serializar_registro(registro)
+            )
+
+
+class HistoricoEmLote:
+    """
+    Context manager que adia a gravação do histórico durante escritas em
+    lote, inserindo os registros históricos com um bulk_create por model ao
+    final do bloco, na mesma transação das escritas.
+
+    Os sinais pre/post_create_historical_record não são disparados para os
+    registros gravados em lote. Blocos aninhados são absorvidos pelo bloco
+    mais externo.
+
+    Receptores de post_save/post_delete podem adiar, com adiar(), tarefas
+    que bastam uma vez por lote (ex.: invalidar caches), executadas uma única
+    vez após o commit em vez de a cada registro.
+
+    Exemplo:
+        with HistoricoEmLote(motivo="Sincronização IBGE"):
+            for cidade in cidades:
+                cidade.save()
+    """
+
+    def __init__(self, motivo=None, using=None, tamanho_lote=TAMANHO_LOTE_HISTORICO):
+        self.motivo = motivo
+        self.using = using
+        self.tamanho_lote = tamanho_lote
+        self._registros = defaultdict(list)
+        self._adiadas = {}
+        self._atomic = None
+        self._token = None
+
+    @staticmethod
+    def atual():
+        """
+        Retorna o lote em andamento no contexto atual, ou None.
+        """
+        return _lote_atual.get()
+
+    def adiar(self, funcao, *args):
+        """
+        Agenda funcao(*args) para depois do commit do lote; chamadas repetidas
+        com a mesma função e os mesmos argumentos são executadas uma vez.
+        """
+        self._adiadas[(funcao, args)] = None
+
+    def adicionar(self, registro, using=None):
+        if registro.history_change_reason is None:
+            registro.history_change_reason = self.motivo
+
+        self._registros[(type(registro), using)].append(registro)
+
+    def criar(self, model, objetos):
+        """
+        Insere os objetos com bulk_create e acumula no lote os seus registros
+        históricos de criação, como os de save() dentro do bloco. Os sinais
+        post_save não são disparados.
+
+        Returns:
+            Lista dos objetos criados, com as chaves primárias
+        """
+        objetos = model._default_manager.using(self.using).bulk_create(
+            objetos, batch_size=self.tamanho_lote
+        )
+
+        historico = _historicos[model]
+        using = self.using if historico.use_base_model_db else None
+        for objeto in objetos:
+            self.adicionar(
+                historico.montar_registro_historico(objeto, "+", using), using
+            )
+
+        return objetos
+
+    def gravar(self):
+        """
+        Grava os registros históricos acumulados até o momento.
+
+        Returns:
+            Quantidade de registros históricos gravados
+        """
+        return _gravar_registros(self._registros, self.tamanho_lote)
+
+    def __enter__(self):
+        lote_externo = _lote_atual.get()
+        if lote_externo is not None:
+            return lote_externo
+
+        self._atomic = transaction.atomic(using=self.using)
+        self._atomic.__enter__()
+        self._token = _lote_atual.set(self)
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._token is None:
+            return False
+
+        _lote_atual.reset(self._token)
+        self._token = None
+
+        if exc_type is None:
+            try:
+                self.gravar()
+            except Exception:
+                self._atomic.__exit__(*sys.exc_info())
+                raise
+
+            for funcao, args in self._adiadas:
+                transaction.on_commit(partial(funcao, *args), using=self.using)
+        else:
+            self._registros.clear()
+
+        self._adiadas.clear()
+
+        return self._atomic.__exit__(exc_type, exc_value, traceback)
+
+
+class HistoricoAdiado:
+    """
+    Context manager que acumula os registros históricos dos models em modo
+    on_commit confirmados durante o bloco e os grava com um bulk_create por
+    model ao final dele. Registros confirmados fora de um bloco são gravados
+    imediatamente.
+
+    Blocos aninhados são absorvidos pelo bloco mais externo. Também pode ser
+    usado com `async with`; a gravação, nesse caso, roda em uma thread.
+    """
+
+    def __init__(self, tamanho_lote=TAMANHO_LOTE_HISTORICO):
+        self.tamanho_lote = tamanho_lote
+        self._registros = defaultdict(list)
+        self._token = None
+
+    @staticmethod
+    def receber(registro, using=None):
+        """
+        Recebe um registro cuja alteração já foi confirmada no banco.
+        """
+        adiado = _adiado_atual.get()
+        if adiado is None:
+            type(registro)._default_manager.using(using).bulk_create([registro])
+        else:
+            adiado._registros[(type(registro), using)].append(registro)
+
+    def gravar(self):
+        """
+        Grava os registros históricos acumulados até o momento.
+
+        Returns:
+            Quantidade de registros históricos gravados
+        """
+        return _gravar_registros(self._registros, self.tamanho_lote)
+
+    def __enter__(self):
+        adiado_externo = _adiado_atual.get()
+        if adiado_externo is not None:
+            return adiado_externo
+
+        self._token = _adiado_atual.set(self)
+
+        return self
+
+    def _sair(self):
+        # Retorna se este é o bloco mais externo, que grava o histórico. As
+        # alterações já foram confirmadas, então o histórico é gravado mesmo
+        # que o bloco tenha terminado com erro.
+        if self._token is None:
+            return False
+
+        _adiado_atual.reset(self._token)
+        self._token = None
+
+        return True
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._sair():
+            self.gravar()
+
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        if self._sair() and self._registros:
+            await sync_to_async(self.gravar)()
+
+        return False
+
+
+class HistoricoAdiadoMiddleware:
+    """
+    Envolve cada requisição em um HistoricoAdiado, para que o histórico dos
+    models em modo on_commit seja gravado em lote ao fim da requisição.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.assincrono = iscoroutinefunction(get_response)
+        if self.assincrono:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.assincrono:
+            return self.__acall__(request)
+
+        with HistoricoAdiado():
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        async with HistoricoAdiado():
+            return await self.get_response(request)
+
+
+def drenar_historico_pendente(tamanho_lote=TAMANHO_LOTE_HISTORICO, using=None):
+    """
+    Move um lote de registros do outbox (HistoricoPendente) para as tabelas
+    Historical*, na ordem em que foram gravados, com um bulk_create por model.
+
+    A inserção no histórico e a remoção do outbox ocorrem na mesma transação;
+    no PostgreSQL as linhas são travadas com SKIP LOCKED, permitindo vários
+    drenadores em paralelo.
+
+    Args:
+        tamanho_lote: Quantidade máxima de registros movidos
+        using: Alias do banco
+
+    Returns:
+        Quantidade de registros movidos
+    """
+    with transaction.atomic(using=using):
+        pendentes = list(
+            HistoricoPendente.objects.using(using)
+            .select_for_update(skip_locked=True)
+            .order_by("id")[:tamanho_lote]
+        )
+        if not pendentes:
+            return 0
+
+        registros = defaultdict(list)
+        for pendente in pendentes:
+            model = apps.get_model(pendente.modelo)
+            registros[(model, using)].append(restaurar_registro(model, pendente.dados))
+
+        _gravar_registros(registros, tamanho_lote)
+
+        HistoricoPendente.objects.using(using).filter(
+            id__in=[pendente.id for pendente in pendentes]
+        ).delete()
+
+    return len(pendentes)
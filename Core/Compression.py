@@ -0,0 +1,67 @@
+import gzip
+
+from django.http import HttpResponse
+from rest_framework import status
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def codificacoes_aceitas(accept_encoding):
+    aceitas = []
+
+    for item in accept_encoding.split(","):
+        codificacao, _, parametros = item.partition(";")
+        parametros = parametros.replace(" ", "")
+
+        try:
+            qualidade = float(parametros[2:]) if parametros.startswith("q=") else 1
+        except ValueError:
+            qualidade = 0
+
+        if codificacao.strip() and qualidade > 0:
+            aceitas.append(codificacao.strip().lower())
+
+    return aceitas
+
+
+def comprimir(conteudo):
+    """
+    Comprime o conteúdo uma única vez, com a compressão máxima, para ser
+    servido já comprimido: gzip e brotli (se disponível).
+
+    Returns:
+        Dict com os bytes de cada codificação, incluindo "identity"
+    """
+    arquivos = {
+        "identity": conteudo,
+        "gzip": gzip.compress(conteudo, compresslevel=9, mtime=0),
+    }
+    if brotli is not None:
+        arquivos["br"] = brotli.compress(conteudo, quality=11)
+
+    return arquivos
+
+
+def resposta_comprimida(request, etag, codificacao, dados, content_type, cache_control):
+    """
+    Resposta com um conteúdo já comprimido e o seu ETag: 304, sem corpo, se
+    o cliente já tiver a versão (If-None-Match).
+    """
+    if_none_match = request.headers.get("If-None-Match", "")
+    if if_none_match.strip() == "*" or etag in [
+        valor.strip() for valor in if_none_match.split(",")
+    ]:
+        response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = HttpResponse(dados, content_type=content_type)
+        if codificacao != "identity":
+            response["Content-Encoding"] = codificacao
+
+    response["ETag"] = etag
+    response["Cache-Control"] = cache_control
+    response["Vary"] = "Accept-Encoding"
+
+    return response
@@ -0,0 +1,117 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+from .DataVersions import incrementar_versao, obter_versao
+from .Metrics import registrar_cache
+
+# Acima desta quantidade estimada, a contagem exata (COUNT(*)) é trocada
+# pela estimativa do planejador do PostgreSQL.
+LIMITE_CONTAGEM_EXATA = getattr(settings, "PAGINACAO_LIMITE_CONTAGEM_EXATA", 10000)
+# Validade máxima de uma contagem em cache; alterações feitas sem sinais
+# (queryset.update, bulk_create) só aparecem depois dela.
+TTL_CONTAGEM = getattr(settings, "PAGINACAO_TTL_CONTAGEM", 300)
+
+
+def chave_versao_tabela(tabela):
+    return f"tabela:{tabela}"
+
+
+class ContagemEstimada:
+    """
+    Contagem de registros para a paginação: estimada pelo planejador do
+    PostgreSQL quando o resultado é grande e exata quando é pequeno, sempre
+    em cache pela assinatura da consulta e pela versão das tabelas envolvidas.
+    """
+
+    @staticmethod
+    def invalidar(*models):
+        """
+        Invalida as contagens em cache que envolvem as tabelas dos models.
+        """
+        for model in models:
+            incrementar_versao(chave_versao_tabela(model._meta.db_table))
+
+    @staticmethod
+    def _chave(queryset):
+        sql, params = queryset.query.sql_with_params()
+        tabelas = sorted(
+            {
+                alias.table_name
+                for alias in queryset.query.alias_map.values()
+                if getattr(alias, "table_name", None)
+            }
+        )
+        versoes = [obter_versao(chave_versao_tabela(tabela)) for tabela in tabelas]
+
+        assinatura = hashlib.md5(
+            f"{queryset.db}:{sql}:{params!r}:{versoes}".encode()
+        ).hexdigest()
+
+        return f"contagem:{assinatura}"
+
+    @staticmethod
+    def estimativa(queryset):
+        """
+        Retorna a quantidade de registros estimada pelo planejador, ou None
+        se o banco não for PostgreSQL ou não houver estatísticas.
+
+        Sem filtros, usa pg_class.reltuples da tabela; com filtros, a
+        quantidade de linhas prevista pelo EXPLAIN da consulta.
+        """
+        connection = connections[queryset.db]
+        if connection.vendor != "postgresql":
+            return None
+
+        query = queryset.query
+        with connection.cursor() as cursor:
+            if not query.where and len(query.alias_map) <= 1 and not query.distinct:
+                cursor.execute(
+                    "SELECT reltuples FROM pg_class WHERE oid = %s::regclass",
+                    [queryset.model._meta.db_table],
+                )
+                linha = cursor.fetchone()
+                estimativa = linha[0] if linha else -1
+            else:
+                sql, params = queryset.order_by().query.sql_with_params()
+                cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+                plano = cursor.fetchone()[0]
+                if isinstance(plano, str):
+                    plano = json.loads(plano)
+                estimativa = plano[0]["Plan"]["Plan Rows"]
+
+        # reltuples é -1 em tabelas que nunca passaram por ANALYZE.
+        return int(estimativa) if estimativa >= 0 else None
+
+    @staticmethod
+    def contar(queryset, limite_exata=LIMITE_CONTAGEM_EXATA):
+        """
+        Conta os registros do queryset.
+
+        Args:
+            queryset: Queryset já filtrado
+            limite_exata: Estimativas acima deste valor são devolvidas no
+                lugar do COUNT(*)
+
+        Returns:
+            Tupla (quantidade, exata)
+        """
+        chave = ContagemEstimada._chave(queryset)
+
+        contagem = cache.get(chave)
+        registrar_cache("contagens", contagem is not None)
+        if contagem is not None:
+            return tuple(contagem)
+
+        estimativa = ContagemEstimada.estimativa(queryset)
+        if estimativa is not None and estimativa > limite_exata:
+            contagem = (estimativa, False)
+        else:
+            contagem = (queryset.count(), True)
+
+        cache.set(chave, contagem, timeout=TTL_CONTAGEM)
+
+        return contagem
@@ -0,0 +1,51 @@
+import uuid
+
+from django.core.cache import caches
+
+ALIAS_CACHE_VERSOES = "versoes"
+
+
+def _cache():
+    return caches[ALIAS_CACHE_VERSOES]
+
+
+def obter_versao(chave):
+    """
+    Retorna o carimbo de versão atual dos dados identificados pela chave.
+
+    O carimbo fica no cache "versoes" (compartilhado entre os workers), e é
+    criado na primeira leitura caso ainda não exista.
+
+    Args:
+        chave: Identificador do conjunto de dados (ex.: "localidades")
+
+    Returns:
+        String com o carimbo de versão
+    """
+    versao = _cache().get(chave)
+
+    if versao is None:
+        _cache().add(chave, uuid.uuid4().hex, timeout=None)
+        versao = _cache().get(chave)
+
+    return versao
+
+
+def incrementar_versao(chave):
+    """
+    Gera um novo carimbo de versão para os dados identificados pela chave,
+    invalidando os caches que dependem dele.
+
+    Um carimbo aleatório é usado no lugar de um contador para que duas
+    invalidações concorrentes nunca resultem no mesmo valor.
+
+    Args:
+        chave: Identificador do conjunto de dados (ex.: "localidades")
+
+    Returns:
+        String com o novo carimbo de versão
+    """
+    versao = uuid.uuid4().hex
+    _cache().set(chave, versao, timeout=None)
+
+    return versao
@@ -0,0 +1,106 @@
+import os
+
+from django.conf import settings
+from django.core.checks import Warning
+
+try:
+    import psycopg_pool
+except ImportError:
+    psycopg_pool = None
+
+ENGINE_POSTGRESQL = "django.db.backends.postgresql"
+
+# Estatísticas cumulativas do psycopg_pool expostas pelo /metrics.
+ESTATISTICAS_POOL = (
+    "requests_num",
+    "requests_wait_ms",
+    "usage_ms",
+    "connections_num",
+    "connections_ms",
+)
+
+
+def configurar_conexoes(banco, threads, asgi=False):
+    """
+    Completa a configuração de um banco de DATABASES com o gerenciamento de
+    conexões definido pelas variáveis de ambiente:
+
+    - DB_POOL=1 (PostgreSQL com psycopg 3 e psycopg_pool instalados): pool
+      de conexões do Django por worker, com até `threads` conexões (uma por
+      thread do worker) e espera máxima de DB_POOL_TIMEOUT segundos;
+    - caso contrário, conexões persistentes: cada thread mantém sua conexão
+      por DB_CONN_MAX_AGE segundos (60 por padrão; 0 fecha ao fim de cada
+      requisição), verificada antes de ser reaproveitada após um erro ou
+      ociosidade.
+
+    Sob ASGI (`asgi`), o ORM de cada requisição roda em uma thread própria,
+    que termina com ela: sem o pool, as conexões são fechadas ao fim de cada
+    requisição, como recomenda o Django, em vez de ficarem presas a threads
+    encerradas.
+
+    Returns:
+        O próprio dict do banco
+    """
+    usar_pool = (
+        os.environ.get("DB_POOL") == "1"
+        and banco.get("ENGINE") == ENGINE_POSTGRESQL
+        and psycopg_pool is not None
+    )
+
+    banco["CONN_HEALTH_CHECKS"] = True
+    if usar_pool:
+        banco["CONN_MAX_AGE"] = 0
+        banco.setdefault("OPTIONS", {})["pool"] = {
+            "min_size": min(int(os.environ.get("DB_POOL_MIN", 1)), threads),
+            "max_size": threads,
+            "timeout": int(os.environ.get("DB_POOL_TIMEOUT", 10)),
+        }
+    elif asgi:
+        banco["CONN_MAX_AGE"] = 0
+    else:
+        banco["CONN_MAX_AGE"] = int(os.environ.get("DB_CONN_MAX_AGE", 60))
+
+    return banco
+
+
+def conexoes_necessarias():
+    """
+    Quantidade máxima de conexões que a aplicação pode manter abertas com
+    cada banco: uma por thread de cada worker do gunicorn.
+    """
+    return settings.GUNICORN_WORKERS * settings.GUNICORN_THREADS
+
+
+def estatisticas_pool(conexao):
+    """
+    Estatísticas cumulativas do pool do banco no processo, ou None se o
+    banco não usa pool.
+    """
+    pool = getattr(conexao, "pool", None)
+    if pool is None:
+        return None
+
+    estatisticas = pool.get_stats()
+    return {nome: estatisticas.get(nome, 0) for nome in ESTATISTICAS_POOL}
+
+
+def verificar_limite_conexoes(app_configs, **kwargs):
+    """
+    System check: avisa quando os workers e threads do gunicorn podem abrir
+    mais conexões do que DB_LIMITE_CONEXOES (as conexões que o servidor do
+    banco reserva para a aplicação).
+    """
+    limite = getattr(settings, "DB_LIMITE_CONEXOES", None)
+    if not limite or conexoes_necessarias() <= limite:
+        return []
+
+    return [
+        Warning(
+            f"{settings.GUNICORN_WORKERS} workers x {settings.GUNICORN_THREADS} "
+            f"threads podem abrir {conexoes_necessarias()} conexões com o banco, "
+            f"acima de DB_LIMITE_CONEXOES ({limite}).",
+            hint="Reduza GUNICORN_WORKERS/GUNICORN_THREADS ou aumente o "
+            "max_connections do banco.",
+            id="Core.W001",
+        )
+    ]
@@ -0,0 +1,109 @@
+import math
+
+RAIO_TERRA_KM = 6371.0088
+KM_POR_GRAU_LATITUDE = 111.32
+TAMANHO_CELULA_GRAUS = 0.5
+CELULAS_POR_LINHA = int(360 / TAMANHO_CELULA_GRAUS)
+
+
+def celula_grade(latitude, longitude):
+    """
+    Retorna o identificador da célula da grade regular (TAMANHO_CELULA_GRAUS
+    graus de lado) que contém o ponto.
+
+    Args:
+        latitude: Latitude em graus
+        longitude: Longitude em graus
+
+    Returns:
+        Inteiro identificando a célula, ou None se o ponto não tiver coordenadas
+    """
+    if latitude is None or longitude is None:
+        return None
+
+    linha = int((latitude + 90) // TAMANHO_CELULA_GRAUS)
+    coluna = int((longitude + 180) // TAMANHO_CELULA_GRAUS) % CELULAS_POR_LINHA
+
+    return linha * CELULAS_POR_LINHA + coluna
+
+
+def celulas_no_raio(latitude, longitude, raio_km):
+    """
+    Retorna as células da grade que cobrem o retângulo envolvente do círculo
+    de raio raio_km em torno do ponto.
+
+    Args:
+        latitude: Latitude do centro em graus
+        longitude: Longitude do centro em graus
+        raio_km: Raio em quilômetros
+
+    Returns:
+        Lista de identificadores de células
+    """
+    delta_latitude = raio_km / KM_POR_GRAU_LATITUDE
+    latitude_min = max(latitude - delta_latitude, -90)
+    latitude_max = min(latitude + delta_latitude, 90)
+
+    # A longitude "encolhe" com a latitude; usa a latitude mais distante do
+    # equador dentro do retângulo para não perder células.
+    cosseno = math.cos(math.radians(max(abs(latitude_min), abs(latitude_max))))
+    if cosseno < 1e-6:
+        longitude_min, longitude_max = -180, 180 - TAMANHO_CELULA_GRAUS
+    else:
+        delta_longitude = min(raio_km / (KM_POR_GRAU_LATITUDE * cosseno), 180)
+        longitude_min = longitude - delta_longitude
+        longitude_max = longitude + delta_longitude
+
+    linha_min = int((latitude_min + 90) // TAMANHO_CELULA_GRAUS)
+    linha_max = int((latitude_max + 90) // TAMANHO_CELULA_GRAUS)
+    coluna_min = int((longitude_min + 180) // TAMANHO_CELULA_GRAUS)
+    coluna_max = int((longitude_max + 180) // TAMANHO_CELULA_GRAUS)
+
+    colunas = {
+        coluna % CELULAS_POR_LINHA for coluna in range(coluna_min, coluna_max + 1)
+    }
+
+    return [
+        linha * CELULAS_POR_LINHA + coluna
+        for linha in range(linha_min, linha_max + 1)
+        for coluna in colunas
+    ]
+
+
+def distancias_haversine(latitude, longitude, pontos):
+    """
+    Calcula a distância em linha reta (haversine) do ponto de origem até cada
+    um dos pontos informados.
+
+    Args:
+        latitude: Latitude da origem em graus
+        longitude: Longitude da origem em graus
+        pontos: Iterável de tuplas (latitude, longitude) em graus
+
+    Returns:
+        Lista de distâncias em quilômetros, na mesma ordem dos pontos
+    """
+    latitude_origem = math.radians(latitude)
+    longitude_origem = math.radians(longitude)
+    cosseno_origem = math.cos(latitude_origem)
+    radians, sin, cos, asin, sqrt = (
+        math.radians,
+        math.sin,
+        math.cos,
+        math.asin,
+        math.sqrt,
+    )
+
+    distancias = []
+    for latitude_ponto, longitude_ponto in pontos:
+        latitude_ponto = radians(latitude_ponto)
+        seno_latitude = sin((latitude_ponto - latitude_origem) / 2)
+        seno_longitude = sin((radians(longitude_ponto) - longitude_origem) / 2)
+
+        a = (
+            seno_latitude * seno_latitude
+            + cosseno_origem * cos(latitude_ponto) * seno_longitude * seno_longitude
+        )
+        distancias.append(2 * RAIO_TERRA_KM * asin(min(1.0, sqrt(a))))
+
+    return distancias
@@ -0,0 +1,104 @@
+import gc
+import math
+import os
+
+RAIZ_CGROUP = "/sys/fs/cgroup"
+
+# Memória estimada de cada worker (Django, DRF e drf_spectacular carregados,
+# caches de localidades e de contagens), em MB.
+MEMORIA_POR_WORKER_MB = 128
+
+
+def _ler(caminho):
+    try:
+        with open(caminho) as arquivo:
+            return arquivo.read().strip()
+    except OSError:
+        return None
+
+
+def cpus_disponiveis(raiz_cgroup=RAIZ_CGROUP):
+    """
+    CPUs que o processo pode usar: as da afinidade, limitadas pela cota do
+    cgroup (v2 ou v1), como a definida por `docker run --cpus` ou pelo
+    limite de CPU do Kubernetes.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        cpus = len(os.sched_getaffinity(0))
+    else:
+        cpus = os.cpu_count() or 1
+
+    cota = None
+    cpu_max = _ler(os.path.join(raiz_cgroup, "cpu.max"))
+    if cpu_max:
+        limite, periodo = cpu_max.split()
+        if limite != "max":
+            cota = int(limite) / int(periodo)
+    else:
+        limite = _ler(os.path.join(raiz_cgroup, "cpu", "cpu.cfs_quota_us"))
+        periodo = _ler(os.path.join(raiz_cgroup, "cpu", "cpu.cfs_period_us"))
+        if limite and periodo and int(limite) > 0:
+            cota = int(limite) / int(periodo)
+
+    if cota is not None:
+        cpus = min(cpus, max(1, math.ceil(cota)))
+
+    return cpus
+
+
+def memoria_disponivel(raiz_cgroup=RAIZ_CGROUP):
+    """
+    Memória, em bytes, que o processo pode usar: o limite do cgroup (v2 ou
+    v1), se houver, ou a memória física da máquina.
+    """
+    fisica = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+
+    limite = _ler(os.path.join(raiz_cgroup, "memory.max")) or _ler(
+        os.path.join(raiz_cgroup, "memory", "memory.limit_in_bytes")
+    )
+    if limite and limite != "max":
+        # Sem limite, o cgroup v1 informa um valor próximo de 2**63.
+        return min(int(limite), fisica)
+
+    return fisica
+
+
+def dimensionar(cpus, memoria, asgi=False, memoria_por_worker=MEMORIA_POR_WORKER_MB):
+    """
+    Workers e threads do gunicorn para as CPUs e a memória disponíveis.
+
+    - WSGI: a concorrência recomendada pelo gunicorn, 2 x CPUs + 1, em
+      processos enquanto couberem na memória (reservando a parte do
+      processo master); o que faltar vira threads em cada worker;
+    - ASGI: um worker (um event loop) por CPU, limitado pela memória; as
+      requisições concorrentes são atendidas pelo event loop.
+
+    Returns:
+        Tupla (workers, threads)
+    """
+    cabem = max(1, memoria // (memoria_por_worker * 1024 * 1024) - 1)
+
+    if asgi:
+        return min(cpus, cabem), 1
+
+    concorrencia = 2 * cpus + 1
+    workers = min(concorrencia, cabem)
+    return workers, math.ceil(concorrencia / workers)
+
+
+def preaquecer():
+    """
+    Carrega no processo master (com preload_app) o que os workers só
+    carregariam na primeira requisição: o URLconf, com as views,
+    serializers e o drf_spectacular, e o esquema OpenAPI comprimido. Depois,
+    congela os objetos no coletor de lixo, para que as coletas dos workers
+    não escrevam nessas páginas, mantendo-as compartilhadas (copy-on-write)
+    entre os processos.
+    """
+    from django.urls import get_resolver
+
+    from .OpenAPI import carregar_esquema
+
+    get_resolver().url_patterns
+    carregar_esquema()
+    gc.freeze()
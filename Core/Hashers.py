@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+# Mínimo recomendado pela OWASP (2023) para PBKDF2-HMAC-SHA256; o padrão do
+# Django 5.2 é 1.000.000.
+ITERACOES_PBKDF2_PADRAO = 600_000
+
+
+class PBKDF2ConfiguravelPasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2-SHA256 com a quantidade de iterações definida em
+    settings.PASSWORD_PBKDF2_ITERACOES.
+
+    Usa o mesmo algoritmo ("pbkdf2_sha256") do hasher padrão do Django, então
+    verifica os hashes já existentes; quando a quantidade de iterações de um
+    hash difere da configurada, a senha é regravada no próximo login.
+    """
+
+    iterations = getattr(settings, "PASSWORD_PBKDF2_ITERACOES", ITERACOES_PBKDF2_PADRAO)
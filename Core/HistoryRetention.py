@@ -0,0 +1,263 @@
+import gzip
+import json
+import os
+from datetime import timedelta
+from typing import NamedTuple, Optional
+
+from django.apps import apps
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+# Quantidade de objetos (e não de registros históricos) processados por vez.
+TAMANHO_LOTE_PODA = 500
+# Limite de parâmetros por DELETE ... WHERE history_id IN (...).
+TAMANHO_LOTE_DELETE = 900
+
+
+class PoliticaRetencao(NamedTuple):
+    """
+    Política de retenção do histórico de um model. Um registro histórico é
+    removido apenas se não estiver entre as `versoes` mais recentes do seu
+    objeto e tiver mais de `dias` dias; None desconsidera o critério.
+    """
+
+    versoes: Optional[int] = None
+    dias: Optional[int] = None
+
+    @property
+    def vazia(self):
+        return self.versoes is None and self.dias is None
+
+
+class RetencaoHistorico:
+    """
+    Poda das tabelas Historical* (simple_history) conforme a política de
+    retenção de cada model, definida em settings.HISTORICO_RETENCAO
+    (ex.: {"localidades.Cidades": {"versoes": 5, "dias": 365}}).
+    """
+
+    @staticmethod
+    def models_com_historico():
+        """
+        Retorna os models com histórico, indexados pelo label.
+        """
+        return {
+            model._meta.label: model
+            for model in apps.get_models()
+            if getattr(model._meta, "simple_history_manager_attribute", None)
+        }
+
+    @staticmethod
+    def model_historico(model):
+        return getattr(model, model._meta.simple_history_manager_attribute).model
+
+    @staticmethod
+    def politica(model):
+        """
+        Retorna a PoliticaRetencao configurada para o model (vazia se não
+        houver).
+        """
+        configuracao = getattr(settings, "HISTORICO_RETENCAO", {}).get(
+            model._meta.label, {}
+        )
+
+        return PoliticaRetencao(
+            versoes=configuracao.get("versoes"), dias=configuracao.get("dias")
+        )
+
+    @staticmethod
+    def _candidatos(manager, pk, inicio, fim, politica, limite):
+        registros = manager.filter(**{f"{pk}__gte": inicio, f"{pk}__lte": fim})
+
+        if politica.versoes is not None:
+            # O ranking precisa considerar todas as versões do objeto, então
+            # o critério de data é aplicado depois, sobre o resultado.
+            registros = registros.annotate(
+                posicao=Window(
+                    RowNumber(),
+                    partition_by=[F(pk)],
+                    order_by=[F("history_date").desc(), F("history_id").desc()],
+                )
+            ).filter(posicao__gt=politica.versoes)
+        else:
+            registros = registros.filter(history_date__lt=limite)
+
+        return [
+            history_id
+            for history_id, history_date in registros.values_list(
+                "history_id", "history_date"
+            )
+            if limite is None or history_date < limite
+        ]
+
+    @staticmethod
+    def podar(
+        model,
+        politica,
+        tamanho_lote=TAMANHO_LOTE_PODA,
+        arquivo=None,
+        simular=False,
+        using=None,
+    ):
+        """
+        Remove os registros históricos do model fora da política de retenção.
+
+        Os objetos são percorridos em ordem de chave (usando o índice da
+        coluna do id na tabela histórica), tamanho_lote objetos por vez, e
+        cada lote é removido em uma transação curta.
+
+        Args:
+            model: Model com histórico
+            politica: PoliticaRetencao a aplicar
+            tamanho_lote: Quantidade de objetos por lote
+            arquivo: Caminho de um arquivo .ndjson.gz onde os registros
+                removidos são arquivados antes da remoção
+            simular: Se True, apenas conta os registros que seriam removidos
+            using: Alias do banco
+
+        Returns:
+            Quantidade de registros removidos (ou que seriam removidos)
+        """
+        if politica.vazia:
+            return 0
+
+        historico = RetencaoHistorico.model_historico(model)
+        manager = historico._default_manager.using(using)
+        pk = model._meta.pk.attname
+        limite = (
+            timezone.now() - timedelta(days=politica.dias)
+            if politica.dias is not None
+            else None
+        )
+
+        total = 0
+        ultimo = None
+        saida = gzip.open(arquivo, "at", encoding="utf-8") if arquivo else None
+
+        try:
+            while True:
+                objetos = manager.order_by(pk).values_list(pk, flat=True).distinct()
+                if ultimo is not None:
+                    objetos = objetos.filter(**{f"{pk}__gt": ultimo})
+                objetos = list(objetos[:tamanho_lote])
+                if not objetos:
+                    break
+                ultimo = objetos[-1]
+
+                candidatos = RetencaoHistorico._candidatos(
+                    manager,
+                    pk,
+                    objetos[0],
+                    ultimo,
+                    politica,
+                    limite,
+                )
+                total += len(candidatos)
+
+                if simular or not candidatos:
+                    continue
+
+                for inicio in range(0, len(candidatos), TAMANHO_LOTE_DELETE):
+                    ids = candidatos[inicio : inicio + TAMANHO_LOTE_DELETE]
+
+                    with transaction.atomic(using=using):
+                        if saida is not None:
+                            for registro in (
+                                manager.filter(history_id__in=ids)
+                                .order_by("history_id")
+                                .values()
+                            ):
+                                saida.write(
+                                    json.dumps(registro, cls=DjangoJSONEncoder) + "\n"
+                                )
+                            saida.flush()
+
+                        manager.filter(history_id__in=ids).delete()
+        finally:
+            if saida is not None:
+                saida.close()
+
+        return total
+
+    @staticmethod
+    def caminho_arquivo(diretorio, model):
+        """
+        Monta o caminho do arquivo de arquivamento do model, com a data e hora
+        da execução.
+        """
+        os.makedirs(diretorio, exist_ok=True)
+        carimbo = timezone.now().strftime("%Y%m%d%H%M%S")
+        return os.path.join(diretorio, f"{model._meta.label}-{carimbo}.ndjson.gz")
+
+    @staticmethod
+    def sql_particionamento(model, inicio, meses_futuros=12):
+        """
+        Gera o SQL (PostgreSQL) que converte a tabela histórica do model em
+        uma tabela particionada por intervalo mensal de history_date, com
+        partições de `inicio` até meses_futuros meses à frente e uma partição
+        padrão para as datas fora delas.
+
+        O SQL copia todos os registros e deve ser executado em uma janela de
+        manutenção. Com a tabela particionada, a chave primária passa a ser
+        (history_id, history_date).
+
+        Args:
+            model: Model com histórico
+            inicio: Data (date) a partir da qual criar as partições (ex.: a do
+                registro histórico mais antigo)
+            meses_futuros: Quantidade de meses à frente com partição criada
+
+        Returns:
+            Lista de comandos SQL
+        """
+        historico = RetencaoHistorico.model_historico(model)
+        tabela = historico._meta.db_table
+        antiga = f"{tabela}_antiga"
+
+        comandos = [
+            f'ALTER TABLE "{tabela}" RENAME TO "{antiga}"',
+            f'CREATE TABLE "{tabela}" (LIKE "{antiga}" INCLUDING DEFAULTS '
+            f"INCLUDING IDENTITY INCLUDING CONSTRAINTS) "
+            f"PARTITION BY RANGE (history_date)",
+            f'ALTER TABLE "{tabela}" ADD PRIMARY KEY (history_id, history_date)',
+            f'CREATE INDEX "{tabela}_id_idx" ON "{tabela}" '
+            f"({model._meta.pk.column}, history_date)",
+            f'CREATE INDEX "{tabela}_history_date_idx" ON "{tabela}" (history_date)',
+        ]
+
+        # LIKE não copia as chaves estrangeiras (ex.: history_user).
+        for campo in historico._meta.concrete_fields:
+            if campo.is_relation and campo.db_constraint:
+                destino = campo.target_field
+                comandos.append(
+                    f'ALTER TABLE "{tabela}" ADD FOREIGN KEY ("{campo.column}") '
+                    f'REFERENCES "{destino.model._meta.db_table}" ("{destino.column}") '
+                    f"DEFERRABLE INITIALLY DEFERRED"
+                )
+
+        hoje = timezone.now().date()
+        fim = hoje.year * 12 + hoje.month - 1 + meses_futuros
+        mes = inicio.year * 12 + inicio.month - 1
+        while mes <= fim:
+            ano, numero = divmod(mes, 12)
+            proximo_ano, proximo_numero = divmod(mes + 1, 12)
+            comandos.append(
+                f'CREATE TABLE "{tabela}_p{ano}{numero + 1:02d}" PARTITION OF '
+                f"\"{tabela}\" FOR VALUES FROM ('{ano}-{numero + 1:02d}-01') "
+                f"TO ('{proximo_ano}-{proximo_numero + 1:02d}-01')"
+            )
+            mes += 1
+
+        comandos += [
+            f'CREATE TABLE "{tabela}_padrao" PARTITION OF "{tabela}" DEFAULT',
+            f'INSERT INTO "{tabela}" SELECT * FROM "{antiga}"',
+            f"SELECT setval(pg_get_serial_sequence('\"{tabela}\"', 'history_id'), "
+            f'COALESCE((SELECT MAX(history_id) FROM "{tabela}"), 1))',
+            f'DROP TABLE "{antiga}"',
+        ]
+
+        return comandos
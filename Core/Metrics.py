@@ -0,0 +1,440 @@
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+from .Database import ESTATISTICAS_POOL, estatisticas_pool
+
+# Limites (em segundos) dos buckets do histograma de duração das requisições.
+BUCKETS_DURACAO = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+ROTULOS_REQUISICAO = ("rota", "metodo", "status")
+ROTA_NAO_ENCONTRADA = "nao_encontrada"
+
+# Posições dos valores agregados de cada combinação de rótulos; os buckets
+# (não acumulados, com o +Inf no fim) vêm em seguida.
+QUANTIDADE, DURACAO, CONSULTAS_DB, DURACAO_DB, BYTES = range(5)
+INICIO_BUCKETS = 5
+
+PREFIXO_ARQUIVO = "metricas-"
+# Métricas somadas dos workers já encerrados (MetricasProcesso.consolidar).
+ARQUIVO_ENCERRADOS = f"{PREFIXO_ARQUIVO}encerrados.json"
+
+
+def diretorio_metricas():
+    """
+    Diretório compartilhado pelos workers onde cada processo grava suas
+    métricas (settings.METRICAS_DIR); None mantém as métricas apenas em
+    memória, por processo.
+    """
+    return getattr(settings, "METRICAS_DIR", None)
+
+
+class MedicaoConsultas:
+    """
+    execute_wrapper que conta as consultas ao banco feitas durante uma
+    requisição e soma o tempo gasto nelas.
+    """
+
+    __slots__ = ("quantidade", "duracao")
+
+    def __init__(self):
+        self.quantidade = 0
+        self.duracao = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duracao += time.perf_counter() - inicio
+            self.quantidade += 1
+
+
+class MetricasProcesso:
+    """
+    Agregados das métricas do processo: por rota, método e status, a
+    quantidade de requisições, o histograma de duração, consultas e tempo de
+    banco e bytes das respostas; por cache, os acertos e falhas; e, por
+    banco, as conexões abertas e as estatísticas do pool, se houver.
+
+    Cada registro adquire um lock sem disputa (um worker atende uma
+    requisição por vez) apenas para somar os valores. Com METRICAS_DIR
+    definido, o processo grava seus agregados em um arquivo próprio do
+    diretório a cada METRICAS_INTERVALO_GRAVACAO segundos, e o endpoint de
+    métricas soma os arquivos de todos os workers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._zerar()
+
+    def _zerar(self):
+        self.pid = os.getpid()
+        self.requisicoes = {}
+        self.caches = {}
+        self.conexoes = {}
+        self._ultima_gravacao = time.monotonic()
+
+    def _verificar_processo(self):
+        # Após um fork (ex.: gunicorn com preload), o processo filho começa
+        # com os agregados zerados, e não com os do processo pai.
+        if self.pid != os.getpid():
+            self._zerar()
+
+    def registrar_requisicao(self, rotulos, duracao, consultas, duracao_db, tamanho):
+        bucket = INICIO_BUCKETS + bisect_left(BUCKETS_DURACAO, duracao)
+
+        with self._lock:
+            self._verificar_processo()
+
+            valores = self.requisicoes.get(rotulos)
+            if valores is None:
+                valores = self.requisicoes[rotulos] = [0] * (
+                    INICIO_BUCKETS + len(BUCKETS_DURACAO) + 1
+                )
+
+            valores[QUANTIDADE] += 1
+            valores[DURACAO] += duracao
+            valores[CONSULTAS_DB] += consultas
+            valores[DURACAO_DB] += duracao_db
+            valores[BYTES] += tamanho
+            valores[bucket] += 1
+
+    def registrar_cache(self, nome, acerto):
+        chave = (nome, "acerto" if acerto else "falha")
+
+        with self._lock:
+            self._verificar_processo()
+            self.caches[chave] = self.caches.get(chave, 0) + 1
+
+    def registrar_conexao(self, alias):
+        with self._lock:
+            self._verificar_processo()
+            self.conexoes[alias] = self.conexoes.get(alias, 0) + 1
+
+    def instantaneo(self):
+        """
+        Retorna uma cópia serializável (JSON) dos agregados.
+        """
+        pools = {}
+        for conexao in connections.all():
+            estatisticas = estatisticas_pool(conexao)
+            if estatisticas is not None:
+                pools[conexao.alias] = estatisticas
+
+        with self._lock:
+            self._verificar_processo()
+            return self._serializar(self.requisicoes, self.caches, self.conexoes, pools)
+
+    @staticmethod
+    def _serializar(requisicoes, caches, conexoes, pools):
+        return {
+            "requisicoes": [
+                [list(rotulos), list(valores)]
+                for rotulos, valores in requisicoes.items()
+            ],
+            "caches": [
+                [list(chave), quantidade] for chave, quantidade in caches.items()
+            ],
+            "conexoes": dict(conexoes),
+            "pools": pools,
+        }
+
+    def caminho_arquivo(self, diretorio):
+        return os.path.join(diretorio, f"{PREFIXO_ARQUIVO}{os.getpid()}.json")
+
+    def gravar(self):
+        """
+        Grava os agregados no arquivo do processo em METRICAS_DIR (de forma
+        atômica, com rename).
+        """
+        diretorio = diretorio_metricas()
+        # Processos que não atenderam requisições (ex.: o master do gunicorn)
+        # não deixam arquivo.
+        if not diretorio or not (self.requisicoes or self.caches or self.conexoes):
+            return
+
+        self._ultima_gravacao = time.monotonic()
+
+        os.makedirs(diretorio, exist_ok=True)
+        caminho = self.caminho_arquivo(diretorio)
+        temporario = f"{caminho}.tmp"
+        with open(temporario, "w") as arquivo:
+            json.dump(self.instantaneo(), arquivo)
+        os.replace(temporario, caminho)
+
+    def gravar_se_necessario(self):
+        intervalo = getattr(settings, "METRICAS_INTERVALO_GRAVACAO", 5)
+
+        if time.monotonic() - self._ultima_gravacao >= intervalo:
+            self.gravar()
+
+    def coletar(self):
+        """
+        Soma os agregados de todos os workers: os do próprio processo, em
+        memória, e os gravados pelos demais em METRICAS_DIR. As métricas de
+        workers encerrados continuam somadas (ver consolidar), para que os
+        contadores não diminuam.
+
+        Returns:
+            Tupla (requisicoes, caches, conexoes, pools), dicts no formato dos
+            agregados
+        """
+        instantaneos = [self.instantaneo()]
+
+        diretorio = diretorio_metricas()
+        if diretorio:
+            proprio = self.caminho_arquivo(diretorio)
+            for caminho in glob.glob(
+                os.path.join(diretorio, f"{PREFIXO_ARQUIVO}*.json")
+            ):
+                if caminho == proprio:
+                    continue
+                try:
+                    with open(caminho) as arquivo:
+                        instantaneos.append(json.load(arquivo))
+                except (OSError, ValueError):
+                    continue
+
+        return self._somar(instantaneos)
+
+    def consolidar(self, pid):
+        """
+        Soma o arquivo de métricas do worker `pid`, já encerrado, ao dos
+        workers encerrados anteriormente e o remove, para que o diretório não
+        acumule um arquivo por worker reciclado. Chamado pelo processo master
+        do gunicorn, um worker por vez.
+        """
+        diretorio = diretorio_metricas()
+        if not diretorio:
+            return
+
+        caminho = os.path.join(diretorio, f"{PREFIXO_ARQUIVO}{pid}.json")
+        if not os.path.exists(caminho):
+            return
+
+        encerrados = os.path.join(diretorio, ARQUIVO_ENCERRADOS)
+        instantaneos = []
+        for arquivo_metricas in (encerrados, caminho):
+            try:
+                with open(arquivo_metricas) as arquivo:
+                    instantaneos.append(json.load(arquivo))
+            except (OSError, ValueError):
+                continue
+
+        temporario = f"{encerrados}.tmp"
+        with open(temporario, "w") as arquivo:
+            json.dump(self._serializar(*self._somar(instantaneos)), arquivo)
+        os.replace(temporario, encerrados)
+        os.remove(caminho)
+
+    @staticmethod
+    def _somar(instantaneos):
+        requisicoes, caches, conexoes, pools = {}, {}, {}, {}
+        for instantaneo in instantaneos:
+            for rotulos, valores in instantaneo["requisicoes"]:
+                soma = requisicoes.setdefault(tuple(rotulos), [0] * len(valores))
+                for indice, valor in enumerate(valores):
+                    soma[indice] += valor
+            for chave, quantidade in instantaneo["caches"]:
+                caches[tuple(chave)] = caches.get(tuple(chave), 0) + quantidade
+            for alias, quantidade in instantaneo.get("conexoes", {}).items():
+                conexoes[alias] = conexoes.get(alias, 0) + quantidade
+            for alias, estatisticas in instantaneo.get("pools", {}).items():
+                soma = pools.setdefault(alias, dict.fromkeys(ESTATISTICAS_POOL, 0))
+                for nome in ESTATISTICAS_POOL:
+                    soma[nome] += estatisticas.get(nome, 0)
+
+        return requisicoes, caches, conexoes, pools
+
+
+METRICAS = MetricasProcesso()
+atexit.register(METRICAS.gravar)
+
+
+def registrar_cache(nome, acerto):
+    """
+    Registra um acerto ou uma falha de leitura em um dos caches da aplicação
+    (ex.: "contagens", "login_negativo").
+    """
+    METRICAS.registrar_cache(nome, acerto)
+
+
+def registrar_conexao_criada(sender, connection, **kwargs):
+    """
+    Receptor do sinal connection_created: conta as conexões abertas com cada
+    banco (com pool, as conexões retiradas do pool).
+    """
+    METRICAS.registrar_conexao(connection.alias)
+
+
+def _rotulos_prometheus(nomes, valores):
+    return ",".join(
+        '{}="{}"'.format(nome, str(valor).replace("\\", "\\\\").replace('"', '\\"'))
+        for nome, valor in zip(nomes, valores)
+    )
+
+
+# Estatísticas do pool: nome da métrica, divisor (ms para segundos) e descrição.
+METRICAS_POOL = {
+    "requests_num": ("db_pool_requisicoes_total", 1, "Conexões pedidas ao pool."),
+    "requests_wait_ms": (
+        "db_pool_espera_segundos_total",
+        1000,
+        "Tempo de espera por uma conexão do pool.",
+    ),
+    "usage_ms": (
+        "db_pool_uso_segundos_total",
+        1000,
+        "Tempo em que as conexões do pool estiveram em uso.",
+    ),
+    "connections_num": (
+        "db_pool_conexoes_abertas_total",
+        1,
+        "Conexões abertas pelo pool com o banco.",
+    ),
+    "connections_ms": (
+        "db_pool_conexao_segundos_total",
+        1000,
+        "Tempo gasto pelo pool abrindo conexões.",
+    ),
+}
+
+
+def formatar_prometheus(requisicoes, caches, conexoes=None, pools=None):
+    """
+    Formata os agregados no formato texto de exposição do Prometheus
+    (versão 0.0.4).
+    """
+    linhas = [
+        "# HELP http_requisicao_duracao_segundos Duração das requisições.",
+        "# TYPE http_requisicao_duracao_segundos histogram",
+    ]
+    for rotulos, valores in sorted(requisicoes.items()):
+        base = _rotulos_prometheus(ROTULOS_REQUISICAO, rotulos)
+        acumulado = 0
+        for limite, quantidade in zip(
+            BUCKETS_DURACAO + ("+Inf",), valores[INICIO_BUCKETS:]
+        ):
+            acumulado += quantidade
+            linhas.append(
+                f'http_requisicao_duracao_segundos_bucket{{{base},le="{limite}"}} '
+                f"{acumulado}"
+            )
+        linhas.append(
+            f"http_requisicao_duracao_segundos_sum{{{base}}} {valores[DURACAO]}"
+        )
+        linhas.append(
+            f"http_requisicao_duracao_segundos_count{{{base}}} {valores[QUANTIDADE]}"
+        )
+
+    for nome, indice, descricao in (
+        ("http_requisicao_consultas_db_total", CONSULTAS_DB, "Consultas ao banco."),
+        ("http_requisicao_db_segundos_total", DURACAO_DB, "Tempo gasto no banco."),
+        ("http_resposta_bytes_total", BYTES, "Bytes das respostas."),
+    ):
+        linhas += [f"# HELP {nome} {descricao}", f"# TYPE {nome} counter"]
+        for rotulos, valores in sorted(requisicoes.items()):
+            base = _rotulos_prometheus(ROTULOS_REQUISICAO, rotulos)
+            linhas.append(f"{nome}{{{base}}} {valores[indice]}")
+
+    linhas += [
+        "# HELP cache_leituras_total Leituras dos caches da aplicação.",
+        "# TYPE cache_leituras_total counter",
+    ]
+    for chave, quantidade in sorted(caches.items()):
+        base = _rotulos_prometheus(("cache", "resultado"), chave)
+        linhas.append(f"cache_leituras_total{{{base}}} {quantidade}")
+
+    linhas += [
+        "# HELP db_conexoes_total Conexões obtidas com o banco.",
+        "# TYPE db_conexoes_total counter",
+    ]
+    for alias, quantidade in sorted((conexoes or {}).items()):
+        base = _rotulos_prometheus(("banco",), (alias,))
+        linhas.append(f"db_conexoes_total{{{base}}} {quantidade}")
+
+    if pools:
+        for chave, (nome, divisor, descricao) in METRICAS_POOL.items():
+            linhas += [f"# HELP {nome} {descricao}", f"# TYPE {nome} counter"]
+            for alias, estatisticas in sorted(pools.items()):
+                base = _rotulos_prometheus(("banco",), (alias,))
+                linhas.append(f"{nome}{{{base}}} {estatisticas[chave] / divisor}")
+
+    return "\n".join(linhas) + "\n"
+
+
+class MetricasMiddleware:
+    """
+    Mede cada requisição (duração, consultas e tempo de banco, bytes da
+    resposta) e registra nos agregados do processo, rotulada pelo nome da
+    rota (ex.: "fazendas-list"), método e status.
+
+    Deve ser o primeiro middleware, para medir também os demais.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.assincrono = iscoroutinefunction(get_response)
+        if self.assincrono:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.assincrono:
+            return self.__acall__(request)
+
+        medicao = MedicaoConsultas()
+        inicio = time.perf_counter()
+
+        with self._medir_consultas(medicao):
+            response = self.get_response(request)
+
+        self._registrar(request, response, time.perf_counter() - inicio, medicao)
+
+        return response
+
+    async def __acall__(self, request):
+        # As consultas do ORM async rodam em threads, mas com as mesmas
+        # conexões (por contexto) em que o execute_wrapper é instalado.
+        medicao = MedicaoConsultas()
+        inicio = time.perf_counter()
+
+        with self._medir_consultas(medicao):
+            response = await self.get_response(request)
+
+        self._registrar(request, response, time.perf_counter() - inicio, medicao)
+
+        return response
+
+    @staticmethod
+    def _medir_consultas(medicao):
+        pilha = ExitStack()
+        for conexao in connections.all():
+            pilha.enter_context(conexao.execute_wrapper(medicao))
+
+        return pilha
+
+    @staticmethod
+    def _registrar(request, response, duracao, medicao):
+        resolver_match = request.resolver_match
+        rota = resolver_match.view_name if resolver_match else ROTA_NAO_ENCONTRADA
+
+        METRICAS.registrar_requisicao(
+            (rota, request.method, str(response.status_code)),
+            duracao,
+            medicao.quantidade,
+            medicao.duracao,
+            int(response.get("Content-Length") or 0),
+        )
+        METRICAS.gravar_se_necessario()
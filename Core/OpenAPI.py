@@ -0,0 +1,127 @@
+import contextlib
+import functools
+import hashlib
+import json
+from pathlib import Path
+
+import yaml
+
+from .Compression import comprimir
+
+# Esquema OpenAPI gerado pelo comando gerar_esquema_openapi e versionado no
+# repositório; publicado também pelo collectstatic (em openapi/schema.yaml).
+CAMINHO_ESQUEMA = Path(__file__).resolve().parent / "static" / "openapi" / "schema.yaml"
+
+CONTENT_TYPES_ESQUEMA = {
+    "yaml": "application/vnd.oai.openapi; charset=utf-8",
+    "json": "application/vnd.oai.openapi+json; charset=utf-8",
+}
+
+
+@contextlib.contextmanager
+def faixas_inteiros_padrao():
+    """
+    Faz os campos inteiros dos models usarem, enquanto ativo, as faixas padrão
+    do Django (as mesmas do PostgreSQL) em vez das do banco configurado: no
+    SQLite, por exemplo, todo IntegerField aceitaria 64 bits, e o esquema
+    gerado dependeria do banco de quem o gerou.
+
+    Os validadores de faixa são memorizados em cada campo na primeira
+    leitura; por isso são descartados ao entrar e ao sair.
+    """
+    from django.apps import apps
+    from django.db import connection
+    from django.db.backends.base.operations import BaseDatabaseOperations
+    from django.db.models import IntegerField
+
+    campos = [
+        campo
+        for model in apps.get_models()
+        for campo in model._meta.fields
+        if isinstance(campo, IntegerField)
+    ]
+
+    def descartar_validadores():
+        for campo in campos:
+            campo.__dict__.pop("validators", None)
+
+    descartar_validadores()
+    connection.ops.integer_field_range = functools.partial(
+        BaseDatabaseOperations.integer_field_range, connection.ops
+    )
+    try:
+        yield
+    finally:
+        del connection.ops.integer_field_range
+        descartar_validadores()
+
+
+def gerar_esquema():
+    """
+    Gera o esquema OpenAPI da API, em YAML, percorrendo as views e os
+    serializers com o drf_spectacular (como o SpectacularAPIView fazia a
+    cada requisição). O resultado não depende do banco configurado.
+
+    Returns:
+        Bytes do esquema
+    """
+    from drf_spectacular.drainage import GENERATOR_STATS
+    from drf_spectacular.renderers import OpenApiYamlRenderer
+    from drf_spectacular.settings import spectacular_settings
+
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    with GENERATOR_STATS.silence(), faixas_inteiros_padrao():
+        esquema = generator.get_schema(request=None, public=True)
+
+    return OpenApiYamlRenderer().render(esquema, renderer_context={})
+
+
+@functools.cache
+def carregar_esquema(formato="yaml"):
+    """
+    Lê o esquema versionado e o prepara para ser servido, uma única vez por
+    processo (no master, com o preload_app do gunicorn).
+
+    Args:
+        formato: "yaml" ou "json"
+
+    Returns:
+        Dict com o ETag e o conteúdo de cada codificação
+    """
+    conteudo = CAMINHO_ESQUEMA.read_bytes()
+    if formato == "json":
+        conteudo = json.dumps(
+            yaml.safe_load(conteudo), ensure_ascii=False, indent=4
+        ).encode()
+
+    return {
+        "etag": hashlib.sha256(conteudo).hexdigest()[:32],
+        "arquivos": comprimir(conteudo),
+    }
+
+
+def obter_esquema(formato="yaml", codificacoes_aceitas=()):
+    """
+    Retorna o esquema pronto para ser servido, na melhor codificação aceita
+    pelo cliente.
+
+    Returns:
+        Tupla (etag, codificacao, dados)
+    """
+    artefato = carregar_esquema(formato)
+
+    codificacao = next(
+        (
+            codificacao
+            for codificacao in ("br", "gzip")
+            if codificacao in artefato["arquivos"]
+            and codificacao in codificacoes_aceitas
+        ),
+        "identity",
+    )
+
+    etag = artefato["etag"]
+    if codificacao != "identity":
+        etag = f"{etag}-{codificacao}"
+
+    return f'"{etag}"', codificacao, artefato["arquivos"][codificacao]
@@ -0,0 +1,92 @@
+from django.contrib.auth.models import AnonymousUser
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Q
+
+
+class PoliticaDono:
+    """
+    Política de propriedade dos registros: cada model declara em
+    `caminho_dono` o lookup do ORM até o usuário dono do registro
+    (ex.: "safra__fazenda__produtor__usuario"), e as verificações de
+    propriedade viram um filtro no banco em vez de carregar a cadeia de
+    FKs objeto a objeto.
+    """
+
+    @staticmethod
+    def caminho(model):
+        caminho = getattr(model, "caminho_dono", None)
+
+        if caminho is None:
+            raise ImproperlyConfigured(
+                f"O model {model.__name__} não declara caminho_dono."
+            )
+
+        return caminho
+
+    @staticmethod
+    def possui_caminho(model):
+        return getattr(model, "caminho_dono", None) is not None
+
+    @staticmethod
+    def filtro(model, usuario):
+        """
+        Retorna o filtro que seleciona os registros do model pertencentes ao
+        usuário.
+        """
+        return Q(**{PoliticaDono.caminho(model): usuario.pk})
+
+    @staticmethod
+    def visiveis(queryset, usuario):
+        """
+        Restringe o queryset aos registros que o usuário pode ver: todos para
+        administradores e apenas os próprios para os demais usuários.
+
+        Args:
+            queryset: Queryset do model com caminho_dono
+            usuario: Usuário da requisição
+
+        Returns:
+            Queryset filtrado
+        """
+        if isinstance(usuario, AnonymousUser):
+            return queryset.none()
+
+        if usuario.is_admin:
+            return queryset
+
+        return queryset.filter(PoliticaDono.filtro(queryset.model, usuario))
+
+    @staticmethod
+    def eh_dono(obj, usuario):
+        """
+        Verifica, com uma única consulta, se o registro pertence ao usuário.
+
+        Args:
+            obj: Instância de um model com caminho_dono
+            usuario: Usuário da requisição
+
+        Returns:
+            True se o usuário for o dono do registro
+        """
+        if obj is None:
+            return False
+
+        return PoliticaDono.eh_dono_pk(type(obj), obj.pk, usuario)
+
+    @staticmethod
+    def eh_dono_pk(model, pk, usuario):
+        """
+        Verifica, com uma única consulta, se o registro de chave pk do model
+        pertence ao usuário.
+
+        Returns:
+            True se o registro existir e pertencer ao usuário
+        """
+        if isinstance(usuario, AnonymousUser) or pk is None:
+            return False
+
+        return (
+            model._default_manager.filter(PoliticaDono.filtro(model, usuario))
+            .filter(pk=pk)
+            .exists()
+        )
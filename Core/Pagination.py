@@ -0,0 +1,274 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from .Counting import ContagemEstimada
+
+TAMANHO_MAXIMO_PAGINA_CURSOR = 1000
+PREFIXO_ANOTACAO_CURSOR = "_cursor_"
+
+
+def ordenacao_cursor(queryset, view=None):
+    """
+    Retorna os campos que ordenam a paginação por cursor: o atributo
+    `ordenacao_cursor` da view ou o ordering do model, sempre terminando na
+    chave primária para que a ordem seja total.
+    """
+    ordenacao = getattr(view, "ordenacao_cursor", None)
+    if ordenacao is None:
+        ordenacao = queryset.query.order_by or queryset.model._meta.ordering
+
+    ordenacao = [campo for campo in ordenacao if isinstance(campo, str)]
+    if not any(campo.lstrip("-") in ("pk", "id") for campo in ordenacao):
+        ordenacao.append("id")
+
+    return tuple(ordenacao)
+
+
+def filtro_apos(ordenacao, valores):
+    """
+    Monta o filtro que seleciona os registros posteriores à posição `valores`
+    na ordenação (comparação lexicográfica, respeitando a direção de cada
+    campo): (a > x) OR (a = x AND b > y) OR ...
+    """
+    filtro = Q(pk__in=[])
+    iguais = Q()
+
+    for campo, valor in zip(ordenacao, valores):
+        nome = campo.lstrip("-")
+        operador = "lt" if campo.startswith("-") else "gt"
+
+        filtro |= iguais & Q(**{f"{nome}__{operador}": valor})
+        iguais &= Q(**{nome: valor})
+
+    return filtro
+
+
+def inverter(ordenacao):
+    return tuple(
+        campo[1:] if campo.startswith("-") else f"-{campo}" for campo in ordenacao
+    )
+
+
+class PaginacaoCursor(CursorPagination):
+    """
+    Paginação por chave (keyset) sobre vários campos de ordenação: cada
+    página filtra a partir dos valores do último registro da anterior, então
+    a página N custa o mesmo que a primeira e não há COUNT(*).
+
+    O cursor guarda os valores de todos os campos da ordenação (a
+    CursorPagination do DRF usa apenas o primeiro e resolve empates com
+    OFFSET). Campos de ordenação nulos não são suportados.
+    """
+
+    page_size_query_param = "limit"
+    max_page_size = TAMANHO_MAXIMO_PAGINA_CURSOR
+    invalid_cursor_message = "Cursor inválido."
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.ordering = ordenacao_cursor(queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            self.cursor = Cursor(offset=0, reverse=False, position=None)
+        reverse, posicao = self.cursor.reverse, self.cursor.position
+
+        ordenacao = inverter(self.ordering) if reverse else self.ordering
+        anotacoes = {
+            f"{PREFIXO_ANOTACAO_CURSOR}{indice}": F(campo.lstrip("-"))
+            for indice, campo in enumerate(self.ordering)
+        }
+        queryset = queryset.annotate(**anotacoes).order_by(*ordenacao)
+
+        if posicao is not None:
+            try:
+                valores = json.loads(posicao)
+            except ValueError:
+                raise NotFound(self.invalid_cursor_message)
+            if not isinstance(valores, list) or len(valores) != len(self.ordering):
+                raise NotFound(self.invalid_cursor_message)
+            queryset = queryset.filter(filtro_apos(ordenacao, valores))
+
+        resultados = list(queryset[: self.page_size + 1])
+        ha_seguinte = len(resultados) > self.page_size
+        self.page = resultados[: self.page_size]
+
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = posicao is not None, ha_seguinte
+        else:
+            self.has_next, self.has_previous = ha_seguinte, posicao is not None
+
+        return self.page
+
+    def posicao(self, registro):
+        chaves = [
+            f"{PREFIXO_ANOTACAO_CURSOR}{indice}" for indice in range(len(self.ordering))
+        ]
+
+        # Em querysets de values() o registro é um dict.
+        if isinstance(registro, dict):
+            valores = [registro[chave] for chave in chaves]
+        else:
+            valores = [getattr(registro, chave) for chave in chaves]
+
+        return json.dumps(valores, cls=DjangoJSONEncoder)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=False, position=self.posicao(self.page[-1]))
+        )
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=True, position=self.posicao(self.page[0]))
+        )
+
+    def get_html_context(self):
+        return {
+            "previous_url": self.get_previous_link(),
+            "next_url": self.get_next_link(),
+        }
+
+
+class PaginacaoPadrao(LimitOffsetPagination):
+    """
+    Paginação padrão da API: limit/offset, ou por cursor (PaginacaoCursor)
+    quando a requisição informa o parâmetro `cursor` (vazio na primeira
+    página).
+
+    No modo limit/offset o total vem de ContagemEstimada (em cache e, no
+    PostgreSQL, estimado para resultados grandes); o campo count_exato da
+    resposta indica se o count é exato.
+    """
+
+    cursor_query_param = "cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.paginacao_cursor = None
+
+        if self.cursor_query_param in request.query_params:
+            self.paginacao_cursor = PaginacaoCursor()
+            return self.paginacao_cursor.paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+
+        if self._posicionar(request, ContagemEstimada.contar(queryset)):
+            self.pagina = list(queryset[self.offset : self.offset + self.limit])
+        else:
+            self.pagina = []
+
+        return self.pagina
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        paginate_queryset das views async: a página é lida com o ORM async.
+        A contagem (que usa o cache e, no PostgreSQL, a estimativa do
+        planejador) e o modo cursor rodam em uma thread.
+        """
+        if self.cursor_query_param in request.query_params:
+            return await sync_to_async(self.paginate_queryset)(queryset, request, view)
+
+        self.paginacao_cursor = None
+        self.request = request
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+
+        contagem = await sync_to_async(ContagemEstimada.contar)(queryset)
+        if self._posicionar(request, contagem):
+            self.pagina = [
+                registro
+                async for registro in queryset[self.offset : self.offset + self.limit]
+            ]
+        else:
+            self.pagina = []
+
+        return self.pagina
+
+    def _posicionar(self, request, contagem):
+        # Retorna se há registros a ler a partir do offset.
+        self.count, self.count_exato = contagem
+        self.offset = self.get_offset(request)
+
+        if self.count > self.limit and self.template is not None:
+            self.display_page_controls = True
+
+        return not (self.count_exato and (self.count == 0 or self.offset > self.count))
+
+    def get_next_link(self):
+        if not self.count_exato:
+            # Com o total estimado, há próxima página enquanto as páginas
+            # vierem cheias.
+            if len(self.pagina) < self.limit:
+                return None
+            url = self.request.build_absolute_uri()
+            url = replace_query_param(url, self.limit_query_param, self.limit)
+            return replace_query_param(
+                url, self.offset_query_param, self.offset + self.limit
+            )
+
+        return super().get_next_link()
+
+    def get_paginated_response(self, data):
+        if self.paginacao_cursor is not None:
+            return self.paginacao_cursor.get_paginated_response(data)
+
+        return Response(
+            {
+                "count": self.count,
+                "count_exato": self.count_exato,
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        resposta = super().get_paginated_response_schema(schema)
+        resposta["properties"]["count_exato"] = {
+            "type": "boolean",
+            "description": (
+                "Indica se count é exato (False quando é uma estimativa do banco)."
+            ),
+        }
+        return resposta
+
+    def get_html_context(self):
+        if self.paginacao_cursor is not None:
+            return self.paginacao_cursor.get_html_context()
+
+        return super().get_html_context()
+
+    def get_schema_operation_parameters(self, view):
+        return super().get_schema_operation_parameters(view) + [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": (
+                    "Cursor da paginação por chave. Informe vazio para a "
+                    "primeira página e use os links next/previous da resposta; "
+                    "nesse modo a resposta não traz count."
+                ),
+                "schema": {"type": "string"},
+            }
+        ]
@@ -15,4 +15,7 @@ class EhMeuDadoOuSouAdmin(permissions.BasePermission):
         if isinstance(request.user, AnonymousUser):
             return False
 
+        if getattr(view, "queryset_restrito_ao_dono", False):
+            return True
+
         return view.get_dono_do_registro(obj) or request.user.is_admin
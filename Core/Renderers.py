@@ -0,0 +1,97 @@
+import io
+from decimal import Decimal
+
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Datas e horas passam pelo encoder do DRF (milissegundos e sufixo "Z"), e
+# chaves não-str são convertidas como no json da biblioteca padrão.
+OPCOES_ORJSON = (
+    orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS if orjson else 0
+)
+CODIFICACOES_UTF8 = ("utf-8", "utf8")
+
+
+class CodificadorJSON(JSONEncoder):
+    """
+    JSONEncoder do DRF que trata Decimal antes dos demais tipos: valores
+    Decimal soltos (ex.: áreas calculadas) são a maior parte do que chega ao
+    default(), e o encoder padrão só os reconhece depois de testar datas,
+    horas e intervalos. O resultado é o mesmo (float, como no DRF; os
+    DecimalField dos serializers já chegam como str).
+    """
+
+    def default(self, obj):
+        if type(obj) is Decimal:
+            return float(obj)
+
+        return super().default(obj)
+
+
+_codificador = CodificadorJSON()
+
+
+class RenderizadorJSON(JSONRenderer):
+    """
+    JSONRenderer que usa o orjson, quando instalado, e produz os mesmos bytes
+    do JSONRenderer do DRF no formato compacto das respostas da API.
+
+    Sem o orjson, com indentação (ex.: API navegável) ou com COMPACT_JSON ou
+    UNICODE_JSON desligados, usa o json da biblioteca padrão com o
+    CodificadorJSON. Diferenças conhecidas do orjson: floats em notação
+    científica (1e16 em vez de 1e+16) e NaN/Infinity, que viram null em vez
+    de erro.
+    """
+
+    encoder_class = CodificadorJSON
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            data is None
+            or orjson is None
+            or not self.compact
+            or self.ensure_ascii
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=_codificador.default, option=OPCOES_ORJSON)
+        except orjson.JSONEncodeError:
+            # Ex.: inteiros acima de 64 bits.
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Como no DRF: U+2028 e U+2029 escapados, para que o JSON seja um
+        # subconjunto estrito de JavaScript.
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
+
+
+class InterpretadorJSON(JSONParser):
+    """
+    JSONParser que usa o orjson, quando instalado, para corpos em UTF-8. Em
+    caso de erro (ou sem o orjson), o corpo é interpretado pelo JSONParser do
+    DRF, com as mesmas mensagens de erro.
+    """
+
+    renderer_class = RenderizadorJSON
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get("encoding", settings.DEFAULT_CHARSET)
+
+        if orjson is None or encoding.lower() not in CODIFICACOES_UTF8:
+            return super().parse(stream, media_type, parser_context)
+
+        dados = stream.read()
+        try:
+            return orjson.loads(dados)
+        except orjson.JSONDecodeError:
+            return super().parse(io.BytesIO(dados), media_type, parser_context)
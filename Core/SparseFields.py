@@ -0,0 +1,154 @@
+from django.core.exceptions import FieldDoesNotExist
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.serializers import ListSerializer
+
+PARAMETRO_CAMPOS = "fields"
+PARAMETRO_OMITIR = "omit"
+
+PARAMETROS_CAMPOS_ESPARSOS = [
+    OpenApiParameter(
+        name=PARAMETRO_CAMPOS,
+        description=(
+            "Campos a incluir na resposta, separados por vírgula "
+            "(ex.: id,nome). Campos calculados não pedidos não são calculados."
+        ),
+        required=False,
+        type=str,
+    ),
+    OpenApiParameter(
+        name=PARAMETRO_OMITIR,
+        description="Campos a omitir da resposta, separados por vírgula.",
+        required=False,
+        type=str,
+    ),
+]
+
+
+def _valores_parametro(request, parametro):
+    valor = request.query_params.get(parametro, "")
+    valores = {campo.strip() for campo in valor.split(",") if campo.strip()}
+
+    return valores or None
+
+
+def campos_selecionados(request, campos):
+    """
+    Retorna, na ordem original, os nomes de `campos` pedidos pela requisição
+    nos parâmetros ?fields= e ?omit=, ou None se a requisição não restringe
+    os campos. Nomes desconhecidos são ignorados e apenas requisições de
+    leitura são consideradas.
+    """
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+
+    incluir = _valores_parametro(request, PARAMETRO_CAMPOS)
+    omitir = _valores_parametro(request, PARAMETRO_OMITIR) or set()
+
+    if incluir is None and not omitir:
+        return None
+
+    return [
+        campo
+        for campo in campos
+        if (incluir is None or campo in incluir) and campo not in omitir
+    ]
+
+
+def otimizar_queryset(queryset, serializer_class, campos):
+    """
+    Ajusta o queryset ao que os campos do serializer precisam: select_related
+    e prefetch_related apenas das relações usadas e .only() nas colunas.
+
+    Campos que não são colunas do model declaram suas necessidades em
+    Meta.consultas_campos do serializer, com as chaves "only",
+    "select_related" e "prefetch_related" (ex.: {"fazenda_nome":
+    {"select_related": ["fazenda"], "only": ["fazenda__nome"]}}). Se algum
+    campo não for coluna nem estiver declarado, o .only() não é aplicado.
+    """
+    model = queryset.model
+    consultas = getattr(serializer_class.Meta, "consultas_campos", {})
+
+    colunas, select_related, prefetch_related = [], [], []
+    restringir_colunas = True
+
+    for campo in campos:
+        consulta = consultas.get(campo)
+
+        if consulta is None:
+            try:
+                restringir_colunas &= model._meta.get_field(campo).concrete
+            except FieldDoesNotExist:
+                restringir_colunas = False
+            colunas.append(campo)
+            continue
+
+        colunas += consulta.get("only", [])
+        select_related += consulta.get("select_related", [])
+        prefetch_related += consulta.get("prefetch_related", [])
+
+    for caminho in select_related:
+        # As FKs percorridas pelo select_related não podem ficar adiadas.
+        partes = caminho.split("__")
+        colunas += ["__".join(partes[: indice + 1]) for indice in range(len(partes))]
+
+    if select_related:
+        queryset = queryset.select_related(*dict.fromkeys(select_related))
+    if prefetch_related:
+        queryset = queryset.prefetch_related(*dict.fromkeys(prefetch_related))
+    if restringir_colunas:
+        queryset = queryset.only(*dict.fromkeys(colunas))
+
+    return queryset
+
+
+class CamposEsparsosSerializerMixin:
+    """
+    Serializer cujos campos podem ser escolhidos pelo cliente com
+    ?fields=id,nome ou ?omit=area_vegetacao. Os campos não selecionados são
+    removidos do serializer e, portanto, nem calculados.
+    """
+
+    def get_fields(self):
+        campos = super().get_fields()
+
+        # Apenas o serializer da resposta (ou o filho de uma listagem).
+        pai = self.parent
+        if pai is not None and not (
+            isinstance(pai, ListSerializer) and pai.parent is None
+        ):
+            return campos
+
+        selecionados = campos_selecionados(self.context.get("request"), campos)
+        if selecionados is None:
+            return campos
+
+        return {nome: campos[nome] for nome in selecionados}
+
+
+class CamposEsparsosViewSetMixin:
+    """
+    ViewSet que, nas ações de leitura, ajusta o queryset aos campos da
+    resposta (ver otimizar_queryset): uma listagem com ?fields=id,nome custa
+    uma única consulta com essas colunas.
+    """
+
+    acoes_campos_esparsos = ("list", "retrieve")
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+
+        if (
+            getattr(self, "request", None) is None
+            or self.action not in self.acoes_campos_esparsos
+        ):
+            return queryset
+
+        serializer_class = self.get_serializer_class()
+        campos = list(serializer_class.Meta.fields)
+
+        selecionados = campos_selecionados(self.request, campos)
+        if selecionados is None:
+            selecionados = campos
+
+        return otimizar_queryset(queryset, serializer_class, selecionados)
@@ -0,0 +1,21 @@
+import unicodedata
+
+
+def normalizar_texto(valor):
+    """
+    Normaliza um texto para buscas: remove acentos, converte para minúsculas
+    e colapsa espaços repetidos.
+
+    Args:
+        valor: Texto a ser normalizado
+
+    Returns:
+        Texto normalizado ("São  José" -> "sao jose")
+    """
+    if not valor:
+        return ""
+
+    decomposto = unicodedata.normalize("NFKD", str(valor))
+    sem_acentos = "".join(c for c in decomposto if not unicodedata.combining(c))
+
+    return " ".join(sem_acentos.casefold().split())
@@ -0,0 +1,145 @@
+import random
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+from inspect import iscoroutinefunction
+
+import sentry_sdk
+from django.conf import settings
+from sentry_sdk.transport import Transport
+
+OPERACAO_PADRAO = "funcao"
+
+
+@contextmanager
+def rastrear(nome, op=OPERACAO_PADRAO):
+    """
+    Span do Sentry com o nome e a operação informados, filho do span atual.
+    Usável como context manager ou como decorator.
+
+    Fora de uma transação amostrada, não cria o span.
+    """
+    if sentry_sdk.get_current_span() is None:
+        yield None
+        return
+
+    with sentry_sdk.start_span(op=op, name=nome) as span:
+        yield span
+
+
+def _rastrear_corrotina(nome, op, funcao):
+    # Como decorator, o rastrear fecharia o span ao criar a corrotina, antes
+    # de ela executar.
+    @wraps(funcao)
+    async def rastreada(*args, **kwargs):
+        with rastrear(nome, op):
+            return await funcao(*args, **kwargs)
+
+    return rastreada
+
+
+def rastrear_servico(op):
+    """
+    Decorator de classe que envolve cada método público (estático ou de
+    classe, síncrono ou async) de um serviço de negócio em um span
+    "Classe.metodo".
+    """
+
+    def decorar(cls):
+        for nome, atributo in list(vars(cls).items()):
+            if nome.startswith("_") or not isinstance(
+                atributo, (staticmethod, classmethod)
+            ):
+                continue
+
+            nome_span = f"{cls.__name__}.{nome}"
+            if iscoroutinefunction(atributo.__func__):
+                funcao = _rastrear_corrotina(nome_span, op, atributo.__func__)
+            else:
+                funcao = rastrear(nome_span, op)(atributo.__func__)
+            setattr(cls, nome, type(atributo)(funcao))
+
+        return cls
+
+    return decorar
+
+
+def taxa_da_rota(caminho):
+    """
+    Taxa de amostragem das transações rápidas da rota: a do maior prefixo de
+    settings.TRACES_TAXAS_POR_ROTA que a contém, ou TRACES_TAXA_PADRAO.
+    """
+    taxas = getattr(settings, "TRACES_TAXAS_POR_ROTA", {})
+    prefixos = [prefixo for prefixo in taxas if (caminho or "").startswith(prefixo)]
+    if prefixos:
+        return taxas[max(prefixos, key=len)]
+
+    return getattr(settings, "TRACES_TAXA_PADRAO", 0.05)
+
+
+def amostrar_traces(contexto):
+    """
+    traces_sampler do Sentry. A latência só é conhecida no fim da
+    transação, então toda rota com taxa maior que zero é rastreada no
+    processo, e a decisão de enviar fica para o filtrar_transacao; rotas com
+    taxa zero (ex.: /metrics) não são rastreadas. A decisão de uma transação
+    pai (trace distribuído) é respeitada.
+    """
+    if contexto.get("parent_sampled") is not None:
+        return contexto["parent_sampled"]
+
+    if "wsgi_environ" in contexto:
+        caminho = contexto["wsgi_environ"].get("PATH_INFO")
+    elif "asgi_scope" in contexto:
+        caminho = contexto["asgi_scope"].get("path")
+    else:
+        caminho = contexto.get("transaction_context", {}).get("name")
+
+    return 1.0 if taxa_da_rota(caminho) > 0 else 0.0
+
+
+def _instante(valor):
+    return datetime.fromisoformat(valor) if isinstance(valor, str) else valor
+
+
+def filtrar_transacao(evento, hint):
+    """
+    before_send_transaction do Sentry: envia sempre as transações com
+    duração de pelo menos TRACES_LIMITE_LENTA_MS e, das rápidas, a fração
+    taxa_da_rota() da rota. A decisão fica na tag "amostragem".
+    """
+    duracao = (
+        _instante(evento["timestamp"]) - _instante(evento["start_timestamp"])
+    ).total_seconds()
+
+    if duracao * 1000 >= getattr(settings, "TRACES_LIMITE_LENTA_MS", 1000):
+        amostragem = "lenta"
+    elif random.random() < taxa_da_rota(evento.get("transaction")):
+        amostragem = "rapida"
+    else:
+        return None
+
+    evento.setdefault("tags", {})["amostragem"] = amostragem
+    return evento
+
+
+class TransporteLocal(Transport):
+    """
+    Transporte do Sentry que guarda os envelopes em memória em vez de
+    enviá-los: usado nos testes e para inspecionar os traces sem rede.
+    """
+
+    def __init__(self, options=None):
+        super().__init__(options)
+        self.envelopes = []
+
+    def capture_envelope(self, envelope):
+        self.envelopes.append(envelope)
+
+    def transacoes(self):
+        return [
+            item.payload.json
+            for envelope in self.envelopes
+            for item in envelope.items
+            if item.type == "transaction"
+        ]
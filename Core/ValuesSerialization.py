@@ -0,0 +1,166 @@
+from operator import itemgetter
+from typing import Callable, NamedTuple, Optional
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.relations import PrimaryKeyRelatedField, RelatedField
+from rest_framework.response import Response
+
+# Campos cujo valor não é uma coluna: só entram no caminho por values() se o
+# serializer declarar como obtê-los (ver CampoValores).
+CAMPOS_NAO_COLUNA = (
+    serializers.BaseSerializer,
+    serializers.HiddenField,
+    serializers.ManyRelatedField,
+    serializers.ReadOnlyField,
+    serializers.SerializerMethodField,
+    RelatedField,
+)
+
+
+class CampoValores(NamedTuple):
+    """
+    Como obter, a partir de uma linha do values(), o valor de um campo do
+    serializer que não é uma coluna (ex.: SerializerMethodField).
+
+    `valor` recebe a linha (dict) e retorna o valor já representado; as
+    `colunas` e `anotacoes` são incluídas na consulta.
+    """
+
+    valor: Callable
+    colunas: tuple = ()
+    anotacoes: Optional[dict] = None
+
+
+def _caminho_do_model(model, atributos):
+    # Valida que a origem do campo é uma cadeia de campos do model (e não um
+    # método ou property), para que possa ser lida com values().
+    for indice, atributo in enumerate(atributos):
+        try:
+            campo = model._meta.get_field(atributo)
+        except FieldDoesNotExist:
+            return None
+
+        if not campo.concrete or (campo.many_to_many or campo.one_to_many):
+            return None
+
+        if campo.is_relation:
+            model = campo.related_model
+        elif indice < len(atributos) - 1:
+            return None
+
+    return "__".join(atributos)
+
+
+def _representar(coluna, conversor):
+    def valor(linha):
+        bruto = linha[coluna]
+        return None if bruto is None else conversor(bruto)
+
+    return valor
+
+
+class SerializacaoPorValores:
+    """
+    Caminho de leitura das listagens que dispensa instanciar models e
+    percorrer o serializer registro a registro: os campos do serializer são
+    compilados uma vez em colunas de um values() e em funções que montam o
+    dict de cada linha, produzindo o mesmo JSON do serializer.
+
+    Campos que são colunas (inclusive de models relacionados, como
+    source="safra.nome") e PrimaryKeyRelatedField são compilados
+    automaticamente; os demais precisam ser declarados pelo serializer em
+    campos_por_valores() (ver CampoValores).
+    """
+
+    def __init__(self, colunas, anotacoes, acessores):
+        self.colunas = colunas
+        self.anotacoes = anotacoes
+        self.acessores = acessores
+
+    @classmethod
+    def compilar(cls, serializer):
+        """
+        Compila os campos legíveis do serializer.
+
+        Returns:
+            SerializacaoPorValores, ou None se algum campo não puder ser lido
+            com values()
+        """
+        model = serializer.Meta.model
+        declarados = (
+            serializer.campos_por_valores()
+            if hasattr(serializer, "campos_por_valores")
+            else {}
+        )
+        colunas, anotacoes, acessores = [], {}, []
+
+        for nome, campo in serializer.fields.items():
+            if campo.write_only:
+                continue
+
+            declarado = declarados.get(nome)
+            if declarado is not None:
+                colunas += declarado.colunas
+                anotacoes.update(declarado.anotacoes or {})
+                acessores.append((nome, declarado.valor))
+                continue
+
+            if campo.source == "*":
+                return None
+
+            coluna = _caminho_do_model(model, campo.source_attrs)
+            if coluna is None:
+                return None
+
+            if isinstance(campo, PrimaryKeyRelatedField) and campo.pk_field is None:
+                colunas.append(coluna)
+                acessores.append((nome, itemgetter(coluna)))
+            elif isinstance(campo, CAMPOS_NAO_COLUNA):
+                return None
+            else:
+                colunas.append(coluna)
+                acessores.append((nome, _representar(coluna, campo.to_representation)))
+
+        return cls(list(dict.fromkeys(colunas)), anotacoes, acessores)
+
+    def consulta(self, queryset):
+        """
+        Retorna o queryset de dicts com as colunas e anotações compiladas.
+        """
+        return (
+            queryset.prefetch_related(None)
+            .annotate(**self.anotacoes)
+            .values(*self.colunas, *self.anotacoes)
+        )
+
+    def representar(self, linhas):
+        acessores = self.acessores
+
+        return [{nome: valor(linha) for nome, valor in acessores} for linha in linhas]
+
+
+class ListagemPorValoresMixin:
+    """
+    ViewSet cuja ação list usa a SerializacaoPorValores, com o mesmo JSON,
+    filtros e paginação do caminho padrão. Se o serializer tiver algum campo
+    que não possa ser compilado, usa o caminho padrão.
+    """
+
+    leitura_por_valores = True
+
+    def list(self, request, *args, **kwargs):
+        leitura = None
+        if self.leitura_por_valores:
+            leitura = SerializacaoPorValores.compilar(self.get_serializer())
+
+        if leitura is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = leitura.consulta(self.filter_queryset(self.get_queryset()))
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(leitura.representar(page))
+
+        return Response(leitura.representar(queryset))
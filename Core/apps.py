@@ -0,0 +1,20 @@
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "Core"
+
+    def ready(self):
+        from django.core.checks import register
+        from django.db.backends.signals import connection_created
+
+        from . import signals
+        from .Database import verificar_limite_conexoes
+        from .Metrics import registrar_conexao_criada
+
+        signals.conectar_invalidacao_contagens()
+        connection_created.connect(
+            registrar_conexao_criada, dispatch_uid="metricas_conexao_criada"
+        )
+        register(verificar_limite_conexoes)
@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from Core.BulkHistory import TAMANHO_LOTE_HISTORICO, drenar_historico_pendente
+
+
+class Command(BaseCommand):
+    help = (
+        "Move os registros históricos pendentes (models em modo outbox) para "
+        "as tabelas Historical*."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--tamanho-lote",
+            type=int,
+            default=TAMANHO_LOTE_HISTORICO,
+            help=f"Registros por transação (padrão {TAMANHO_LOTE_HISTORICO}).",
+        )
+        parser.add_argument(
+            "--continuo",
+            action="store_true",
+            help="Continua em execução, aguardando novos registros.",
+        )
+        parser.add_argument(
+            "--intervalo",
+            type=float,
+            default=5,
+            help="Segundos entre verificações no modo contínuo (padrão 5).",
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+
+        while True:
+            movidos = drenar_historico_pendente(options["tamanho_lote"])
+            total += movidos
+
+            if movidos < options["tamanho_lote"]:
+                if not options["continuo"]:
+                    break
+                time.sleep(options["intervalo"])
+
+        self.stdout.write(self.style.SUCCESS(f"{total} registros históricos gravados."))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from Core.OpenAPI import CAMINHO_ESQUEMA, gerar_esquema
+
+
+class Command(BaseCommand):
+    help = (
+        "Gera o esquema OpenAPI servido em /api/schema/ "
+        "(Core/static/openapi/schema.yaml). Executar antes do collectstatic."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verificar",
+            action="store_true",
+            help="Apenas verifica se o esquema versionado está atualizado.",
+        )
+
+    def handle(self, *args, **options):
+        esquema = gerar_esquema()
+        atual = CAMINHO_ESQUEMA.read_bytes() if CAMINHO_ESQUEMA.exists() else None
+
+        if options["verificar"]:
+            if esquema != atual:
+                raise CommandError(
+                    "O esquema OpenAPI está desatualizado. "
+                    "Execute python manage.py gerar_esquema_openapi."
+                )
+            self.stdout.write("O esquema OpenAPI está atualizado.")
+            return
+
+        if esquema == atual:
+            self.stdout.write("O esquema OpenAPI já está atualizado.")
+            return
+
+        CAMINHO_ESQUEMA.parent.mkdir(parents=True, exist_ok=True)
+        CAMINHO_ESQUEMA.write_bytes(esquema)
+        self.stdout.write(f"Esquema OpenAPI gravado em {CAMINHO_ESQUEMA}.")
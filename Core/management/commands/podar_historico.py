@@ -0,0 +1,135 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from Core.HistoryRetention import (
+    TAMANHO_LOTE_PODA,
+    PoliticaRetencao,
+    RetencaoHistorico,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Remove os registros das tabelas Historical* fora da política de "
+        "retenção de cada model (settings.HISTORICO_RETENCAO)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--modelo",
+            action="append",
+            dest="modelos",
+            help=(
+                "Label do model (ex.: localidades.Cidades); pode ser repetido. "
+                "Padrão: todos os models com política de retenção."
+            ),
+        )
+        parser.add_argument(
+            "--manter-versoes",
+            type=int,
+            help="Versões mais recentes mantidas por objeto (sobrepõe a política).",
+        )
+        parser.add_argument(
+            "--manter-dias",
+            type=int,
+            help="Dias de histórico mantidos integralmente (sobrepõe a política).",
+        )
+        parser.add_argument(
+            "--tamanho-lote",
+            type=int,
+            default=TAMANHO_LOTE_PODA,
+            help=f"Objetos processados por lote (padrão {TAMANHO_LOTE_PODA}).",
+        )
+        parser.add_argument(
+            "--arquivar",
+            metavar="DIRETORIO",
+            help="Arquiva os registros removidos em arquivos .ndjson.gz.",
+        )
+        parser.add_argument(
+            "--simular",
+            action="store_true",
+            help="Apenas informa quantos registros seriam removidos.",
+        )
+        parser.add_argument(
+            "--sql-particionamento",
+            action="store_true",
+            help=(
+                "Imprime o SQL (PostgreSQL) que particiona as tabelas históricas "
+                "por mês de history_date, em vez de podar."
+            ),
+        )
+        parser.add_argument(
+            "--meses-futuros",
+            type=int,
+            default=12,
+            help="Meses à frente com partição criada (padrão 12).",
+        )
+
+    def handle(self, *args, **options):
+        disponiveis = RetencaoHistorico.models_com_historico()
+
+        if options["modelos"]:
+            desconhecidos = set(options["modelos"]) - disponiveis.keys()
+            if desconhecidos:
+                raise CommandError(
+                    f"Models sem histórico: {', '.join(sorted(desconhecidos))}."
+                )
+            modelos = {label: disponiveis[label] for label in options["modelos"]}
+        else:
+            modelos = disponiveis
+
+        if options["sql_particionamento"]:
+            return self.imprimir_sql_particionamento(modelos, options["meses_futuros"])
+
+        for label, model in modelos.items():
+            politica = RetencaoHistorico.politica(model)
+            if (
+                options["manter_versoes"] is not None
+                or options["manter_dias"] is not None
+            ):
+                politica = PoliticaRetencao(
+                    versoes=options["manter_versoes"], dias=options["manter_dias"]
+                )
+
+            if politica.vazia:
+                continue
+
+            arquivo = None
+            if options["arquivar"] and not options["simular"]:
+                arquivo = RetencaoHistorico.caminho_arquivo(options["arquivar"], model)
+
+            removidos = RetencaoHistorico.podar(
+                model,
+                politica,
+                tamanho_lote=options["tamanho_lote"],
+                arquivo=arquivo,
+                simular=options["simular"],
+            )
+
+            acao = "seriam removidos" if options["simular"] else "removidos"
+            self.stdout.write(
+                self.style.SUCCESS(f"{label}: {removidos} registros históricos {acao}.")
+            )
+
+    def imprimir_sql_particionamento(self, modelos, meses_futuros):
+        if connection.vendor != "postgresql":
+            self.stderr.write(
+                "Atenção: o particionamento só é suportado no PostgreSQL."
+            )
+
+        for model in modelos.values():
+            historico = RetencaoHistorico.model_historico(model)
+            mais_antigo = historico._default_manager.order_by("history_date").first()
+            inicio = (
+                mais_antigo.history_date.date()
+                if mais_antigo is not None
+                else timezone.now().date()
+            )
+
+            self.stdout.write("BEGIN;")
+            for comando in RetencaoHistorico.sql_particionamento(
+                model, inicio, meses_futuros
+            ):
+                self.stdout.write(f"{comando};")
+            self.stdout.write("COMMIT;")
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.1 on 2026-10-19 16:08
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HistoricoPendente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('modelo', models.CharField(help_text='Label do model histórico (ex.: fazendas.HistoricalCulturas).', max_length=255, verbose_name='Modelo')),
+                ('dados', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder, help_text='Valores dos campos do registro histórico.', verbose_name='Dados')),
+            ],
+            options={
+                'verbose_name': 'Histórico Pendente',
+                'verbose_name_plural': 'Históricos Pendentes',
+                'ordering': ['id'],
+            },
+        ),
+    ]
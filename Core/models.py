@@ -0,0 +1,28 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class HistoricoPendente(models.Model):
+    """
+    Outbox dos registros históricos dos models em modo "outbox" (ver
+    Core.BulkHistory): cada registro é gravado aqui, na mesma transação da
+    alteração, e movido para a tabela Historical* do model pelo comando
+    drenar_historico.
+    """
+
+    modelo = models.CharField(
+        _("Modelo"),
+        max_length=255,
+        help_text=_("Label do model histórico (ex.: fazendas.HistoricalCulturas)."),
+    )
+    dados = models.JSONField(
+        _("Dados"),
+        encoder=DjangoJSONEncoder,
+        help_text=_("Valores dos campos do registro histórico."),
+    )
+
+    class Meta:
+        verbose_name = _("Histórico Pendente")
+        verbose_name_plural = _("Históricos Pendentes")
+        ordering = ["id"]
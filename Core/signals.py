@@ -0,0 +1,42 @@
+from functools import partial
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from .BulkHistory import HistoricoEmLote
+from .Counting import ContagemEstimada
+
+
+def invalidar_contagens(sender, **kwargs):
+    # Sempre após o commit: antes dele, uma listagem concorrente ainda
+    # contaria os dados antigos e os gravaria em cache já na versão nova. Em
+    # um HistoricoEmLote, uma única vez por model.
+    lote = HistoricoEmLote.atual()
+    if lote is not None:
+        lote.adiar(ContagemEstimada.invalidar, sender)
+    else:
+        transaction.on_commit(partial(ContagemEstimada.invalidar, sender))
+
+
+def conectar_invalidacao_contagens():
+    """
+    Invalida as contagens em cache da paginação a cada gravação ou exclusão
+    nos models com histórico (os models de domínio da API).
+
+    Os sinais são conectados model a model: um receptor global faria o
+    Django abrir mão do delete rápido (sem carregar os registros) em todas as
+    tabelas, inclusive nas históricas.
+    """
+    for model in apps.get_models():
+        if getattr(model._meta, "simple_history_manager_attribute", None):
+            post_save.connect(
+                invalidar_contagens,
+                sender=model,
+                dispatch_uid=f"invalidar_contagens_save_{model._meta.label}",
+            )
+            post_delete.connect(
+                invalidar_contagens,
+                sender=model,
+                dispatch_uid=f"invalidar_contagens_delete_{model._meta.label}",
+            )
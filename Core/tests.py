@@ -0,0 +1,1421 @@
+import gzip
+import io
+import json
+import os
+import random
+import runpy
+import shutil
+import tempfile
+import uuid
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from unittest import mock
+from urllib.parse import parse_qsl, urlsplit
+
+import sentry_sdk
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management import call_command
+from django.core.signals import request_finished
+from django.core.wsgi import get_wsgi_application
+from django.db import close_old_connections
+from django.db import connection, transaction
+from django.test import AsyncClient, RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from sentry_sdk.integrations.django import DjangoIntegration
+
+from BrainAgriculture.dashboards.business import DashboardBusiness
+from BrainAgriculture.fazendas.models import Culturas, Fazendas, Safras
+from Common.localidades.models import Cidades, Estados
+from Usuarios.produtores.models import Produtores
+from Usuarios.usuarios.models import Usuarios
+
+from . import Database, Renderers
+from .BulkHistory import HistoricoAdiado, HistoricoEmLote
+from .Counting import ContagemEstimada
+from .Database import (
+    ENGINE_POSTGRESQL,
+    ESTATISTICAS_POOL,
+    configurar_conexoes,
+    verificar_limite_conexoes,
+)
+from .Gunicorn import cpus_disponiveis, dimensionar, memoria_disponivel
+from .HistoryRetention import PoliticaRetencao, RetencaoHistorico
+from .Metrics import METRICAS, MetricasProcesso, formatar_prometheus
+from .OpenAPI import CAMINHO_ESQUEMA, faixas_inteiros_padrao, gerar_esquema
+from .models import HistoricoPendente
+from .Renderers import InterpretadorJSON, RenderizadorJSON
+from .StaticFiles import ArquivosEstaticosMiddleware
+from .Tracing import TransporteLocal, amostrar_traces, filtrar_transacao, rastrear
+from .Validations import validar_cpf_cnpj, validar_lote
+from .ValuesSerialization import ListagemPorValoresMixin, SerializacaoPorValores
+
+
+def validar_cpf_cnpj_original(valor, levantar_excessao=True):
+    # Implementação anterior (dígito a dígito), mantida como referência para
+    # o teste de equivalência.
+    def _valida_cpf(cpf):
+        if len(set(cpf)) == 1:
+            raise ValidationError(_("CPF inválido: todos os dígitos são iguais."))
+
+        digitos_verificadores = cpf[9:]
+
+        cpf = cpf[:9]
+
+        dig_1 = int(cpf[0]) * 1
+        dig_2 = int(cpf[1]) * 2
+        dig_3 = int(cpf[2]) * 3
+        dig_4 = int(cpf[3]) * 4
+        dig_5 = int(cpf[4]) * 5
+        dig_6 = int(cpf[5]) * 6
+        dig_7 = int(cpf[6]) * 7
+        dig_8 = int(cpf[7]) * 8
+        dig_9 = int(cpf[8]) * 9
+
+        dig_1_ao_9_somados = (
+            dig_1 + dig_2 + dig_3 + dig_4 + dig_5 + dig_6 + dig_7 + dig_8 + dig_9
+        )
+
+        dig_10 = dig_1_ao_9_somados % 11
+
+        if dig_10 > 9:
+            dig_10 = 0
+
+        cpf += str(dig_10)
+
+        dig_1 = int(cpf[0]) * 0
+        dig_2 = int(cpf[1]) * 1
+        dig_3 = int(cpf[2]) * 2
+        dig_4 = int(cpf[3]) * 3
+        dig_5 = int(cpf[4]) * 4
+        dig_6 = int(cpf[5]) * 5
+        dig_7 = int(cpf[6]) * 6
+        dig_8 = int(cpf[7]) * 7
+        dig_9 = int(cpf[8]) * 8
+        dig_10 = int(cpf[9]) * 9
+
+        dig_1_ao_10_somados = (
+            dig_1
+            + dig_2
+            + dig_3
+            + dig_4
+            + dig_5
+            + dig_6
+            + dig_7
+            + dig_8
+            + dig_9
+            + dig_10
+        )
+
+        dig_11 = dig_1_ao_10_somados % 11
+
+        if dig_11 > 9:
+            dig_11 = 0
+
+        cpf_validado = cpf + str(dig_11)
+
+        if not digitos_verificadores == cpf_validado[9:]:
+            if levantar_excessao:
+                raise ValidationError(_("O CPF é inválido."))
+            else:
+                return False
+
+        if not levantar_excessao:
+            return True
+
+    def _valida_cnpj(cnpj):
+        if len(set(cnpj)) == 1:
+            raise ValidationError(_("CNPJ inválido: todos os dígitos são iguais."))
+
+        digitos_verificadores = cnpj[12:]
+
+        cnpj = cnpj[:12]
+
+        dig_1 = int(cnpj[0]) * 6
+        dig_2 = int(cnpj[1]) * 7
+        dig_3 = int(cnpj[2]) * 8
+        dig_4 = int(cnpj[3]) * 9
+        dig_5 = int(cnpj[4]) * 2
+        dig_6 = int(cnpj[5]) * 3
+        dig_7 = int(cnpj[6]) * 4
+        dig_8 = int(cnpj[7]) * 5
+        dig_9 = int(cnpj[8]) * 6
+        dig_10 = int(cnpj[9]) * 7
+        dig_11 = int(cnpj[10]) * 8
+        dig_12 = int(cnpj[11]) * 9
+
+        dig_1_ao_12_somados = (
+            dig_1
+            + dig_2
+            + dig_3
+            + dig_4
+            + dig_5
+            + dig_6
+            + dig_7
+            + dig_8
+            + dig_9
+            + dig_10
+            + dig_11
+            + dig_12
+        )
+
+        dig_13 = dig_1_ao_12_somados % 11
+
+        if dig_13 > 9:
+            dig_13 = 0
+
+        cnpj += str(dig_13)
+
+        dig_1 = int(cnpj[0]) * 5
+        dig_2 = int(cnpj[1]) * 6
+        dig_3 = int(cnpj[2]) * 7
+        dig_4 = int(cnpj[3]) * 8
+        dig_5 = int(cnpj[4]) * 9
+        dig_6 = int(cnpj[5]) * 2
+        dig_7 = int(cnpj[6]) * 3
+        dig_8 = int(cnpj[7]) * 4
+        dig_9 = int(cnpj[8]) * 5
+        dig_10 = int(cnpj[9]) * 6
+        dig_11 = int(cnpj[10]) * 7
+        dig_12 = int(cnpj[11]) * 8
+        dig_13 = int(cnpj[12]) * 9
+
+        dig_1_ao_13_somados = (
+            dig_1
+            + dig_2
+            + dig_3
+            + dig_4
+            + dig_5
+            + dig_6
+            + dig_7
+            + dig_8
+            + dig_9
+            + dig_10
+            + dig_11
+            + dig_12
+            + dig_13
+        )
+
+        dig_14 = dig_1_ao_13_somados % 11
+
+        if dig_14 > 9:
+            dig_14 = 0
+
+        cnpj_validado = cnpj + str(dig_14)
+
+        if not digitos_verificadores == cnpj_validado[12:]:
+            if levantar_excessao:
+                raise ValidationError(_("O CNPJ é inválido."))
+            else:
+                return False
+
+        if not levantar_excessao:
+            return True
+
+    valor = valor.replace(".", "").replace("-", "").replace("/", "")
+
+    if len(valor) == 11:
+        return _valida_cpf(valor)
+    elif len(valor) == 14:
+        return _valida_cnpj(valor)
+    else:
+        raise ValidationError(
+            _("O CPF precisa ter 11 dígitos ou o CNPJ precisa ter 14 dígitos.")
+        )
+
+
+def inserts_no_historico(queries):
+    tabela = Cidades.history.model._meta.db_table
+    return [
+        query["sql"]
+        for query in queries
+        if query["sql"].startswith("INSERT") and tabela in query["sql"]
+    ]
+
+
+class HistoricoEmLoteTestCase(TestCase):
+    def setUp(self):
+        self.estado = Estados.objects.create(
+            nome="São Paulo", sigla="SP", codigo_ibge=35
+        )
+
+    def test_historico_gravado_com_um_insert(self):
+        with CaptureQueriesContext(connection) as queries:
+            with HistoricoEmLote(motivo="Carga de teste"):
+                for i in range(20):
+                    Cidades.objects.create(
+                        nome=f"Cidade {i}", estado=self.estado, codigo_ibge=i
+                    )
+
+        self.assertEqual(len(inserts_no_historico(queries.captured_queries)), 1)
+        self.assertEqual(Cidades.history.count(), 20)
+        self.assertEqual(
+            set(Cidades.history.values_list("history_change_reason", flat=True)),
+            {"Carga de teste"},
+        )
+
+    def test_registro_historico_igual_ao_padrao(self):
+        with HistoricoEmLote():
+            cidade = Cidades.objects.create(
+                nome="Campinas", estado=self.estado, codigo_ibge=1
+            )
+            cidade.nome = "Campinas Alterada"
+            cidade.save()
+            cidade_id = cidade.id
+            cidade.delete()
+
+        registros = list(
+            Cidades.history.order_by("history_id").values_list(
+                "id", "nome", "nome_normalizado", "history_type"
+            )
+        )
+        self.assertEqual(
+            registros,
+            [
+                (cidade_id, "Campinas", "campinas", "+"),
+                (cidade_id, "Campinas Alterada", "campinas alterada", "~"),
+                (cidade_id, "Campinas Alterada", "campinas alterada", "-"),
+            ],
+        )
+
+    def test_motivo_do_objeto_tem_prioridade(self):
+        with HistoricoEmLote(motivo="Lote"):
+            cidade = Cidades(nome="Campinas", estado=self.estado, codigo_ibge=1)
+            cidade._change_reason = "Motivo próprio"
+            cidade.save()
+
+        self.assertEqual(Cidades.history.get().history_change_reason, "Motivo próprio")
+
+    def test_erro_desfaz_dados_e_historico(self):
+        with self.assertRaises(ValueError):
+            with HistoricoEmLote():
+                Cidades.objects.create(
+                    nome="Campinas", estado=self.estado, codigo_ibge=1
+                )
+                raise ValueError()
+
+        self.assertFalse(Cidades.objects.exists())
+        self.assertFalse(Cidades.history.exists())
+
+    def test_lote_aninhado(self):
+        with HistoricoEmLote(motivo="Externo") as externo:
+            with HistoricoEmLote(motivo="Interno") as interno:
+                Cidades.objects.create(
+                    nome="Campinas", estado=self.estado, codigo_ibge=1
+                )
+
+            self.assertIs(interno, externo)
+            self.assertFalse(Cidades.history.exists())
+
+        self.assertEqual(Cidades.history.get().history_change_reason, "Externo")
+
+    def test_criar_em_lote_com_historico(self):
+        with CaptureQueriesContext(connection) as queries:
+            with HistoricoEmLote(motivo="Carga") as lote:
+                cidades = lote.criar(
+                    Cidades,
+                    [
+                        Cidades(nome=f"Cidade {i}", estado=self.estado, codigo_ibge=i)
+                        for i in range(10)
+                    ],
+                )
+
+        self.assertEqual(len(inserts_no_historico(queries.captured_queries)), 1)
+        self.assertEqual(
+            sorted(Cidades.history.values_list("id", "history_type")),
+            sorted((cidade.id, "+") for cidade in cidades),
+        )
+        self.assertEqual(
+            set(Cidades.history.values_list("history_change_reason", flat=True)),
+            {"Carga"},
+        )
+
+    def test_fora_do_lote(self):
+        Cidades.objects.create(nome="Campinas", estado=self.estado, codigo_ibge=1)
+
+        self.assertEqual(Cidades.history.count(), 1)
+
+
+class HistoricoAdiadoTestCase(TestCase):
+    def setUp(self):
+        self.estado = Estados.objects.create(
+            nome="São Paulo", sigla="SP", codigo_ibge=35
+        )
+
+    def alterar_cidade(self):
+        cidade = Cidades.objects.create(
+            nome="Campinas", estado=self.estado, codigo_ibge=1
+        )
+        cidade.nome = "Campinas Alterada"
+        cidade.save()
+        cidade_id = cidade.id
+        cidade.delete()
+        return cidade_id
+
+    def historico_cidades(self):
+        return list(
+            Cidades.history.order_by("history_id").values_list(
+                "id", "nome", "nome_normalizado", "history_type"
+            )
+        )
+
+    @override_settings(HISTORICO_MODOS={"localidades.Cidades": "on_commit"})
+    def test_on_commit_grava_em_lote_ao_fim_do_bloco(self):
+        with CaptureQueriesContext(connection) as queries:
+            with HistoricoAdiado():
+                with self.captureOnCommitCallbacks(execute=True):
+                    for i in range(20):
+                        Cidades.objects.create(
+                            nome=f"Cidade {i}", estado=self.estado, codigo_ibge=i
+                        )
+
+                self.assertFalse(Cidades.history.exists())
+
+        self.assertEqual(len(inserts_no_historico(queries.captured_queries)), 1)
+        self.assertEqual(Cidades.history.count(), 20)
+
+    @override_settings(HISTORICO_MODOS={"localidades.Cidades": "on_commit"})
+    def test_on_commit_descarta_historico_de_rollback(self):
+        with HistoricoAdiado():
+            with self.captureOnCommitCallbacks(execute=True):
+                with self.assertRaises(ValueError):
+                    with transaction.atomic():
+                        Cidades.objects.create(
+                            nome="Descartada", estado=self.estado, codigo_ibge=1
+                        )
+                        raise ValueError()
+
+                Cidades.objects.create(
+                    nome="Campinas", estado=self.estado, codigo_ibge=2
+                )
+
+        self.assertEqual(
+            list(Cidades.history.values_list("nome", flat=True)), ["Campinas"]
+        )
+
+    @override_settings(HISTORICO_MODOS={"localidades.Cidades": "outbox"})
+    def test_outbox_drenado_igual_ao_sincrono(self):
+        cidade_id = self.alterar_cidade()
+
+        self.assertFalse(Cidades.history.exists())
+        self.assertEqual(HistoricoPendente.objects.count(), 3)
+
+        call_command("drenar_historico", tamanho_lote=2, stdout=io.StringIO())
+
+        self.assertFalse(HistoricoPendente.objects.exists())
+        self.assertEqual(
+            self.historico_cidades(),
+            [
+                (cidade_id, "Campinas", "campinas", "+"),
+                (cidade_id, "Campinas Alterada", "campinas alterada", "~"),
+                (cidade_id, "Campinas Alterada", "campinas alterada", "-"),
+            ],
+        )
+
+    def test_sincrono_por_padrao(self):
+        self.alterar_cidade()
+
+        self.assertEqual(Cidades.history.count(), 3)
+        self.assertFalse(HistoricoPendente.objects.exists())
+
+
+class RetencaoHistoricoTestCase(TestCase):
+    def setUp(self):
+        estado = Estados.objects.create(nome="São Paulo", sigla="SP", codigo_ibge=35)
+
+        # Duas cidades com 6 versões cada: as 4 primeiras com 400 dias e as
+        # 2 últimas recentes.
+        self.cidades = []
+        for codigo in (1, 2):
+            cidade = Cidades.objects.create(
+                nome=f"Cidade {codigo} 0", estado=estado, codigo_ibge=codigo
+            )
+            for versao in range(1, 6):
+                cidade.nome = f"Cidade {codigo} {versao}"
+                cidade.save()
+            self.cidades.append(cidade)
+
+        Cidades.history.filter(
+            history_id__in=[
+                history_id
+                for cidade in self.cidades
+                for history_id in Cidades.history.filter(id=cidade.id)
+                .order_by("history_id")
+                .values_list("history_id", flat=True)[:4]
+            ]
+        ).update(history_date=timezone.now() - timedelta(days=400))
+
+    def versoes(self, cidade):
+        return [
+            int(nome.rsplit(" ", 1)[1])
+            for nome in Cidades.history.filter(id=cidade.id)
+            .order_by("history_id")
+            .values_list("nome", flat=True)
+        ]
+
+    def test_mantem_versoes(self):
+        removidos = RetencaoHistorico.podar(
+            Cidades, PoliticaRetencao(versoes=3), tamanho_lote=1
+        )
+
+        self.assertEqual(removidos, 6)
+        for cidade in self.cidades:
+            self.assertEqual(self.versoes(cidade), [3, 4, 5])
+
+    def test_versoes_e_dias_combinados(self):
+        removidos = RetencaoHistorico.podar(
+            Cidades, PoliticaRetencao(versoes=1, dias=30)
+        )
+
+        # Mantém as versões recentes mesmo além da primeira, e as antigas só
+        # dentro das versões mantidas.
+        self.assertEqual(removidos, 8)
+        for cidade in self.cidades:
+            self.assertEqual(self.versoes(cidade), [4, 5])
+
+    def test_arquiva_registros_removidos(self):
+        with tempfile.TemporaryDirectory() as diretorio:
+            arquivo = RetencaoHistorico.caminho_arquivo(diretorio, Cidades)
+            removidos = RetencaoHistorico.podar(
+                Cidades, PoliticaRetencao(dias=30), arquivo=arquivo
+            )
+
+            with gzip.open(arquivo, "rt", encoding="utf-8") as entrada:
+                arquivados = [json.loads(linha) for linha in entrada]
+
+        self.assertEqual(removidos, 8)
+        self.assertEqual(len(arquivados), 8)
+        self.assertEqual(
+            sorted(registro["nome"] for registro in arquivados),
+            [f"Cidade {codigo} {versao}" for codigo in (1, 2) for versao in range(4)],
+        )
+        self.assertEqual(Cidades.history.count(), 4)
+
+    def test_comando_simular_nao_remove(self):
+        saida = io.StringIO()
+        call_command(
+            "podar_historico",
+            modelos=["localidades.Cidades"],
+            manter_versoes=1,
+            simular=True,
+            stdout=saida,
+        )
+
+        self.assertIn("localidades.Cidades: 10 registros históricos", saida.getvalue())
+        self.assertEqual(Cidades.history.count(), 12)
+
+    def test_sql_particionamento(self):
+        comandos = RetencaoHistorico.sql_particionamento(
+            Cidades, timezone.now().date(), meses_futuros=2
+        )
+        tabela = Cidades.history.model._meta.db_table
+
+        self.assertIn("PARTITION BY RANGE (history_date)", comandos[1])
+        self.assertEqual(
+            sum(f'PARTITION OF "{tabela}" FOR VALUES' in c for c in comandos), 3
+        )
+        self.assertEqual(comandos[-1], f'DROP TABLE "{tabela}_antiga"')
+
+
+class CidadesPaginadasTestCase(TestCase):
+    """Base dos testes de paginação: 27 cidades em 3 estados."""
+
+    url = "/api/localidades/v1/cidades/"
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(
+            Usuarios.objects.create_user(
+                cpf_cnpj="71842388002", nome="Usuario", password="senha12345"
+            )
+        )
+
+        # Nomes repetidos entre estados, para que a ordenação dependa de
+        # todos os campos (estado_id, nome, id).
+        with self.captureOnCommitCallbacks(execute=True):
+            for codigo, nome in enumerate(("Bahia", "Acre", "Ceará")):
+                estado = Estados.objects.create(
+                    nome=nome, sigla=nome[:2].upper(), codigo_ibge=codigo
+                )
+                for indice in range(9):
+                    Cidades.objects.create(
+                        nome=f"Cidade {indice % 4} {indice}",
+                        estado=estado,
+                        codigo_ibge=codigo * 100 + indice,
+                    )
+
+
+class PaginacaoCursorTestCase(CidadesPaginadasTestCase):
+    def test_percorre_todas_as_paginas_na_ordem(self):
+        esperado = list(
+            Cidades.objects.order_by("estado_id", "nome", "id").values_list(
+                "id", flat=True
+            )
+        )
+
+        recebidos = []
+        url = f"{self.url}?cursor=&limit=4"
+        while url:
+            with self.assertNumQueries(1):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn("count", response.data)
+            recebidos += [cidade["id"] for cidade in response.data["results"]]
+            url = response.data["next"]
+
+        self.assertEqual(recebidos, esperado)
+
+    def test_pagina_anterior(self):
+        primeira = self.client.get(f"{self.url}?cursor=&limit=5").data
+        segunda = self.client.get(primeira["next"]).data
+        anterior = self.client.get(segunda["previous"]).data
+
+        self.assertIsNone(primeira["previous"])
+        self.assertEqual(anterior["results"], primeira["results"])
+        self.assertIsNone(anterior["previous"])
+
+    def test_sem_cursor_mantem_limit_offset(self):
+        response = self.client.get(f"{self.url}?limit=5&offset=5")
+
+        self.assertEqual(response.data["count"], 27)
+        self.assertEqual(len(response.data["results"]), 5)
+
+    def test_cursor_invalido(self):
+        response = self.client.get(f"{self.url}?cursor=invalido")
+
+        self.assertEqual(response.status_code, 404)
+
+
+class ContagemEstimadaTestCase(CidadesPaginadasTestCase):
+    def test_contagem_em_cache_invalidada_ao_gravar(self):
+        url = f"{self.url}?limit=5"
+        self.assertEqual(self.client.get(url).data["count"], 27)
+
+        # Apenas a consulta da página; o total vem do cache.
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response.data["count"], 27)
+        self.assertTrue(response.data["count_exato"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Cidades.objects.create(
+                nome="Nova", estado=Estados.objects.first(), codigo_ibge=999
+            )
+
+        self.assertEqual(self.client.get(url).data["count"], 28)
+
+    def test_contagem_estimada_para_resultados_grandes(self):
+        with mock.patch.object(ContagemEstimada, "estimativa", return_value=50000):
+            response = self.client.get(f"{self.url}?limit=5&offset=20")
+            ultima = self.client.get(f"{self.url}?limit=5&offset=25")
+
+        self.assertEqual(response.data["count"], 50000)
+        self.assertFalse(response.data["count_exato"])
+        self.assertIn("offset=25", response.data["next"])
+        self.assertEqual(len(ultima.data["results"]), 2)
+        self.assertIsNone(ultima.data["next"])
+
+
+class SerializacaoPorValoresTestCase(TestCase):
+    """
+    O caminho por values() das listagens deve produzir exatamente os mesmos
+    bytes que os serializers.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        with self.captureOnCommitCallbacks(execute=True):
+            usuario = Usuarios.objects.create_user(
+                cpf_cnpj="71842388002", nome="Usuario", password="senha12345"
+            )
+            self.client.force_authenticate(usuario)
+            produtor = Produtores.objects.create(usuario=usuario)
+
+            estado = Estados.objects.create(nome="Bahia", sigla="BA", codigo_ibge=29)
+            Estados.objects.create(nome="Acre", sigla="AC", codigo_ibge=12)
+            cidades = [
+                Cidades.objects.create(nome=nome, estado=estado, codigo_ibge=codigo)
+                for codigo, nome in enumerate(("Salvador", "Ilhéus", "Feira"))
+            ]
+
+            ano = datetime.now().year
+            self.fazenda = Fazendas.objects.create(
+                nome="Fazenda Completa",
+                produtor=produtor,
+                cidade=cidades[0],
+                area_total=Decimal("1000.55"),
+            )
+            safra = Safras.objects.create(fazenda=self.fazenda, ano=ano)
+            for nome, area in (
+                ("Soja", "0.10"),
+                ("Milho", "0.20"),
+                ("Trigo", "300.55"),
+            ):
+                Culturas.objects.create(
+                    nome=nome, safra=safra, area_plantada=Decimal(area)
+                )
+            Safras.objects.create(fazenda=self.fazenda, ano=ano - 1)
+
+            # Safra do ano sem culturas e fazenda sem safra no ano.
+            vazia = Fazendas.objects.create(
+                nome="Fazenda Vazia",
+                produtor=produtor,
+                cidade=cidades[1],
+                area_total=Decimal("50"),
+            )
+            Safras.objects.create(fazenda=vazia, ano=ano)
+            antiga = Fazendas.objects.create(
+                nome="Fazenda Antiga",
+                produtor=produtor,
+                cidade=cidades[2],
+                area_total=Decimal("70"),
+            )
+            Culturas.objects.create(
+                nome="Café",
+                safra=Safras.objects.create(fazenda=antiga, ano=ano - 2),
+                area_plantada=Decimal("12.5"),
+            )
+
+    def assertMesmoJson(self, url, parametros):
+        with mock.patch.object(
+            SerializacaoPorValores,
+            "representar",
+            autospec=True,
+            side_effect=SerializacaoPorValores.representar,
+        ) as representar:
+            rapida = self.client.get(url, parametros)
+        representar.assert_called()
+
+        with mock.patch.object(ListagemPorValoresMixin, "leitura_por_valores", False):
+            padrao = self.client.get(url, parametros)
+
+        self.assertEqual(rapida.status_code, 200)
+        self.assertEqual(rapida.content, padrao.content)
+
+        return rapida.json()
+
+    def test_listagens_identicas_ao_serializer(self):
+        fazenda = str(self.fazenda.id)
+        casos = {
+            "/api/brainagriculture/v1/fazendas/": [
+                {},
+                {"limit": 1000},
+                {"fields": "id,nome,area_vegetacao"},
+                {"omit": "area_agricultavel,produtor_nome"},
+                {"nome": "Fazenda Vazia"},
+            ],
+            "/api/brainagriculture/v1/safras/": [
+                {},
+                {"fazenda": fazenda},
+                {"fields": "area_agricultavel_disponivel"},
+            ],
+            "/api/brainagriculture/v1/culturas/": [
+                {},
+                {"safra__fazenda": fazenda},
+                {"omit": "fazenda_nome"},
+            ],
+            "/api/localidades/v1/cidades/": [{}, {"estado__sigla": "BA"}],
+            "/api/localidades/v1/estados/": [{}, {"fields": "sigla"}],
+        }
+
+        for url, lista_parametros in casos.items():
+            for parametros in lista_parametros:
+                with self.subTest(url=url, parametros=parametros):
+                    self.assertMesmoJson(url, parametros)
+
+    def test_paginacao_por_cursor(self):
+        url = "/api/brainagriculture/v1/culturas/"
+        parametros = {"cursor": "", "limit": 2}
+        recebidas = []
+
+        while parametros is not None:
+            data = self.assertMesmoJson(url, parametros)
+            recebidas += [cultura["id"] for cultura in data["results"]]
+            parametros = (
+                dict(parse_qsl(urlsplit(data["next"]).query)) if data["next"] else None
+            )
+
+        self.assertEqual(
+            recebidas,
+            list(
+                Culturas.objects.order_by("safra_id", "nome", "id").values_list(
+                    "id", flat=True
+                )
+            ),
+        )
+
+    def test_campo_nao_compilavel_usa_serializer(self):
+        from BrainAgriculture.fazendas.serializers import FazendasProximasSerializer
+
+        self.assertIsNone(
+            SerializacaoPorValores.compilar(FazendasProximasSerializer(context={}))
+        )
+
+
+class RenderizadorJSONTestCase(TestCase):
+    def setUp(self):
+        self.dados = {
+            "area_total": "1000.55",
+            "area_vegetacao": Decimal("300.85"),
+            "area_agricultavel": Decimal("0"),
+            "percentual": Decimal("33.333333333333333333"),
+            "quantidade": 3,
+            "nome": "São João\u2028Del-Rei",
+            "data": date(2025, 6, 1),
+            "instante": timezone.make_aware(datetime(2025, 6, 1, 12, 30, 15, 123456)),
+            "id": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+            "itens": [{1: None, "ativo": True}, []],
+        }
+
+    def test_mesmos_bytes_do_jsonrenderer(self):
+        # Com o orjson (se instalado) e com o json da biblioteca padrão.
+        for biblioteca in (Renderers.orjson, None):
+            for contexto in ({}, {"indent": 4}):
+                with self.subTest(orjson=biblioteca is not None, contexto=contexto):
+                    with mock.patch.object(Renderers, "orjson", biblioteca):
+                        renderizado = RenderizadorJSON().render(
+                            self.dados, renderer_context=contexto
+                        )
+
+                    self.assertEqual(
+                        renderizado,
+                        JSONRenderer().render(self.dados, renderer_context=contexto),
+                    )
+
+        self.assertEqual(RenderizadorJSON().render(None), b"")
+
+    def test_resposta_da_api(self):
+        client = APIClient()
+        client.force_authenticate(
+            Usuarios.objects.create_user(
+                cpf_cnpj="71842388002", nome="Usuario", password="senha12345"
+            )
+        )
+
+        response = client.get("/api/brainagriculture/v1/dashboards/totais/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response.accepted_renderer, RenderizadorJSON)
+        self.assertEqual(response.content, JSONRenderer().render(response.data))
+
+    def test_interpretador(self):
+        self.assertEqual(
+            InterpretadorJSON().parse(
+                io.BytesIO('{"nome": "Fazenda São", "area": 1.5}'.encode())
+            ),
+            {"nome": "Fazenda São", "area": 1.5},
+        )
+
+        with mock.patch.object(Renderers, "orjson", None):
+            self.assertEqual(
+                InterpretadorJSON().parse(io.BytesIO(b'{"area": 1.5}')), {"area": 1.5}
+            )
+
+        for invalido in (b"{", b'{"area": NaN}'):
+            with self.subTest(invalido=invalido):
+                with self.assertRaisesMessage(ParseError, "JSON parse error"):
+                    InterpretadorJSON().parse(io.BytesIO(invalido))
+
+
+class MetricasTestCase(TestCase):
+    url = "/metrics"
+
+    def setUp(self):
+        self.client = APIClient()
+        self.usuario = Usuarios.objects.create_user(
+            cpf_cnpj="71842388002", nome="Usuario", password="senha12345"
+        )
+        self.admin = Usuarios.objects.create_user(
+            cpf_cnpj="11144477735", nome="Admin", password="senha12345", is_admin=True
+        )
+
+    def test_apenas_admin(self):
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+        self.client.force_authenticate(self.usuario)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_requisicoes_e_caches(self):
+        self.client.force_authenticate(self.admin)
+        self.client.get("/api/brainagriculture/v1/dashboards/totais/")
+        self.client.get("/api/localidades/v1/cidades/")
+
+        response = self.client.get(self.url)
+        conteudo = response.content.decode()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        self.assertIn("# TYPE http_requisicao_duracao_segundos histogram", conteudo)
+        self.assertRegex(
+            conteudo,
+            r'http_requisicao_duracao_segundos_bucket\{rota="[\w:-]*totais[\w-]*",'
+            r'metodo="GET",status="200",le="\+Inf"\} [1-9]',
+        )
+        self.assertRegex(
+            conteudo,
+            r'http_requisicao_consultas_db_total\{rota="[\w:-]*cidades-list",'
+            r'metodo="GET",status="200"\} [1-9]',
+        )
+        self.assertRegex(
+            conteudo, r'cache_leituras_total\{cache="contagens",resultado="\w+"\} \d'
+        )
+
+    def test_soma_entre_workers(self):
+        rotulos = ("fazendas-list", "GET", "200")
+        outro = MetricasProcesso()
+        outro.registrar_requisicao(rotulos, 0.02, 3, 0.004, 100)
+        outro.registrar_cache("contagens", True)
+        outro.registrar_conexao("default")
+        pool = dict.fromkeys(ESTATISTICAS_POOL, 0) | {"requests_wait_ms": 1500}
+
+        with tempfile.TemporaryDirectory() as diretorio:
+            with override_settings(METRICAS_DIR=diretorio):
+                # Grava como se fosse outro worker, com pool de conexões.
+                with mock.patch.object(
+                    outro,
+                    "caminho_arquivo",
+                    return_value=f"{diretorio}/metricas-1.json",
+                ), mock.patch("Core.Metrics.estatisticas_pool", return_value=pool):
+                    outro.gravar()
+
+                processo = MetricasProcesso()
+                processo.registrar_requisicao(rotulos, 3.0, 1, 0.001, 50)
+                processo.registrar_conexao("default")
+                processo.gravar()
+
+                requisicoes, caches, conexoes, pools = processo.coletar()
+
+        # Quantidade, consultas e bytes somados; um registro no bucket de
+        # 0,025 s e outro no de 5 s.
+        valores = requisicoes[rotulos]
+        self.assertEqual(valores[:5:2], [2, 4, 150])
+        self.assertAlmostEqual(valores[1], 3.02)
+        self.assertEqual(caches, {("contagens", "acerto"): 1})
+        self.assertEqual(conexoes, {"default": 2})
+        self.assertEqual(pools, {"default": pool})
+
+        linhas = formatar_prometheus(requisicoes, caches, conexoes, pools).splitlines()
+        base = 'rota="fazendas-list",metodo="GET",status="200"'
+        self.assertIn(
+            f'http_requisicao_duracao_segundos_bucket{{{base},le="0.01"}} 0', linhas
+        )
+        self.assertIn(
+            f'http_requisicao_duracao_segundos_bucket{{{base},le="0.025"}} 1', linhas
+        )
+        self.assertIn(
+            f'http_requisicao_duracao_segundos_bucket{{{base},le="5"}} 2', linhas
+        )
+        self.assertIn(f"http_requisicao_duracao_segundos_count{{{base}}} 2", linhas)
+        self.assertIn(f"http_resposta_bytes_total{{{base}}} 150", linhas)
+        self.assertIn('db_conexoes_total{banco="default"} 2', linhas)
+        self.assertIn('db_pool_espera_segundos_total{banco="default"} 1.5', linhas)
+
+    def test_sem_diretorio(self):
+        # Sem METRICAS_DIR (como nos testes), nada é gravado.
+        self.assertIsNone(METRICAS.gravar())
+        self.assertEqual(MetricasProcesso().coletar(), ({}, {}, {}, {}))
+
+    def test_consolidar_workers_encerrados(self):
+        rotulos = ("fazendas-list", "GET", "200")
+
+        with tempfile.TemporaryDirectory() as diretorio:
+            with override_settings(METRICAS_DIR=diretorio):
+                for pid in (101, 102):
+                    worker = MetricasProcesso()
+                    worker.registrar_requisicao(rotulos, 0.02, 3, 0.004, 100)
+                    worker.registrar_cache("contagens", pid == 101)
+                    with mock.patch.object(
+                        worker,
+                        "caminho_arquivo",
+                        return_value=f"{diretorio}/metricas-{pid}.json",
+                    ):
+                        worker.gravar()
+
+                # Um processo sem requisições (o master) não grava arquivo.
+                MetricasProcesso().gravar()
+
+                processo = MetricasProcesso()
+                antes = processo.coletar()
+                processo.consolidar(101)
+                processo.consolidar(102)
+                processo.consolidar(103)
+
+                self.assertEqual(
+                    sorted(os.listdir(diretorio)), ["metricas-encerrados.json"]
+                )
+                self.assertEqual(processo.coletar(), antes)
+
+        self.assertEqual(antes[0][rotulos][0], 2)
+        self.assertEqual(
+            antes[1], {("contagens", "acerto"): 1, ("contagens", "falha"): 1}
+        )
+
+
+class ConexoesBancoTestCase(TestCase):
+    def banco(self):
+        return {"ENGINE": ENGINE_POSTGRESQL, "NAME": "brain"}
+
+    def test_conexoes_persistentes(self):
+        with mock.patch.dict("os.environ", {"DB_CONN_MAX_AGE": "300"}):
+            banco = configurar_conexoes(self.banco(), threads=4)
+
+        self.assertEqual(banco["CONN_MAX_AGE"], 300)
+        self.assertTrue(banco["CONN_HEALTH_CHECKS"])
+        self.assertNotIn("OPTIONS", banco)
+
+    def test_pool_dimensionado_pelas_threads(self):
+        with mock.patch.dict("os.environ", {"DB_POOL": "1", "DB_POOL_MIN": "2"}):
+            with mock.patch.object(Database, "psycopg_pool", object()):
+                banco = configurar_conexoes(self.banco(), threads=4)
+
+            # Sem o psycopg_pool instalado, conexões persistentes.
+            with mock.patch.object(Database, "psycopg_pool", None):
+                self.assertEqual(
+                    configurar_conexoes(self.banco(), threads=4)["CONN_MAX_AGE"], 60
+                )
+
+        self.assertEqual(banco["CONN_MAX_AGE"], 0)
+        self.assertEqual(
+            banco["OPTIONS"]["pool"], {"min_size": 2, "max_size": 4, "timeout": 10}
+        )
+
+    def test_limite_de_conexoes(self):
+        with override_settings(
+            GUNICORN_WORKERS=4, GUNICORN_THREADS=8, DB_LIMITE_CONEXOES=100
+        ):
+            self.assertEqual(verificar_limite_conexoes(None), [])
+
+        with override_settings(
+            GUNICORN_WORKERS=4, GUNICORN_THREADS=8, DB_LIMITE_CONEXOES=20
+        ):
+            (aviso,) = verificar_limite_conexoes(None)
+
+        self.assertEqual(aviso.id, "Core.W001")
+        self.assertIn("32 conexões", aviso.msg)
+
+    def test_asgi_sem_conexoes_persistentes(self):
+        with mock.patch.dict("os.environ", {"DB_CONN_MAX_AGE": "300"}):
+            banco = configurar_conexoes(self.banco(), threads=4, asgi=True)
+
+        self.assertEqual(banco["CONN_MAX_AGE"], 0)
+        self.assertTrue(banco["CONN_HEALTH_CHECKS"])
+
+
+class ViewsAssincronasTestCase(TestCase):
+    url_dashboard = "/api/brainagriculture/v1/dashboards/"
+    url_estados = "/api/localidades/v1/estados/"
+
+    def setUp(self):
+        usuario = Usuarios.objects.create_user(
+            cpf_cnpj="71842388002", nome="Usuario", password="senha12345"
+        )
+        # Os cabeçalhos passados ao construtor do AsyncClient não chegam ao
+        # scope ASGI; vão em cada requisição.
+        self.cabecalhos = {
+            "authorization": f"Bearer {RefreshToken.for_user(usuario).access_token}"
+        }
+
+        estado = Estados.objects.create(nome="Bahia", sigla="BA", codigo_ibge=29)
+        Estados.objects.create(nome="Acre", sigla="AC", codigo_ibge=12)
+        cidade = Cidades.objects.create(
+            nome="Salvador", estado=estado, codigo_ibge=2927408
+        )
+        fazenda = Fazendas.objects.create(
+            nome="Fazenda",
+            produtor=Produtores.objects.create(usuario=usuario),
+            cidade=cidade,
+            area_total=Decimal("100.00"),
+        )
+        safra = Safras.objects.create(fazenda=fazenda, ano=datetime.now().year)
+        Culturas.objects.create(
+            nome="Soja", safra=safra, area_plantada=Decimal("40.00")
+        )
+
+    def test_views_async(self):
+        self.assertTrue(iscoroutinefunction(resolve(self.url_dashboard).func))
+        self.assertTrue(iscoroutinefunction(resolve(self.url_estados).func))
+
+    def test_middlewares_sem_adaptacao_sob_asgi(self):
+        # Um middleware só síncrono faria cada requisição ocupar uma thread.
+        # O Django só registra a adaptação com DEBUG.
+        with self.settings(DEBUG=True), self.assertNoLogs(
+            "django.request", level="DEBUG"
+        ):
+            ASGIHandler().load_middleware(is_async=True)
+
+    async def test_dashboard(self):
+        resposta = await AsyncClient().get(self.url_dashboard, headers=self.cabecalhos)
+
+        self.assertEqual(resposta.status_code, 200)
+        dados = resposta.json()
+        self.assertEqual(dados["totais"]["total_fazendas"], 1)
+        self.assertEqual(dados["por_estado"][0]["sigla"], "BA")
+        self.assertEqual(dados["uso_solo"][1]["area_total"], "40.00")
+
+    async def test_listagem_paginada(self):
+        resposta = await AsyncClient().get(
+            self.url_estados, {"limit": 1}, headers=self.cabecalhos
+        )
+
+        self.assertEqual(resposta.status_code, 200)
+        dados = resposta.json()
+        self.assertEqual(dados["count"], 2)
+        self.assertEqual([estado["sigla"] for estado in dados["results"]], ["AC"])
+
+        resposta = await AsyncClient().get(
+            self.url_estados, {"sigla": "BA"}, headers=self.cabecalhos
+        )
+        self.assertEqual(
+            [estado["nome"] for estado in resposta.json()["results"]], ["Bahia"]
+        )
+
+    async def test_sem_autenticacao(self):
+        resposta = await AsyncClient().get(self.url_dashboard)
+
+        self.assertEqual(resposta.status_code, 401)
+
+    async def test_arquivos_estaticos(self):
+        async def proxima(request):
+            return "api"
+
+        middleware = ArquivosEstaticosMiddleware(proxima)
+        middleware.files["/static/teste.txt"] = mock.Mock(
+            get_response=mock.Mock(
+                return_value=mock.Mock(status=200, file=None, headers=[])
+            )
+        )
+        requisicoes = RequestFactory()
+
+        self.assertTrue(iscoroutinefunction(middleware))
+        self.assertEqual(await middleware(requisicoes.get("/api/")), "api")
+        resposta = await middleware(requisicoes.get("/static/teste.txt"))
+        self.assertEqual(resposta.status_code, 200)
+
+
+class GunicornTestCase(TestCase):
+    def cgroup(self, arquivos):
+        diretorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, diretorio)
+        for caminho, conteudo in arquivos.items():
+            os.makedirs(
+                os.path.dirname(os.path.join(diretorio, caminho)), exist_ok=True
+            )
+            with open(os.path.join(diretorio, caminho), "w") as arquivo:
+                arquivo.write(conteudo)
+
+        return diretorio
+
+    def test_dimensionar(self):
+        giga = 1024**3
+
+        self.assertEqual(dimensionar(4, 8 * giga), (9, 1))
+        # Com pouca memória, a concorrência que falta vira threads.
+        self.assertEqual(dimensionar(4, giga // 2), (3, 3))
+        self.assertEqual(dimensionar(4, 0), (1, 9))
+        self.assertEqual(dimensionar(4, 8 * giga, asgi=True), (4, 1))
+        self.assertEqual(dimensionar(4, giga // 2, asgi=True), (3, 1))
+
+    def test_limites_do_cgroup(self):
+        afinidade = len(os.sched_getaffinity(0))
+        fisica = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+
+        v2 = self.cgroup({"cpu.max": "50000 100000\n", "memory.max": "268435456\n"})
+        self.assertEqual(cpus_disponiveis(v2), 1)
+        self.assertEqual(memoria_disponivel(v2), min(268435456, fisica))
+
+        sem_limite = self.cgroup({"cpu.max": "max 100000\n", "memory.max": "max\n"})
+        self.assertEqual(cpus_disponiveis(sem_limite), afinidade)
+        self.assertEqual(memoria_disponivel(sem_limite), fisica)
+
+        v1 = self.cgroup(
+            {
+                "cpu/cpu.cfs_quota_us": "-1\n",
+                "cpu/cpu.cfs_period_us": "100000\n",
+                "memory/memory.limit_in_bytes": "9223372036854771712\n",
+            }
+        )
+        self.assertEqual(cpus_disponiveis(v1), afinidade)
+        self.assertEqual(memoria_disponivel(v1), fisica)
+
+    def test_configuracao(self):
+        caminho = os.path.join(settings.BASE_DIR, "gunicorn.conf.py")
+
+        with mock.patch.dict(
+            os.environ,
+            {"GUNICORN_ASGI": "1", "GUNICORN_WORKERS": "2", "GUNICORN_THREADS": ""},
+        ):
+            configuracao = runpy.run_path(caminho)
+            threads = os.environ["GUNICORN_THREADS"]
+
+        self.assertEqual(configuracao["workers"], 2)
+        self.assertEqual(threads, "1")
+        self.assertEqual(configuracao["worker_class"], "uvicorn_worker.UvicornWorker")
+        self.assertEqual(
+            configuracao["wsgi_app"], "BrainAgricultureTesteV2.asgi:application"
+        )
+        self.assertTrue(configuracao["preload_app"])
+
+        with mock.patch.dict(
+            os.environ,
+            {"GUNICORN_ASGI": "", "GUNICORN_WORKERS": "3", "GUNICORN_THREADS": "4"},
+        ):
+            configuracao = runpy.run_path(caminho)
+
+        self.assertEqual(configuracao["worker_class"], "gthread")
+        self.assertEqual(configuracao["max_requests"], 1000)
+
+
+class EsquemaOpenAPITestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = "/api/schema/"
+
+    def test_esquema_versionado_atualizado(self):
+        self.assertEqual(
+            gerar_esquema().decode(),
+            CAMINHO_ESQUEMA.read_text(),
+            "O esquema OpenAPI está desatualizado: execute "
+            "python manage.py gerar_esquema_openapi.",
+        )
+
+    def test_faixas_inteiros_independentes_do_banco(self):
+        campo = Estados._meta.get_field("codigo_ibge")
+        faixa_do_banco = connection.ops.integer_field_range("IntegerField")
+
+        with faixas_inteiros_padrao():
+            limites = {validador.limit_value for validador in campo.validators}
+        self.assertEqual(limites, {-2147483648, 2147483647})
+
+        limites = {validador.limit_value for validador in campo.validators}
+        self.assertEqual(limites, set(faixa_do_banco))
+
+    def test_esquema_servido_sem_gerar(self):
+        with mock.patch(
+            "drf_spectacular.generators.SchemaGenerator.get_schema",
+            side_effect=AssertionError("esquema gerado na requisição"),
+        ):
+            response = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertTrue(response["ETag"].endswith('-gzip"'))
+        self.assertTrue(
+            response["Content-Type"].startswith("application/vnd.oai.openapi")
+        )
+        self.assertEqual(
+            gzip.decompress(response.content), CAMINHO_ESQUEMA.read_bytes()
+        )
+
+    def test_esquema_nao_modificado(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["ETag"], etag)
+
+    def test_esquema_json(self):
+        response = self.client.get(self.url, {"format": "json"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Content-Encoding", response)
+        esquema = json.loads(response.content)
+        self.assertIn("/api/localidades/v1/cidades/dump/", esquema["paths"])
+        self.assertNotEqual(response["ETag"], self.client.get(self.url)["ETag"])
+
+
+@override_settings(
+    TRACES_LIMITE_LENTA_MS=1000,
+    TRACES_TAXA_PADRAO=0.01,
+    TRACES_TAXAS_POR_ROTA={"/metrics": 0},
+)
+class TracingTestCase(TestCase):
+    url = "/api/brainagriculture/v1/dashboards/"
+
+    def setUp(self):
+        usuario = Usuarios.objects.create_user(
+            cpf_cnpj="71842388002", nome="Usuario", password="senha12345", is_admin=True
+        )
+        self.token = RefreshToken.for_user(usuario).access_token
+
+        self.cliente_anterior = sentry_sdk.get_client()
+        sentry_sdk.init(
+            dsn="https://chave@sentry.invalid/1",
+            integrations=[DjangoIntegration()],
+            transport=TransporteLocal,
+            traces_sampler=amostrar_traces,
+            before_send_transaction=filtrar_transacao,
+        )
+        self.transporte = sentry_sdk.get_client().transport
+
+        # Como o test client do Django: a requisição não fecha a conexão do
+        # banco do teste.
+        request_finished.disconnect(close_old_connections)
+
+    def tearDown(self):
+        request_finished.connect(close_old_connections)
+        sentry_sdk.get_global_scope().set_client(self.cliente_anterior)
+
+    def requisitar(self, url):
+        # Pela aplicação WSGI, como em produção, para passar pela integração
+        # do Sentry com o Django.
+        environ = RequestFactory()._base_environ(
+            PATH_INFO=url, HTTP_AUTHORIZATION=f"Bearer {self.token}"
+        )
+        status = []
+        resposta = get_wsgi_application()(
+            environ, lambda codigo, cabecalhos: status.append(codigo)
+        )
+        b"".join(resposta)
+        resposta.close()
+
+        return status[0]
+
+    def test_transacao_lenta_sempre_enviada(self):
+        with override_settings(TRACES_LIMITE_LENTA_MS=0):
+            self.assertEqual(self.requisitar(self.url), "200 OK")
+
+        (transacao,) = self.transporte.transacoes()
+        self.assertEqual(transacao["transaction"], self.url)
+        self.assertEqual(transacao["tags"]["amostragem"], "lenta")
+
+        spans = {span["description"]: span for span in transacao["spans"]}
+        self.assertEqual(
+            spans["DashboardBusiness.aget_dashboard_completo"]["op"], "dashboard"
+        )
+        # Os spans dos serviços chamados pelo dashboard são filhos do dele
+        # (os métodos async são medidos durante a execução da corrotina).
+        self.assertEqual(
+            spans["DashboardBusiness.aget_totais"]["parent_span_id"],
+            spans["DashboardBusiness.aget_dashboard_completo"]["span_id"],
+        )
+        self.assertGreater(
+            spans["DashboardBusiness.aget_dashboard_completo"]["timestamp"],
+            spans["DashboardBusiness.aget_uso_solo"]["start_timestamp"],
+        )
+
+    def test_transacoes_rapidas_amostradas_pela_taxa_da_rota(self):
+        with mock.patch("Core.Tracing.random.random", return_value=0.5):
+            self.requisitar(self.url)
+        self.assertEqual(self.transporte.transacoes(), [])
+
+        with mock.patch("Core.Tracing.random.random", return_value=0.001):
+            self.requisitar(self.url)
+        (transacao,) = self.transporte.transacoes()
+        self.assertEqual(transacao["tags"]["amostragem"], "rapida")
+
+        with override_settings(TRACES_TAXAS_POR_ROTA={"/api/brainagriculture/": 1}):
+            with mock.patch("Core.Tracing.random.random", return_value=0.5):
+                self.requisitar(self.url)
+        self.assertEqual(len(self.transporte.transacoes()), 2)
+
+    def test_rota_com_taxa_zero_nao_rastreada(self):
+        with override_settings(TRACES_LIMITE_LENTA_MS=0):
+            self.requisitar("/metrics")
+
+        self.assertEqual(self.transporte.transacoes(), [])
+
+    def test_rastrear_fora_de_transacao(self):
+        with rastrear("sem_transacao") as span:
+            self.assertIsNone(span)
+
+        self.assertEqual(DashboardBusiness.get_totais.__name__, "get_totais")
+        self.assertEqual(DashboardBusiness.get_totais()["total_fazendas"], 0)
+
+
+DIGITOS = "0123456789"
+
+
+class ValidarCpfCnpjTestCase(TestCase):
+    def gerar_valores(self, quantidade, semente=20250601):
+        """
+        Gera CPFs/CNPJs válidos, com um dígito alterado, com dígitos repetidos,
+        com pontuação e com tamanhos errados.
+        """
+        aleatorio = random.Random(semente)
+        valores = []
+
+        for _ in range(quantidade):
+            tamanho = aleatorio.choice((11, 14, 11, 14, 10, 13, 15))
+            valor = "".join(aleatorio.choices(DIGITOS, k=tamanho))
+
+            if tamanho in (11, 14):
+                # Completa a base com os dígitos verificadores corretos.
+                base = valor[: tamanho - 2]
+                for final in (f"{numero:02d}" for numero in range(100)):
+                    if validar_cpf_cnpj_original(base + final, False) is True:
+                        valor = base + final
+                        break
+
+                variacao = aleatorio.random()
+                if variacao < 0.3:
+                    posicao = aleatorio.randrange(tamanho)
+                    valor = (
+                        valor[:posicao]
+                        + str((int(valor[posicao]) + 1) % 10)
+                        + valor[posicao + 1 :]
+                    )
+                elif variacao < 0.35:
+                    valor = aleatorio.choice(DIGITOS) * tamanho
+
+            if aleatorio.random() < 0.3:
+                posicao = aleatorio.randrange(len(valor))
+                valor = valor[:posicao] + aleatorio.choice(".-/") + valor[posicao:]
+
+            valores.append(valor)
+
+        return valores
+
+    def resultado(self, funcao, valor, levantar_excessao):
+        try:
+            return ("ok", funcao(valor, levantar_excessao=levantar_excessao))
+        except ValidationError as erro:
+            return ("erro", [str(mensagem) for mensagem in erro.messages])
+
+    def test_equivalente_a_implementacao_original(self):
+        valores = self.gerar_valores(5000)
+        self.assertGreater(sum(validar_lote(valores).validos), 500)
+
+        for valor in valores:
+            self.assertEqual(
+                self.resultado(validar_cpf_cnpj, valor, True),
+                self.resultado(validar_cpf_cnpj_original, valor, True),
+                valor,
+            )
+
+            original = self.resultado(validar_cpf_cnpj_original, valor, False)
+            esperado = original[1] if original[0] == "ok" else False
+            self.assertIs(validar_cpf_cnpj(valor, levantar_excessao=False), esperado)
+
+    def test_sem_excecao_nao_levanta_para_digitos_repetidos(self):
+        self.assertFalse(validar_cpf_cnpj("11111111111", levantar_excessao=False))
+        self.assertFalse(validar_cpf_cnpj("123", levantar_excessao=False))
+        self.assertFalse(validar_cpf_cnpj("7184238800a", levantar_excessao=False))
+
+    def test_validar_lote(self):
+        resultado = validar_lote(
+            ["718.423.880-02", "71842388003", "11111111111", "38.213.704/0001-15"]
+        )
+
+        self.assertEqual(resultado.validos, [True, False, False, True])
+        self.assertEqual(
+            [motivo and str(motivo) for motivo in resultado.motivos],
+            [
+                None,
+                "O CPF é inválido.",
+                "CPF inválido: todos os dígitos são iguais.",
+                None,
+            ],
+        )
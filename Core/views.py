@@ -0,0 +1,52 @@
+from django.http import HttpResponse
+from drf_spectacular.utils import extend_schema
+from rest_framework.permissions import AllowAny
+from rest_framework.views import APIView
+
+from .Compression import codificacoes_aceitas, resposta_comprimida
+from .Metrics import METRICAS, formatar_prometheus
+from .OpenAPI import CONTENT_TYPES_ESQUEMA, obter_esquema
+from .Permissions import EhAdmin
+
+CONTENT_TYPE_PROMETHEUS = "text/plain; version=0.0.4; charset=utf-8"
+
+# O esquema muda a cada deploy: o navegador sempre revalida, pelo ETag.
+CACHE_CONTROL_ESQUEMA = "public, no-cache"
+
+
+@extend_schema(exclude=True)
+class MetricasView(APIView):
+    """
+    Métricas de desempenho das requisições e dos caches, somadas entre os
+    workers, no formato texto do Prometheus. Apenas administradores.
+    """
+
+    permission_classes = [EhAdmin]
+
+    def get(self, request):
+        return HttpResponse(
+            formatar_prometheus(*METRICAS.coletar()),
+            content_type=CONTENT_TYPE_PROMETHEUS,
+        )
+
+
+@extend_schema(exclude=True)
+class EsquemaOpenAPIView(APIView):
+    """
+    Esquema OpenAPI da API, usado pelo Swagger e pelo Redoc: o arquivo
+    gerado pelo comando gerar_esquema_openapi, comprimido e com ETag, em vez
+    de gerado a cada requisição. Em JSON com ?format=json.
+    """
+
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        formato = "json" if request.query_params.get("format") == "json" else "yaml"
+        artefato = obter_esquema(
+            formato, codificacoes_aceitas(request.headers.get("Accept-Encoding", ""))
+        )
+
+        return resposta_comprimida(
+            request, *artefato, CONTENT_TYPES_ESQUEMA[formato], CACHE_CONTROL_ESQUEMA
+        )
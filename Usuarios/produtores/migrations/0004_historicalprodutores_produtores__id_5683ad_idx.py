@@ -0,0 +1,19 @@
+# Generated by Django 5.2.1 on 2026-10-19 16:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('produtores', '0003_remove_historicalprodutores_nome_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='historicalprodutores',
+            index=models.Index(fields=['id', 'history_date'], name='produtores__id_5683ad_idx'),
+        ),
+    ]
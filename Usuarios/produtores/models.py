@@ -15,6 +15,8 @@ class Produtores(BasicModel):
     )
     nome = None
 
+    caminho_dono = "usuario"
+
     def __str__(self):
         return self.usuario.nome
 
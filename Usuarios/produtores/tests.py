@@ -92,24 +92,25 @@ class ProdutoresViewSetTestCase(TestCase):
     def setUp(self):
         self.client = APIClient()
 
-        self.user1 = Usuarios.objects.create_user(
-            cpf_cnpj=cpf_valido_1, nome="User One", password="password123"
-        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user1 = Usuarios.objects.create_user(
+                cpf_cnpj=cpf_valido_1, nome="User One", password="password123"
+            )
 
-        self.user2 = Usuarios.objects.create_user(
-            cpf_cnpj=cpf_valido_2, nome="User Two", password="password123"
-        )
+            self.user2 = Usuarios.objects.create_user(
+                cpf_cnpj=cpf_valido_2, nome="User Two", password="password123"
+            )
 
-        self.user3 = Usuarios.objects.create_user(
-            cpf_cnpj=cpf_valido_3, nome="User Three", password="password123"
-        )
+            self.user3 = Usuarios.objects.create_user(
+                cpf_cnpj=cpf_valido_3, nome="User Three", password="password123"
+            )
 
-        self.admin_user = Usuarios.objects.create_superuser(
-            cpf_cnpj=cnpj_valido, nome="Admin User", password="adminpassword123"
-        )
+            self.admin_user = Usuarios.objects.create_superuser(
+                cpf_cnpj=cnpj_valido, nome="Admin User", password="adminpassword123"
+            )
 
-        self.produtor1 = Produtores.objects.create(usuario=self.user1)
-        self.produtor2 = Produtores.objects.create(usuario=self.user2)
+            self.produtor1 = Produtores.objects.create(usuario=self.user1)
+            self.produtor2 = Produtores.objects.create(usuario=self.user2)
 
         self.list_url = reverse("usuarios:produtores-list")
         self.detail_url = lambda pk: reverse(
@@ -261,3 +262,18 @@ class ProdutoresViewSetTestCase(TestCase):
 
         view.kwargs = {"pk": 99999}
         self.assertFalse(view.get_dono_do_registro(None))
+
+    def test_24_list_produtores_admin_consultas_constantes(self):
+        usuarios = Usuarios.objects.bulk_create(
+            Usuarios(cpf_cnpj=f"{i:011d}", nome=f"Usuario {i}") for i in range(1000)
+        )
+        Produtores.objects.bulk_create(
+            Produtores(usuario=usuario) for usuario in usuarios
+        )
+        self.client.force_authenticate(user=self.admin_user)
+
+        # count da paginação + listagem
+        with self.assertNumQueries(2):
+            response = self.client.get(self.list_url, {"limit": 1002})
+
+        self.assertEqual(len(response.data["results"]), 1002)
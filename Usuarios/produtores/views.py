@@ -5,6 +5,7 @@ from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import OpenApiParameter, extend_schema
 
 from Core.BasicModelViewSet import BasicModelViewSet
+from Core.Ownership import PoliticaDono
 from Core.Permissions import EhAdmin, EhMeuDadoOuSouAdmin
 
 from .models import Produtores
@@ -18,6 +19,7 @@ class ProdutoresViewSet(BasicModelViewSet):
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ["usuario__nome", "usuario__cpf_cnpj", "usuario__is_active"]
     http_method_names = ["get", "post", "patch", "delete"]
+    queryset_restrito_ao_dono = True
 
     @extend_schema(
         parameters=[
@@ -45,21 +47,9 @@ class ProdutoresViewSet(BasicModelViewSet):
         return super().list(request, *args, **kwargs)
 
     def get_queryset(self):
-        qs = super().get_queryset()
-
-        if not EhAdmin().has_permission(self.request, self):
-            qs = qs.filter(usuario=self.request.user)
-
-        return qs
+        return PoliticaDono.visiveis(super().get_queryset(), self.request.user)
 
     def get_permissions(self):
         if self.request.method == "GET":
             return [EhMeuDadoOuSouAdmin()]
         return [EhAdmin()]
-
-    def get_dono_do_registro(self, obj):
-        try:
-            produtor = Produtores.objects.get(pk=self.kwargs.get("pk"))
-            return self.request.user.id == produtor.usuario.id
-        except:
-            return False
@@ -0,0 +1,187 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from Core.Metrics import registrar_cache
+from Usuarios.produtores.models import Produtores
+
+from .models import TokensRevogados, Usuarios
+
+CLAIM_IS_ADMIN = "is_admin"
+CLAIM_IS_ACTIVE = "is_active"
+CLAIM_PRODUTOR_ID = "produtor_id"
+CLAIMS_USUARIO = (CLAIM_IS_ADMIN, CLAIM_IS_ACTIVE, CLAIM_PRODUTOR_ID)
+
+# Por quanto tempo cada worker reaproveita a consulta à tabela de revogações
+# antes de consultá-la novamente.
+TTL_VERIFICACAO_REVOGACAO = getattr(settings, "AUTENTICACAO_TTL_VERIFICACAO", 5)
+
+
+def claims_do_usuario(usuario):
+    """
+    Monta as claims que permitem autenticar o usuário sem consultar o banco.
+
+    Args:
+        usuario: Instância de Usuarios
+
+    Returns:
+        Dicionário com is_admin, is_active e produtor_id (None se o usuário
+        não tiver perfil de produtor)
+    """
+    perfil = Usuarios.produtor_perfil.related
+    if perfil.is_cached(usuario):
+        produtor = perfil.get_cached_value(usuario)
+        produtor_id = produtor.id if produtor is not None else None
+    else:
+        produtor_id = (
+            Produtores.objects.filter(usuario_id=usuario.pk)
+            .values_list("id", flat=True)
+            .first()
+        )
+
+    return {
+        CLAIM_IS_ADMIN: usuario.is_admin,
+        CLAIM_IS_ACTIVE: usuario.is_active,
+        CLAIM_PRODUTOR_ID: produtor_id,
+    }
+
+
+class RefreshTokenComClaims(RefreshToken):
+    """
+    RefreshToken que carrega as claims do usuário, copiadas também para os
+    access tokens gerados a partir dele.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+
+        for claim, valor in claims_do_usuario(user).items():
+            token[claim] = valor
+
+        return token
+
+
+class RevogacaoTokens:
+    """
+    Marca os usuários cujas claims mudaram (desativação, alteração de
+    permissões, criação ou exclusão do perfil de produtor).
+
+    A marca fica na tabela TokensRevogados (gravada na mesma transação da
+    alteração); tokens emitidos até o momento da marca deixam de ser
+    confiáveis e o usuário passa a ser lido do banco.
+    """
+
+    @staticmethod
+    def _chave(usuario_id):
+        return f"revogacao_tokens:{usuario_id}"
+
+    @staticmethod
+    def marcar(usuario_id):
+        """
+        Registra que os tokens já emitidos para o usuário estão desatualizados.
+
+        Args:
+            usuario_id: ID do usuário
+        """
+        TokensRevogados.objects.update_or_create(
+            usuario_id=usuario_id, defaults={"revogado_em": timezone.now()}
+        )
+        cache.delete(RevogacaoTokens._chave(usuario_id))
+
+    @staticmethod
+    def revogado_em(usuario_id):
+        """
+        Retorna o instante (timestamp) da última marca do usuário, ou 0 se não
+        houver marca vigente.
+
+        O resultado é memorizado no cache local do worker por
+        TTL_VERIFICACAO_REVOGACAO segundos.
+        """
+        chave = RevogacaoTokens._chave(usuario_id)
+
+        revogado_em = cache.get(chave)
+        registrar_cache("revogacao_tokens", revogado_em is not None)
+        if revogado_em is None:
+            marca = (
+                TokensRevogados.objects.filter(usuario_id=usuario_id)
+                .values_list("revogado_em", flat=True)
+                .first()
+            )
+            revogado_em = int(marca.timestamp()) if marca is not None else 0
+            cache.set(chave, revogado_em, timeout=TTL_VERIFICACAO_REVOGACAO)
+
+        return revogado_em
+
+
+class JWTClaimsAuthentication(JWTAuthentication):
+    """
+    Autenticação JWT que monta o usuário a partir das claims do token, sem
+    consultar a tabela de usuários.
+
+    O usuário é lido do banco apenas quando o token não tem as claims (tokens
+    emitidos sem RefreshTokenComClaims) ou quando foi emitido antes de uma
+    marca de RevogacaoTokens.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            usuario_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        if any(claim not in validated_token for claim in CLAIMS_USUARIO):
+            return self.get_user_do_banco(usuario_id)
+
+        if validated_token.get("iat", 0) <= RevogacaoTokens.revogado_em(usuario_id):
+            return self.get_user_do_banco(usuario_id)
+
+        if not validated_token[CLAIM_IS_ACTIVE]:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        return self.montar_usuario(usuario_id, validated_token)
+
+    def get_user_do_banco(self, usuario_id):
+        try:
+            usuario = Usuarios.objects.select_related("produtor_perfil").get(
+                **{api_settings.USER_ID_FIELD: usuario_id}
+            )
+        except Usuarios.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if not usuario.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        return usuario
+
+    @staticmethod
+    def montar_usuario(usuario_id, validated_token):
+        """
+        Instancia um Usuarios "leve" com os dados das claims, já com o perfil
+        de produtor em cache, para que request.user.produtor_perfil e
+        comparações com request.user não gerem consultas.
+        """
+        usuario = Usuarios(
+            id=usuario_id,
+            is_admin=validated_token[CLAIM_IS_ADMIN],
+            is_active=True,
+        )
+        usuario._state.adding = False
+        usuario._state.db = "default"
+
+        produtor_id = validated_token[CLAIM_PRODUTOR_ID]
+        produtor = None
+        if produtor_id is not None:
+            produtor = Produtores(id=produtor_id, usuario_id=usuario_id)
+            produtor._state.adding = False
+            produtor._state.db = "default"
+            Produtores.usuario.field.set_cached_value(produtor, usuario)
+
+        Usuarios.produtor_perfil.related.set_cached_value(usuario, produtor)
+
+        return usuario
@@ -0,0 +1,84 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+from Core.DataVersions import incrementar_versao, obter_versao
+from Core.Metrics import registrar_cache
+
+from .models import Usuarios
+
+CHAVE_VERSAO_USUARIOS = "usuarios"
+
+
+class CacheLoginNegativo:
+    """
+    Cache local (por worker) dos CPFs/CNPJs sem cadastro que tentaram login,
+    para que tentativas repetidas não consultem o banco.
+
+    As entradas são versionadas pelo carimbo "usuarios" do Core.DataVersions,
+    renovado sempre que um usuário é cadastrado ou tem o CPF/CNPJ alterado, o
+    que invalida o cache negativo de todos os workers de uma vez.
+    """
+
+    @staticmethod
+    def _chave(cpf_cnpj):
+        return f"login_negativo:{obter_versao(CHAVE_VERSAO_USUARIOS)}:{cpf_cnpj}"
+
+    @staticmethod
+    def contem(cpf_cnpj):
+        contem = cache.get(CacheLoginNegativo._chave(cpf_cnpj)) is not None
+        registrar_cache("login_negativo", contem)
+
+        return contem
+
+    @staticmethod
+    def adicionar(cpf_cnpj):
+        cache.set(
+            CacheLoginNegativo._chave(cpf_cnpj),
+            True,
+            timeout=settings.LOGIN_CACHE_NEGATIVO_TTL,
+        )
+
+    @staticmethod
+    def invalidar():
+        incrementar_versao(CHAVE_VERSAO_USUARIOS)
+
+
+class CpfCnpjModelBackend(ModelBackend):
+    """
+    ModelBackend do login por CPF/CNPJ.
+
+    - Consulta negativa em cache: CPFs/CNPJs sem cadastro não consultam o
+      banco novamente enquanto estiverem no CacheLoginNegativo. O hash
+      "de mentira" do ModelBackend continua sendo calculado, para que o tempo
+      de resposta não revele se o CPF/CNPJ existe.
+    - O perfil de produtor é carregado na mesma consulta do usuário, para a
+      montagem das claims do token.
+    - A regravação da senha com o hasher atual (PASSWORD_HASHERS[0]) é feita
+      pelo check_password do Django quando o hash armazenado está
+      desatualizado.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(Usuarios.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        if CacheLoginNegativo.contem(username):
+            Usuarios().set_password(password)
+            return None
+
+        try:
+            usuario = Usuarios._default_manager.select_related("produtor_perfil").get(
+                **{Usuarios.USERNAME_FIELD: username}
+            )
+        except Usuarios.DoesNotExist:
+            CacheLoginNegativo.adicionar(username)
+            Usuarios().set_password(password)
+            return None
+
+        if usuario.check_password(password) and self.user_can_authenticate(usuario):
+            return usuario
+
+        return None
@@ -0,0 +1,276 @@
+import csv
+import io
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+from django.contrib.auth.hashers import make_password
+from django.db import DatabaseError
+
+from Core.BulkHistory import HistoricoEmLote
+from Core.Counting import ContagemEstimada
+from Core.Validations import validar_lote
+from Usuarios.produtores.models import Produtores
+
+from .backends import CacheLoginNegativo
+from .models import Usuarios
+
+TAMANHO_MINIMO_SENHA = 8
+TAMANHO_LOTE_PROVISIONAMENTO = 500
+MOTIVO_HISTORICO_PROVISIONAMENTO = "Provisionamento em lote"
+
+# Abaixo desta quantidade de senhas o custo de subir o pool de processos não
+# compensa, e o hash é feito no próprio processo.
+MINIMO_SENHAS_POOL = 16
+
+
+def _inicializar_processo_hash():
+    import django
+
+    django.setup()
+
+
+class ProvisionamentoBusinessService:
+    """
+    Cadastro em lote de usuários e perfis de produtor (ex.: onboarding de uma
+    cooperativa), a partir de registros com cpf_cnpj, nome, password e,
+    opcionalmente, is_admin.
+    """
+
+    @staticmethod
+    def ler_arquivo(conteudo, formato):
+        """
+        Converte o conteúdo de um arquivo CSV ou JSON em uma lista de registros.
+
+        Args:
+            conteudo: Conteúdo do arquivo (str ou bytes)
+            formato: "csv" ou "json"
+
+        Returns:
+            Lista de dicionários, um por registro
+
+        Raises:
+            ValueError: Se o formato for desconhecido ou o conteúdo inválido
+        """
+        if isinstance(conteudo, bytes):
+            conteudo = conteudo.decode("utf-8-sig")
+
+        if formato == "csv":
+            return list(csv.DictReader(io.StringIO(conteudo)))
+
+        if formato == "json":
+            registros = json.loads(conteudo)
+            if not isinstance(registros, list):
+                raise ValueError("O JSON deve conter uma lista de registros.")
+            if not all(isinstance(registro, dict) for registro in registros):
+                raise ValueError("Cada registro do JSON deve ser um objeto.")
+            return registros
+
+        raise ValueError(f"Formato '{formato}' não suportado (use csv ou json).")
+
+    @staticmethod
+    def hash_senhas(senhas, processos=1):
+        """
+        Gera os hashes das senhas, distribuindo o trabalho entre processos
+        quando processos > 1 (usado pelo comando provisionar_usuarios; nas
+        requisições, o hash é feito no próprio worker).
+
+        Args:
+            senhas: Lista de senhas em texto puro
+            processos: Quantidade de processos
+
+        Returns:
+            Lista de hashes, na mesma ordem das senhas
+        """
+        if processos <= 1 or len(senhas) < MINIMO_SENHAS_POOL:
+            return [make_password(senha) for senha in senhas]
+
+        processos = min(processos, len(senhas))
+        with ProcessPoolExecutor(
+            max_workers=processos, initializer=_inicializar_processo_hash
+        ) as executor:
+            return list(
+                executor.map(
+                    make_password,
+                    senhas,
+                    chunksize=max(1, len(senhas) // (processos * 4)),
+                )
+            )
+
+    @staticmethod
+    def validar_registros(registros):
+        """
+        Valida os registros em lote: campos obrigatórios, CPF/CNPJ, senha,
+        duplicidade dentro do próprio lote e CPF/CNPJ já cadastrados (com uma
+        única consulta).
+
+        Returns:
+            Tupla (validos, erros): validos é uma lista de (linha, registro
+            normalizado) e erros uma lista de dicionários com linha, cpf_cnpj
+            e erros
+        """
+        erros = []
+        candidatos = []
+        vistos = set()
+
+        cpfs_cnpjs = [
+            "".join(filter(str.isdigit, str(registro.get("cpf_cnpj") or "")))
+            for registro in registros
+        ]
+        motivos = validar_lote(cpfs_cnpjs).motivos
+
+        for linha, (registro, cpf_cnpj, motivo) in enumerate(
+            zip(registros, cpfs_cnpjs, motivos), start=1
+        ):
+            mensagens = []
+            nome = str(registro.get("nome") or "").strip()
+            senha = str(registro.get("password") or "")
+
+            if not cpf_cnpj:
+                mensagens.append("CPF/CNPJ não informado.")
+            else:
+                if motivo is not None:
+                    mensagens.append(str(motivo))
+
+                if cpf_cnpj in vistos:
+                    mensagens.append("CPF/CNPJ repetido no arquivo.")
+                vistos.add(cpf_cnpj)
+
+            if not nome:
+                mensagens.append("Nome não informado.")
+
+            if len(senha) < TAMANHO_MINIMO_SENHA:
+                mensagens.append(
+                    f"A senha deve ter pelo menos {TAMANHO_MINIMO_SENHA} caracteres."
+                )
+
+            if mensagens:
+                erros.append({"linha": linha, "cpf_cnpj": cpf_cnpj, "erros": mensagens})
+                continue
+
+            is_admin = registro.get("is_admin", False)
+            if isinstance(is_admin, str):
+                is_admin = is_admin.strip().lower() in ("1", "true", "sim")
+
+            candidatos.append(
+                (
+                    linha,
+                    {
+                        "cpf_cnpj": cpf_cnpj,
+                        "nome": nome,
+                        "password": senha,
+                        "is_admin": bool(is_admin),
+                    },
+                )
+            )
+
+        existentes = set(
+            Usuarios.objects.filter(
+                cpf_cnpj__in=[registro["cpf_cnpj"] for _, registro in candidatos]
+            ).values_list("cpf_cnpj", flat=True)
+        )
+
+        validos = []
+        for linha, registro in candidatos:
+            if registro["cpf_cnpj"] in existentes:
+                erros.append(
+                    {
+                        "linha": linha,
+                        "cpf_cnpj": registro["cpf_cnpj"],
+                        "erros": ["Já existe um usuário cadastrado com este CPF/CNPJ."],
+                    }
+                )
+            else:
+                validos.append((linha, registro))
+
+        return validos, erros
+
+    @staticmethod
+    def provisionar(
+        registros,
+        criar_produtor=True,
+        tamanho_lote=TAMANHO_LOTE_PROVISIONAMENTO,
+        processos=1,
+    ):
+        """
+        Cria os usuários (e, opcionalmente, seus perfis de produtor) em lote.
+
+        As senhas são criptografadas (em paralelo, com processos > 1) e os
+        usuários, produtores e registros de histórico são inseridos com
+        bulk_create em um HistoricoEmLote, uma transação por lote de
+        tamanho_lote registros. Um lote que falhe no banco é
+        desfeito por inteiro e suas linhas são reportadas como erro, sem
+        afetar os demais lotes.
+
+        Args:
+            registros: Lista de dicionários com cpf_cnpj, nome, password e,
+                opcionalmente, is_admin
+            criar_produtor: Se True, cria o perfil de produtor de cada usuário
+            tamanho_lote: Quantidade de registros por transação
+            processos: Quantidade de processos para o hash das senhas
+
+        Returns:
+            Dicionário com usuarios_criados, produtores_criados e erros (lista
+            com linha, cpf_cnpj e erros de cada registro rejeitado)
+        """
+        validos, erros = ProvisionamentoBusinessService.validar_registros(registros)
+
+        hashes = ProvisionamentoBusinessService.hash_senhas(
+            [registro["password"] for _, registro in validos], processos
+        )
+
+        usuarios_criados, produtores_criados = 0, 0
+
+        for inicio in range(0, len(validos), tamanho_lote):
+            lote = validos[inicio : inicio + tamanho_lote]
+            usuarios = []
+
+            for (_, registro), senha in zip(
+                lote, hashes[inicio : inicio + tamanho_lote]
+            ):
+                usuario = Usuarios(
+                    cpf_cnpj=registro["cpf_cnpj"],
+                    nome=registro["nome"],
+                    password=senha,
+                    is_admin=registro["is_admin"],
+                )
+                # bulk_create não chama save(); aplica a mesma normalização.
+                usuario.capitalizar_nome()
+                usuarios.append(usuario)
+
+            try:
+                with HistoricoEmLote(
+                    motivo=MOTIVO_HISTORICO_PROVISIONAMENTO, tamanho_lote=tamanho_lote
+                ) as historico:
+                    usuarios = historico.criar(Usuarios, usuarios)
+                    if criar_produtor:
+                        historico.criar(
+                            Produtores,
+                            [Produtores(usuario=usuario) for usuario in usuarios],
+                        )
+
+                    # bulk_create não dispara os sinais que invalidam os
+                    # caches; invalidados uma vez por lote, após o commit.
+                    historico.adiar(CacheLoginNegativo.invalidar)
+                    historico.adiar(ContagemEstimada.invalidar, Usuarios, Produtores)
+            except DatabaseError as erro:
+                erros.extend(
+                    {
+                        "linha": linha,
+                        "cpf_cnpj": registro["cpf_cnpj"],
+                        "erros": [f"Erro ao gravar o lote: {erro}"],
+                    }
+                    for linha, registro in lote
+                )
+                continue
+
+            usuarios_criados += len(usuarios)
+            if criar_produtor:
+                produtores_criados += len(usuarios)
+
+        erros.sort(key=lambda erro: erro["linha"])
+
+        return {
+            "usuarios_criados": usuarios_criados,
+            "produtores_criados": produtores_criados,
+            "erros": erros,
+        }
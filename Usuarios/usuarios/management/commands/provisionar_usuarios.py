@@ -0,0 +1,76 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from Usuarios.usuarios.business import (
+    TAMANHO_LOTE_PROVISIONAMENTO,
+    ProvisionamentoBusinessService,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Cadastra usuários e perfis de produtor em lote a partir de um arquivo "
+        "CSV ou JSON com os campos cpf_cnpj, nome, password e, opcionalmente, "
+        "is_admin."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("arquivo", help="Caminho do arquivo CSV ou JSON.")
+        parser.add_argument(
+            "--formato",
+            choices=["csv", "json"],
+            help="Formato do arquivo (padrão: extensão do arquivo).",
+        )
+        parser.add_argument(
+            "--sem-produtor",
+            action="store_true",
+            help="Não cria o perfil de produtor dos usuários.",
+        )
+        parser.add_argument(
+            "--processos",
+            type=int,
+            help="Processos usados no hash das senhas (padrão: todos os núcleos).",
+        )
+        parser.add_argument(
+            "--tamanho-lote",
+            type=int,
+            default=TAMANHO_LOTE_PROVISIONAMENTO,
+            help=f"Registros por transação (padrão {TAMANHO_LOTE_PROVISIONAMENTO}).",
+        )
+
+    def handle(self, *args, **options):
+        formato = options["formato"] or (
+            os.path.splitext(options["arquivo"])[1].lstrip(".").lower()
+        )
+
+        try:
+            with open(options["arquivo"], "rb") as arquivo:
+                registros = ProvisionamentoBusinessService.ler_arquivo(
+                    arquivo.read(), formato
+                )
+        except FileNotFoundError:
+            raise CommandError(f"Arquivo '{options['arquivo']}' não encontrado.")
+        except (ValueError, UnicodeDecodeError) as erro:
+            raise CommandError(f"Arquivo inválido: {erro}")
+
+        resultado = ProvisionamentoBusinessService.provisionar(
+            registros,
+            criar_produtor=not options["sem_produtor"],
+            tamanho_lote=options["tamanho_lote"],
+            processos=options["processos"] or os.cpu_count() or 1,
+        )
+
+        for erro in resultado["erros"]:
+            self.stderr.write(
+                f"Linha {erro['linha']} ({erro['cpf_cnpj'] or '-'}): "
+                + " ".join(erro["erros"])
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{resultado['usuarios_criados']} usuários e "
+                f"{resultado['produtores_criados']} produtores criados; "
+                f"{len(resultado['erros'])} linhas com erro."
+            )
+        )
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.1 on 2026-10-19 16:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0003_remove_historicalusuarios_last_login_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='historicalusuarios',
+            index=models.Index(fields=['id', 'history_date'], name='usuarios_hi_id_3078d8_idx'),
+        ),
+    ]
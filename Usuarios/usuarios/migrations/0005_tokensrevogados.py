@@ -0,0 +1,24 @@
+# Generated by Django 5.2.1 on 2026-10-19 18:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0004_historicalusuarios_usuarios_hi_id_3078d8_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TokensRevogados',
+            fields=[
+                ('usuario_id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='Usuário')),
+                ('revogado_em', models.DateTimeField(help_text='Tokens emitidos até este instante não são mais confiáveis.', verbose_name='Revogado em')),
+            ],
+            options={
+                'verbose_name': 'Revogação de Tokens',
+                'verbose_name_plural': 'Revogações de Tokens',
+            },
+        ),
+    ]
@@ -107,3 +107,23 @@ class Usuarios(AbstractBaseUser, BasicModel):
         self.capitalizar_nome()
 
         super().save(*args, **kwargs)
+
+
+class TokensRevogados(models.Model):
+    """
+    Marca de revogação dos tokens de um usuário (ver
+    Usuarios.usuarios.authentication.RevogacaoTokens).
+
+    Sem chave estrangeira, para que a marca permaneça após a exclusão do
+    usuário.
+    """
+
+    usuario_id = models.BigIntegerField(_("Usuário"), primary_key=True)
+    revogado_em = models.DateTimeField(
+        _("Revogado em"),
+        help_text=_("Tokens emitidos até este instante não são mais confiáveis."),
+    )
+
+    class Meta:
+        verbose_name = _("Revogação de Tokens")
+        verbose_name_plural = _("Revogações de Tokens")
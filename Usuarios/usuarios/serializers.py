@@ -1,11 +1,38 @@
 from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ObjectDoesNotExist
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
+)
+from rest_framework_simplejwt.settings import api_settings
 
 from Core.Validations import validar_cpf_cnpj
 
+from .authentication import RefreshTokenComClaims, claims_do_usuario
 from .models import Usuarios
 
 
+def serializar_produtor_perfil(obj):
+    """
+    Representação do perfil de produtor do usuário. Usa a anotação
+    produtor_perfil_id feita pelo UsuariosViewSet quando presente, evitando
+    uma consulta por usuário.
+    """
+    if hasattr(obj, "produtor_perfil_id"):
+        produtor_perfil_id = obj.produtor_perfil_id
+    else:
+        try:
+            produtor_perfil_id = obj.produtor_perfil.id
+        except ObjectDoesNotExist:
+            produtor_perfil_id = None
+
+    if produtor_perfil_id is None:
+        return ""
+
+    return {"id": produtor_perfil_id}
+
+
 class UsuariosSerializer(serializers.ModelSerializer):
     class Meta:
         model = Usuarios
@@ -17,11 +44,7 @@ class UsuariosSerializer(serializers.ModelSerializer):
     produtor_perfil = serializers.SerializerMethodField()
 
     def get_produtor_perfil(self, obj):
-        try:
-            data = {"id": obj.produtor_perfil.id}
-            return data
-        except:
-            return ""
+        return serializar_produtor_perfil(obj)
 
 
 class Usuarios2AdminSerializer(serializers.ModelSerializer):
@@ -36,11 +59,7 @@ class Usuarios2AdminSerializer(serializers.ModelSerializer):
     produtor_perfil = serializers.SerializerMethodField()
 
     def get_produtor_perfil(self, obj):
-        try:
-            data = {"id": obj.produtor_perfil.id}
-            return data
-        except:
-            return ""
+        return serializar_produtor_perfil(obj)
 
     def validate_cpf_cnpj(self, value):
         if validar_cpf_cnpj(value, levantar_excessao=False):
@@ -57,3 +76,72 @@ class Usuarios2AdminSerializer(serializers.ModelSerializer):
             )
 
         return make_password(password=password)
+
+
+class TokenClaimsObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    Emite o par de tokens com as claims is_admin, is_active e produtor_id.
+    """
+
+    token_class = RefreshTokenComClaims
+
+
+class TokenClaimsRefreshSerializer(TokenRefreshSerializer):
+    """
+    Renova o access token regravando as claims com os dados atuais do
+    usuário, para que alterações feitas após o login passem a valer.
+    """
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+
+        refresh = self.token_class(attrs["refresh"])
+        usuario = Usuarios.objects.filter(
+            **{api_settings.USER_ID_FIELD: refresh[api_settings.USER_ID_CLAIM]}
+        ).first()
+        if usuario is None:
+            return data
+
+        access = refresh.access_token
+        access.set_iat()
+        for claim, valor in claims_do_usuario(usuario).items():
+            access[claim] = valor
+
+        data["access"] = str(access)
+
+        return data
+
+
+class ProvisionamentoSerializer(serializers.Serializer):
+    registros = serializers.ListField(
+        child=serializers.DictField(),
+        required=False,
+        help_text="Registros com cpf_cnpj, nome, password e, opcionalmente, is_admin.",
+    )
+    arquivo = serializers.FileField(
+        required=False,
+        help_text="Arquivo .csv ou .json com os registros (alternativa a 'registros').",
+    )
+    criar_produtor = serializers.BooleanField(
+        default=True, help_text="Cria o perfil de produtor de cada usuário."
+    )
+
+    def validate(self, attrs):
+        if ("registros" in attrs) == ("arquivo" in attrs):
+            raise serializers.ValidationError(
+                "Informe 'registros' ou 'arquivo' (apenas um deles)."
+            )
+
+        return attrs
+
+
+class ProvisionamentoErroSerializer(serializers.Serializer):
+    linha = serializers.IntegerField()
+    cpf_cnpj = serializers.CharField()
+    erros = serializers.ListField(child=serializers.CharField())
+
+
+class ProvisionamentoResultadoSerializer(serializers.Serializer):
+    usuarios_criados = serializers.IntegerField()
+    produtores_criados = serializers.IntegerField()
+    erros = ProvisionamentoErroSerializer(many=True)
@@ -0,0 +1,75 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from Usuarios.produtores.models import Produtores
+
+from .authentication import RevogacaoTokens
+from .backends import CacheLoginNegativo
+from .models import Usuarios
+
+CAMPOS_CLAIMS = ("is_active", "is_admin")
+
+
+def _altera(campos, update_fields):
+    return update_fields is None or not set(campos).isdisjoint(update_fields)
+
+
+@receiver(pre_save, sender=Usuarios)
+def guardar_valores_anteriores(sender, instance, update_fields, **kwargs):
+    if instance._state.adding:
+        return
+
+    campos = []
+    if _altera(CAMPOS_CLAIMS, update_fields):
+        campos += CAMPOS_CLAIMS
+    if _altera(("cpf_cnpj",), update_fields):
+        campos.append("cpf_cnpj")
+    if not campos:
+        return
+
+    instance._valores_anteriores = (
+        Usuarios.objects.filter(pk=instance.pk).values(*campos).first() or {}
+    )
+
+
+@receiver(post_save, sender=Usuarios)
+def invalidar_cache_login_negativo(sender, instance, created, update_fields, **kwargs):
+    # Apenas cadastros e alterações de CPF/CNPJ tornam um login negativo
+    # em cache inválido. A versão é renovada após o commit: antes dele, uma
+    # tentativa de login concorrente ainda não veria o usuário e gravaria o
+    # resultado negativo já na versão nova.
+    if not created:
+        if not _altera(("cpf_cnpj",), update_fields):
+            return
+        anteriores = getattr(instance, "_valores_anteriores", {})
+        if anteriores.get("cpf_cnpj") == instance.cpf_cnpj:
+            return
+
+    transaction.on_commit(CacheLoginNegativo.invalidar)
+
+
+@receiver(post_save, sender=Usuarios)
+def revogar_tokens_se_claims_mudaram(
+    sender, instance, created, update_fields, **kwargs
+):
+    if created or not _altera(CAMPOS_CLAIMS, update_fields):
+        return
+
+    anteriores = getattr(instance, "_valores_anteriores", {})
+    claims_anteriores = tuple(anteriores.get(campo) for campo in CAMPOS_CLAIMS)
+    claims_atuais = tuple(getattr(instance, campo) for campo in CAMPOS_CLAIMS)
+    if claims_anteriores != claims_atuais:
+        RevogacaoTokens.marcar(instance.pk)
+
+
+@receiver(post_delete, sender=Usuarios)
+def revogar_tokens_usuario_excluido(sender, instance, **kwargs):
+    RevogacaoTokens.marcar(instance.pk)
+
+
+@receiver(post_save, sender=Produtores)
+@receiver(post_delete, sender=Produtores)
+def revogar_tokens_perfil_produtor(sender, instance, **kwargs):
+    if kwargs.get("created", True):
+        RevogacaoTokens.marcar(instance.usuario_id)
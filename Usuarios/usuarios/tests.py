@@ -1,15 +1,36 @@
+import io
+import json
+import os
+import tempfile
 from unittest.mock import patch
 
-from django.contrib.auth.hashers import check_password
+from django.contrib.auth.hashers import (
+    PBKDF2PasswordHasher,
+    PBKDF2SHA1PasswordHasher,
+    check_password,
+)
+from django.core.cache import cache, caches
 from django.core.exceptions import ValidationError as DjangoValidationError
-from django.test import TestCase
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.exceptions import ValidationError as DRFValidationError
-from rest_framework.test import APIClient
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
 
+from Core.DataVersions import ALIAS_CACHE_VERSOES
+from Core.Hashers import PBKDF2ConfiguravelPasswordHasher
 from Core.Validations import validar_cpf_cnpj
-from Usuarios.usuarios.models import Usuarios
+from Usuarios.produtores.models import Produtores
+from Usuarios.usuarios.authentication import JWTClaimsAuthentication
+from Usuarios.usuarios.business import (
+    MINIMO_SENHAS_POOL,
+    ProvisionamentoBusinessService,
+)
+from Usuarios.usuarios.models import TokensRevogados, Usuarios
 from Usuarios.usuarios.serializers import Usuarios2AdminSerializer, UsuariosSerializer
 
 cpf_valido = "66898615033"
@@ -223,25 +244,26 @@ class UsuariosPermissionsTestCase(TestCase):
     def setUp(self):
         self.client = APIClient()
 
-        self.user1 = Usuarios.objects.create_user(
-            cpf_cnpj="34492326065", nome="User One", password="password123"
-        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user1 = Usuarios.objects.create_user(
+                cpf_cnpj="34492326065", nome="User One", password="password123"
+            )
 
-        self.user2 = Usuarios.objects.create_user(
-            cpf_cnpj="34573021035", nome="User Two", password="password123"
-        )
+            self.user2 = Usuarios.objects.create_user(
+                cpf_cnpj="34573021035", nome="User Two", password="password123"
+            )
 
-        self.user3 = Usuarios.objects.create_user(
-            cpf_cnpj="66331149074", nome="User Three", password="password123"
-        )
+            self.user3 = Usuarios.objects.create_user(
+                cpf_cnpj="66331149074", nome="User Three", password="password123"
+            )
 
-        self.admin1 = Usuarios.objects.create_superuser(
-            cpf_cnpj="49829339000194", nome="Admin One", password="adminpass123"
-        )
+            self.admin1 = Usuarios.objects.create_superuser(
+                cpf_cnpj="49829339000194", nome="Admin One", password="adminpass123"
+            )
 
-        self.admin2 = Usuarios.objects.create_superuser(
-            cpf_cnpj="87875513000124", nome="Admin Two", password="adminpass123"
-        )
+            self.admin2 = Usuarios.objects.create_superuser(
+                cpf_cnpj="87875513000124", nome="Admin Two", password="adminpass123"
+            )
 
         self.list_url = reverse("usuarios:usuarios-list")
         self.detail_url = lambda pk: reverse(
@@ -393,3 +415,366 @@ class UsuariosPermissionsTestCase(TestCase):
             self.detail_url(self.user2.pk), update_data, format="json"
         )
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class JWTClaimsAuthenticationTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.autenticacao = JWTClaimsAuthentication()
+
+        self.user = Usuarios.objects.create_user(
+            cpf_cnpj=cpf_valido, nome="Test User", password="testpassword"
+        )
+        self.produtor = Produtores.objects.create(usuario=self.user)
+
+        # Descarta as marcas de revogação geradas pela criação dos dados.
+        cache.clear()
+        TokensRevogados.objects.all().delete()
+
+    def obter_tokens(self, senha="testpassword"):
+        response = self.client.post(
+            reverse("token_obtain_pair"),
+            {"cpf_cnpj": cpf_valido, "password": senha},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def autenticar(self, access):
+        request = APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {access}")
+        return self.autenticacao.authenticate(request)[0]
+
+    def test_33_token_contem_claims(self):
+        access = AccessToken(self.obter_tokens()["access"])
+
+        self.assertEqual(access["is_admin"], False)
+        self.assertEqual(access["is_active"], True)
+        self.assertEqual(access["produtor_id"], self.produtor.id)
+
+    def test_34_autenticacao_sem_consultas(self):
+        access = self.obter_tokens()["access"]
+
+        # A primeira autenticação consulta apenas a marca de revogação, que
+        # fica memorizada no worker.
+        with self.assertNumQueries(1):
+            self.autenticar(access)
+
+        with self.assertNumQueries(0):
+            usuario = self.autenticar(access)
+            self.assertEqual(usuario, self.user)
+            self.assertFalse(usuario.is_admin)
+            self.assertEqual(usuario.produtor_perfil, self.produtor)
+            self.assertEqual(usuario.produtor_perfil.usuario, self.user)
+
+    def test_35_autenticacao_usuario_sem_produtor(self):
+        self.produtor.delete()
+        cache.clear()
+        TokensRevogados.objects.all().delete()
+        access = self.obter_tokens()["access"]
+        self.autenticar(access)
+
+        with self.assertNumQueries(0):
+            usuario = self.autenticar(access)
+            self.assertFalse(hasattr(usuario, "produtor_perfil"))
+
+    def test_36_usuario_desativado_revoga_tokens(self):
+        access = self.obter_tokens()["access"]
+
+        self.user.is_active = False
+        self.user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.autenticar(access)
+
+    def test_37_alteracao_sem_claims_nao_revoga_tokens(self):
+        access = self.obter_tokens()["access"]
+
+        self.user.nome = "Outro Nome"
+        self.user.save()
+
+        self.assertFalse(TokensRevogados.objects.exists())
+        with self.assertNumQueries(1):
+            self.autenticar(access)
+
+    def test_37_usuario_excluido_revoga_tokens(self):
+        access = self.obter_tokens()["access"]
+        usuario_id = self.user.id
+
+        self.user.delete()
+
+        self.assertTrue(TokensRevogados.objects.filter(usuario_id=usuario_id).exists())
+        with self.assertRaises(AuthenticationFailed):
+            self.autenticar(access)
+
+    def test_38_refresh_atualiza_claims(self):
+        refresh = self.obter_tokens()["refresh"]
+
+        self.produtor.delete()
+        response = self.client.post(
+            reverse("token_refresh"), {"refresh": refresh}, format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(AccessToken(response.data["access"])["produtor_id"])
+
+    def test_39_token_sem_claims_consulta_banco(self):
+        access = str(RefreshToken.for_user(self.user).access_token)
+
+        with self.assertNumQueries(1):
+            usuario = self.autenticar(access)
+            self.assertEqual(usuario.produtor_perfil, self.produtor)
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class ProvisionamentoTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin_user = Usuarios.objects.create_superuser(
+            cpf_cnpj=cnpj_valido, nome="Admin User", password="adminpassword"
+        )
+        self.user = Usuarios.objects.create_user(
+            cpf_cnpj=cpf_valido, nome="Test User", password="testpassword"
+        )
+        self.url = reverse("usuarios:usuarios-provisionar")
+
+    def test_40_provisionar_registros_json(self):
+        self.client.force_authenticate(user=self.admin_user)
+
+        registros = [
+            {
+                "cpf_cnpj": "718.423.880-02",
+                "nome": "joão da silva",
+                "password": "senha123",
+            },
+            {"cpf_cnpj": "11111111111", "nome": "CPF Inválido", "password": "senha123"},
+            {"cpf_cnpj": "97533461070", "nome": "maria souza", "password": "senha123"},
+            {"cpf_cnpj": "97533461070", "nome": "Repetido", "password": "senha123"},
+            {"cpf_cnpj": cpf_valido, "nome": "Já Existe", "password": "senha123"},
+            {"cpf_cnpj": "38213704000115", "nome": "", "password": "curta"},
+        ]
+
+        with patch(
+            "Usuarios.usuarios.business.ProcessPoolExecutor"
+        ) as pool, self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                self.url, {"registros": registros}, format="json"
+            )
+
+        # Na requisição, as senhas são criptografadas no próprio worker.
+        pool.assert_not_called()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["usuarios_criados"], 2)
+        self.assertEqual(response.data["produtores_criados"], 2)
+        self.assertEqual(
+            [erro["linha"] for erro in response.data["erros"]], [2, 4, 5, 6]
+        )
+        self.assertEqual(len(response.data["erros"][3]["erros"]), 2)
+
+        usuario = Usuarios.objects.get(cpf_cnpj="71842388002")
+        self.assertEqual(usuario.nome, "João da Silva")
+        self.assertTrue(usuario.check_password("senha123"))
+        self.assertTrue(Produtores.objects.filter(usuario=usuario).exists())
+        self.assertEqual(
+            usuario.history.get().history_change_reason, "Provisionamento em lote"
+        )
+
+    def test_41_provisionar_arquivo_csv(self):
+        self.client.force_authenticate(user=self.admin_user)
+
+        arquivo = SimpleUploadedFile(
+            "usuarios.csv",
+            b"cpf_cnpj,nome,password\n71842388002,Usuario Um,senha1234\n",
+            content_type="text/csv",
+        )
+        response = self.client.post(
+            self.url, {"arquivo": arquivo, "criar_produtor": False}, format="multipart"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["usuarios_criados"], 1)
+        self.assertEqual(response.data["produtores_criados"], 0)
+        self.assertFalse(Produtores.objects.exists())
+
+    def test_41_provisionar_arquivo_json_invalido(self):
+        self.client.force_authenticate(user=self.admin_user)
+
+        arquivo = SimpleUploadedFile(
+            "usuarios.json", b'[1, "x"]', content_type="application/json"
+        )
+        response = self.client.post(self.url, {"arquivo": arquivo}, format="multipart")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("Arquivo inválido", response.data["detail"])
+
+    def test_42_provisionar_apenas_admin(self):
+        self.client.force_authenticate(user=self.user)
+
+        response = self.client.post(self.url, {"registros": []}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(PROVISIONAMENTO_LIMITE_REQUISICAO=1)
+    def test_42_provisionar_acima_do_limite(self):
+        self.client.force_authenticate(user=self.admin_user)
+        registros = [
+            {"cpf_cnpj": "71842388002", "nome": "Um", "password": "senha123"},
+            {"cpf_cnpj": "97533461070", "nome": "Dois", "password": "senha123"},
+        ]
+
+        response = self.client.post(self.url, {"registros": registros}, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        self.assertIn("provisionar_usuarios", response.data["detail"])
+        self.assertFalse(Usuarios.objects.filter(cpf_cnpj="71842388002").exists())
+
+    def test_43_hash_senhas_em_paralelo(self):
+        senhas = [f"senha{i:04d}" for i in range(MINIMO_SENHAS_POOL)]
+
+        hashes = ProvisionamentoBusinessService.hash_senhas(senhas, processos=2)
+
+        self.assertEqual(len(hashes), len(senhas))
+        for senha, hash_senha in zip(senhas, hashes):
+            self.assertTrue(check_password(senha, hash_senha))
+
+    def test_44_comando_provisionar_usuarios(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as arquivo:
+            json.dump(
+                [
+                    {
+                        "cpf_cnpj": "71842388002",
+                        "nome": "Usuario Um",
+                        "password": "senha1234",
+                    }
+                ],
+                arquivo,
+            )
+        self.addCleanup(os.remove, arquivo.name)
+
+        call_command("provisionar_usuarios", arquivo.name, stdout=io.StringIO())
+
+        self.assertTrue(
+            Produtores.objects.filter(usuario__cpf_cnpj="71842388002").exists()
+        )
+
+
+class UsuariosListagemTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.admin_user = Usuarios.objects.create_superuser(
+                cpf_cnpj=cnpj_valido, nome="Admin User", password="adminpassword"
+            )
+
+            usuarios = Usuarios.objects.bulk_create(
+                Usuarios(cpf_cnpj=f"{i:011d}", nome=f"Usuario {i}") for i in range(1000)
+            )
+            self.produtores = {
+                produtor.usuario_id: produtor.id
+                for produtor in Produtores.objects.bulk_create(
+                    Produtores(usuario=usuario) for usuario in usuarios[::2]
+                )
+            }
+
+    def test_45_listagem_admin_consultas_constantes(self):
+        self.client.force_authenticate(user=self.admin_user)
+
+        # count da paginação + listagem com o perfil de produtor anotado
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                reverse("usuarios:usuarios-list"), {"limit": 1001}
+            )
+
+        self.assertEqual(len(response.data["results"]), 1001)
+        for usuario in response.data["results"]:
+            produtor_id = self.produtores.get(usuario["id"])
+            esperado = {"id": produtor_id} if produtor_id else ""
+            self.assertEqual(usuario["produtor_perfil"], esperado)
+
+
+class LoginTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+        caches[ALIAS_CACHE_VERSOES].clear()
+
+        self.user = Usuarios.objects.create_user(
+            cpf_cnpj=cpf_valido, nome="Test User", password="testpassword"
+        )
+        self.produtor = Produtores.objects.create(usuario=self.user)
+
+    def login(self, cpf_cnpj=cpf_valido, senha="testpassword"):
+        return self.client.post(
+            reverse("token_obtain_pair"),
+            {"cpf_cnpj": cpf_cnpj, "password": senha},
+            format="json",
+        )
+
+    def test_46_login_com_uma_consulta(self):
+        with self.assertNumQueries(1):
+            response = self.login()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            AccessToken(response.data["access"])["produtor_id"], self.produtor.id
+        )
+
+    def test_47_senha_regravada_com_hasher_atual(self):
+        for hasher in (PBKDF2PasswordHasher(), PBKDF2SHA1PasswordHasher()):
+            Usuarios.objects.filter(pk=self.user.pk).update(
+                password=hasher.encode("testpassword", hasher.salt())
+            )
+
+            response = self.login()
+
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            algoritmo, iteracoes, *_ = Usuarios.objects.get(
+                pk=self.user.pk
+            ).password.split("$")
+            self.assertEqual(algoritmo, "pbkdf2_sha256")
+            self.assertEqual(
+                int(iteracoes), PBKDF2ConfiguravelPasswordHasher.iterations
+            )
+
+        self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+
+    def test_48_cache_negativo_cpf_cnpj_desconhecido(self):
+        with self.assertNumQueries(1):
+            response = self.login(cpf_cnpj="71842388002")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        with self.assertNumQueries(0):
+            response = self.login(cpf_cnpj="71842388002")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            Usuarios.objects.create_user(
+                cpf_cnpj="71842388002", nome="Novo Usuario", password="novasenha123"
+            )
+
+            # Antes do commit, o cache negativo não é invalidado: um login
+            # concorrente não grava o resultado negativo na versão nova.
+            with self.assertNumQueries(0):
+                response = self.login(cpf_cnpj="71842388002")
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        for callback in callbacks:
+            callback()
+
+        response = self.login(cpf_cnpj="71842388002", senha="novasenha123")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_49_cache_negativo_mantido_em_alteracoes_sem_cpf_cnpj(self):
+        self.login(cpf_cnpj="71842388002")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.nome = "Outro Nome"
+            self.user.save()
+
+        with self.assertNumQueries(0):
+            self.login(cpf_cnpj="71842388002")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.cpf_cnpj = "71842388002"
+            self.user.save()
+
+        self.assertEqual(self.login(cpf_cnpj="71842388002").status_code, 200)
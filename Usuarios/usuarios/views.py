@@ -1,15 +1,29 @@
+import os
 from typing import override
 
+from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
+from django.db.models import OuterRef, Subquery
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import OpenApiParameter, extend_schema
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
+from rest_framework.response import Response
 
 from Core.BasicModelViewSet import BasicModelViewSet
 from Core.Permissions import EhAdmin, EhMeuDadoOuSouAdmin
+from Usuarios.produtores.models import Produtores
 
+from .business import ProvisionamentoBusinessService
 from .models import Usuarios
-from .serializers import Usuarios2AdminSerializer, UsuariosSerializer
+from .serializers import (
+    ProvisionamentoResultadoSerializer,
+    ProvisionamentoSerializer,
+    Usuarios2AdminSerializer,
+    UsuariosSerializer,
+)
 
 
 @extend_schema(tags=["Usuarios - Usuarios"])
@@ -51,6 +65,17 @@ class UsuariosViewSet(BasicModelViewSet):
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
+    def get_queryset(self):
+        return (
+            super()
+            .get_queryset()
+            .annotate(
+                produtor_perfil_id=Subquery(
+                    Produtores.objects.filter(usuario=OuterRef("pk")).values("id")[:1]
+                )
+            )
+        )
+
     def get_serializer_class(self):
         if (
             isinstance(self.request.user, AnonymousUser)
@@ -66,3 +91,55 @@ class UsuariosViewSet(BasicModelViewSet):
 
     def get_dono_do_registro(self, obj):
         return self.request.user.id == int(self.kwargs.get("pk", None))
+
+    @extend_schema(
+        summary="Provisionamento em lote de usuários e produtores",
+        description=(
+            "Cria usuários (e seus perfis de produtor) a partir de uma lista de "
+            "registros em JSON ou de um arquivo CSV/JSON, reportando os erros "
+            "por linha. Apenas administradores. Aceita até "
+            "PROVISIONAMENTO_LIMITE_REQUISICAO registros (padrão: 50) por "
+            "requisição; acima disso, responde 413 e a carga deve ser feita "
+            "pelo comando provisionar_usuarios."
+        ),
+        request=ProvisionamentoSerializer,
+        responses={200: ProvisionamentoResultadoSerializer},
+    )
+    @action(
+        detail=False,
+        methods=["post"],
+        parser_classes=[JSONParser, MultiPartParser, FormParser],
+    )
+    def provisionar(self, request):
+        serializer = ProvisionamentoSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        registros = serializer.validated_data.get("registros")
+        if registros is None:
+            arquivo = serializer.validated_data["arquivo"]
+            formato = os.path.splitext(arquivo.name)[1].lstrip(".").lower()
+            try:
+                registros = ProvisionamentoBusinessService.ler_arquivo(
+                    arquivo.read(), formato
+                )
+            except (ValueError, UnicodeDecodeError) as erro:
+                return Response(
+                    {"detail": f"Arquivo inválido: {erro}"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+        limite = settings.PROVISIONAMENTO_LIMITE_REQUISICAO
+        if len(registros) > limite:
+            return Response(
+                {
+                    "detail": f"Máximo de {limite} registros por requisição; "
+                    "para cargas maiores, use o comando provisionar_usuarios."
+                },
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            )
+
+        resultado = ProvisionamentoBusinessService.provisionar(
+            registros, criar_produtor=serializer.validated_data["criar_produtor"]
+        )
+
+        return Response(resultado, status=status.HTTP_200_OK)
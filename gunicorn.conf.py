@@ -0,0 +1,96 @@
+"""
+Configuração do gunicorn, carregada automaticamente quando ele é iniciado na
+raiz do projeto (`gunicorn`, sem argumentos, como no Dockerfile).
+
+Workers e threads são dimensionados pelas CPUs e pela memória disponíveis
+para o container (Core.Gunicorn.dimensionar), salvo se GUNICORN_WORKERS e
+GUNICORN_THREADS forem informados; os valores escolhidos são repassados às
+settings, que dimensionam por eles as conexões com o banco. Com
+GUNICORN_ASGI=1, serve a aplicação ASGI com os workers do uvicorn.
+
+A aplicação é carregada no processo master (preload_app) e compartilhada
+com os workers (copy-on-write); cada worker é reciclado após
+GUNICORN_MAX_REQUESTS requisições (mais até GUNICORN_MAX_REQUESTS_JITTER,
+para que não reiniciem todos juntos), limitando o crescimento da memória.
+"""
+
+import os
+import time
+
+from Core.Gunicorn import cpus_disponiveis, dimensionar, memoria_disponivel
+
+INICIO = time.monotonic()
+
+asgi = os.environ.get("GUNICORN_ASGI") == "1"
+
+workers_calculados, threads_calculadas = dimensionar(
+    cpus_disponiveis(), memoria_disponivel(), asgi=asgi
+)
+workers = int(os.environ.get("GUNICORN_WORKERS") or workers_calculados)
+threads = int(os.environ.get("GUNICORN_THREADS") or threads_calculadas)
+
+# Usados pelas settings para dimensionar as conexões com o banco.
+os.environ["GUNICORN_WORKERS"] = str(workers)
+os.environ["GUNICORN_THREADS"] = str(threads)
+
+if asgi:
+    wsgi_app = "BrainAgricultureTesteV2.asgi:application"
+    worker_class = "uvicorn_worker.UvicornWorker"
+else:
+    wsgi_app = "BrainAgricultureTesteV2.wsgi:application"
+    worker_class = "gthread" if threads > 1 else "sync"
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+preload_app = True
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 1000))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", 100))
+
+# O heartbeat dos workers em memória, e não no disco do container.
+if os.path.isdir("/dev/shm"):
+    worker_tmp_dir = "/dev/shm"
+
+
+def when_ready(server):
+    from Core.Gunicorn import preaquecer
+
+    preaquecer()
+    server.log.info(
+        "Aplicação carregada em %.0f ms (%s workers %s, %s threads)",
+        (time.monotonic() - INICIO) * 1000,
+        workers,
+        worker_class,
+        threads,
+    )
+
+
+def pre_fork(server, worker):
+    # Os workers não devem herdar as conexões com o banco do master.
+    from django.db import connections
+
+    connections.close_all()
+
+
+def post_fork(server, worker):
+    worker.inicio = time.monotonic()
+
+
+def post_worker_init(worker):
+    worker.log.info(
+        "Worker %s pronto em %.0f ms",
+        worker.pid,
+        (time.monotonic() - worker.inicio) * 1000,
+    )
+
+
+def worker_exit(server, worker):
+    worker.log.info(
+        "Worker %s encerrado após %.0f s", worker.pid, time.monotonic() - worker.inicio
+    )
+
+
+def child_exit(server, worker):
+    # No master: as métricas do worker encerrado são somadas às dos
+    # anteriores (Core.Metrics), em vez de deixarem um arquivo cada.
+    from Core.Metrics import METRICAS
+
+    METRICAS.consolidar(worker.pid)